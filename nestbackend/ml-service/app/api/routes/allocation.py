@@ -0,0 +1,121 @@
+from fastapi import APIRouter, HTTPException, Depends
+from fastapi.concurrency import run_in_threadpool
+from typing import Dict, Optional
+from loguru import logger
+
+from app.models.schemas import (
+    AllocationSessionRequest, AllocationSessionState, AllocationSessionEvent,
+    SessionStudentsRequest, CapacityUpdate
+)
+from app.services.allocation_session import allocation_sessions, AllocationSession
+from app.services.matching_engine import MatchingEngine
+from app.api.routes.matching import get_matching_engine, resolve_internships, saturated_error
+from app.core.executor import ExecutorSaturated, matching_executor
+from app.core.metrics import InstrumentedRoute
+
+router = APIRouter(route_class=InstrumentedRoute)
+
+def get_session(session_id: str) -> AllocationSession:
+    try:
+        return allocation_sessions.get(session_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Unknown allocation session: {session_id}")
+
+async def run_event(func, *args, **kwargs):
+    # Sessions live in this process, so events run on its threads, under
+    # the matching executor's admission control.
+    try:
+        return await matching_executor.run_local(func, *args, **kwargs)
+    except ExecutorSaturated as e:
+        raise saturated_error(e)
+
+@router.post("", response_model=AllocationSessionEvent)
+async def create_session(
+    request: AllocationSessionRequest,
+    engine: MatchingEngine = Depends(get_matching_engine)
+):
+    internships, internship_features = resolve_internships(request)
+    
+    def create():
+        features = internship_features
+        if features is None:
+            features = engine.score_matrix.build_internship_features(internships)
+        
+        session = allocation_sessions.create(
+            engine.score_matrix,
+            features,
+            diversity_boost=request.diversity_boost,
+            top_k=request.top_k,
+            min_score=request.min_score_threshold
+        )
+        return session.add_students(request.students)
+    
+    try:
+        return await run_event(create)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error creating allocation session: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/{session_id}", response_model=AllocationSessionState)
+async def session_state(session: AllocationSession = Depends(get_session)):
+    # Waits on the session's lock, which a running event may hold.
+    return await run_in_threadpool(session.summary)
+
+@router.get("/{session_id}/allocation", response_model=Dict[str, str])
+async def session_allocation(session: AllocationSession = Depends(get_session)):
+    return await run_in_threadpool(session.allocation)
+
+@router.post("/{session_id}/students", response_model=AllocationSessionEvent)
+async def add_students(
+    request: SessionStudentsRequest,
+    session: AllocationSession = Depends(get_session)
+):
+    try:
+        return await run_event(session.add_students, request.students)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error adding students to session {session.session_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.delete("/{session_id}/students/{student_id}", response_model=AllocationSessionEvent)
+async def withdraw_student(student_id: str, session: AllocationSession = Depends(get_session)):
+    if student_id not in session.students:
+        raise HTTPException(status_code=404, detail=f"Unknown student: {student_id}")
+    return await run_event(session.withdraw, student_id)
+
+@router.patch(
+    "/{session_id}/internships/{internship_id}/capacity",
+    response_model=AllocationSessionEvent
+)
+async def update_capacity(
+    internship_id: str,
+    update: CapacityUpdate,
+    session: AllocationSession = Depends(get_session)
+):
+    if not session.has_internship(internship_id):
+        raise HTTPException(status_code=404, detail=f"Unknown internship: {internship_id}")
+    return await run_event(
+        session.update_capacity,
+        internship_id,
+        capacity=update.capacity,
+        filled_positions=update.filled_positions
+    )
+
+@router.post("/{session_id}/reoptimize", response_model=AllocationSessionEvent)
+async def reoptimize(
+    solver: Optional[str] = None,
+    session: AllocationSession = Depends(get_session)
+):
+    try:
+        return await run_event(session.reoptimize, solver)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+@router.delete("/{session_id}", response_model=AllocationSessionState)
+async def close_session(session: AllocationSession = Depends(get_session)):
+    allocation_sessions.remove(session.session_id)
+    return await run_in_threadpool(session.summary)
@@ -3,8 +3,9 @@ from loguru import logger
 
 from app.models.schemas import AnalyticsRequest, AnalyticsResponse
 from app.services.analytics_service import AnalyticsService
+from app.core.metrics import InstrumentedRoute
 
-router = APIRouter()
+router = APIRouter(route_class=InstrumentedRoute)
 
 @router.post("/generate", response_model=AnalyticsResponse)
 async def generate_analytics(request: AnalyticsRequest):
@@ -0,0 +1,85 @@
+from fastapi import APIRouter, HTTPException, File, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from loguru import logger
+
+from app.models.schemas import (
+    CatalogUpsertRequest, CatalogUpsertResponse, CatalogInfo,
+    CapacityUpdate, InternshipOpportunity, CatalogBulkUpsertResponse
+)
+from app.services.internship_catalog import internship_catalog, UnknownInternships
+from app.services.bulk_ingest import UploadError, load_upload, load_internships
+from app.core.metrics import InstrumentedRoute, stage
+
+router = APIRouter(route_class=InstrumentedRoute)
+
+@router.get("", response_model=CatalogInfo)
+async def catalog_info():
+    return internship_catalog.info()
+
+@router.post("/internships", response_model=CatalogUpsertResponse)
+async def upsert_internships(request: CatalogUpsertRequest):
+    try:
+        logger.info(f"Upserting {len(request.internships)} internships into catalog")
+        
+        return await run_in_threadpool(internship_catalog.upsert, request.internships)
+        
+    except Exception as e:
+        logger.error(f"Error upserting internships: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/internships/bulk", response_model=CatalogBulkUpsertResponse)
+async def bulk_upsert_internships(file: UploadFile = File(...)):
+    data = await file.read()
+    try:
+        with stage("parse"):
+            internships, report = await run_in_threadpool(
+                load_upload, data, file.filename, file.content_type, load_internships
+            )
+    except UploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+    if not internships:
+        raise HTTPException(
+            status_code=422,
+            detail={"message": "No valid internship rows", "validation_report": report}
+        )
+    
+    try:
+        logger.info(
+            f"Upserting {len(internships)} uploaded internships into catalog "
+            f"({report['invalid_rows']} rejected)"
+        )
+        
+        result = await run_in_threadpool(internship_catalog.upsert, internships)
+        return {**result, "validation_report": report}
+        
+    except Exception as e:
+        logger.error(f"Error upserting internships: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/internships/{internship_id}", response_model=InternshipOpportunity)
+async def get_internship(internship_id: str):
+    try:
+        return internship_catalog.get(internship_id)
+    except UnknownInternships:
+        raise HTTPException(status_code=404, detail=f"Unknown internship: {internship_id}")
+
+@router.patch("/internships/{internship_id}/capacity", response_model=InternshipOpportunity)
+async def update_capacity(internship_id: str, update: CapacityUpdate):
+    try:
+        return internship_catalog.update_capacity(
+            internship_id,
+            filled_positions=update.filled_positions,
+            capacity=update.capacity
+        )
+    except UnknownInternships:
+        raise HTTPException(status_code=404, detail=f"Unknown internship: {internship_id}")
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+@router.delete("/internships/{internship_id}", response_model=CatalogInfo)
+async def remove_internship(internship_id: str):
+    try:
+        internship_catalog.remove(internship_id)
+    except UnknownInternships:
+        raise HTTPException(status_code=404, detail=f"Unknown internship: {internship_id}")
+    return internship_catalog.info()
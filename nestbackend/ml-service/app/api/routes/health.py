@@ -1,21 +1,33 @@
 from fastapi import APIRouter
+from fastapi.responses import JSONResponse
 from datetime import datetime
 
+from app.core.executor import matching_executor
+from app.core.model_manager import model_manager
+from app.core.startup import startup
+
 router = APIRouter()
 
 @router.get("/health")
 async def health_check():
-    return {
-        "status": "healthy",
+    # Stays healthy while models load; only a failed load, which the
+    # process cannot recover from, makes it unhealthy.
+    failed = startup.status == "failed"
+    body = {
+        "status": "unhealthy" if failed else "healthy",
         "service": "PM Internship Matching ML Service",
         "timestamp": datetime.utcnow().isoformat(),
-        "version": "1.0.0"
+        "version": "1.0.0",
+        "startup": startup.status,
+        "matching_queue": matching_executor.stats()
     }
+    return JSONResponse(status_code=503, content=body) if failed else body
 
 @router.get("/ready")
 async def readiness_check():
-    return {
-        "status": "ready",
-        "models_loaded": True,
+    body = {
+        **startup.report(),
+        "models_loaded": model_manager.skill_encoder is not None,
         "timestamp": datetime.utcnow().isoformat()
     }
+    return body if startup.ready else JSONResponse(status_code=503, content=body)
@@ -0,0 +1,87 @@
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+from loguru import logger
+
+from app.models.schemas import (
+    MatchRequest, AllocationRequest, JobStatus, JobResultsPage
+)
+from app.services.jobs import job_manager, JobNotFound
+from app.api.routes.matching import resolve_internships
+from app.core.metrics import InstrumentedRoute
+
+router = APIRouter(route_class=InstrumentedRoute)
+
+def job_request(request, internships) -> dict:
+    # Jobs keep their own copy of the postings so a resumed run scores
+    # against exactly what was submitted, whatever the catalog does since.
+    return {
+        **request.model_dump(
+            mode="json", exclude={"internships", "catalog_version", "internship_ids", "use_catalog"}
+        ),
+        "internships": [i.model_dump(mode="json") for i in internships]
+    }
+
+def submit_job(kind: str, request, internships, **fields) -> dict:
+    # Serializing the cohort and writing request.json take a while for
+    # large jobs, so this runs off the event loop.
+    job = job_manager.submit(
+        kind, {**job_request(request, internships), **fields}, len(request.students)
+    )
+    return job_manager.status(job["job_id"])
+
+@router.post("/match", response_model=JobStatus, status_code=202)
+async def submit_match_job(request: MatchRequest):
+    internships, _ = resolve_internships(request)
+    
+    try:
+        return await run_in_threadpool(submit_job, "match", request, internships)
+        
+    except Exception as e:
+        logger.error(f"Error submitting match job: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/allocation", response_model=JobStatus, status_code=202)
+async def submit_allocation_job(request: AllocationRequest, diversity_boost: bool = True):
+    if request.solver == "legacy":
+        raise HTTPException(status_code=422, detail="The legacy solver cannot run as a job")
+    if request.compare_with:
+        raise HTTPException(status_code=422, detail="compare_with is not supported for jobs")
+    if request.keep_components:
+        raise HTTPException(status_code=422, detail="keep_components is not supported for jobs")
+    internships, _ = resolve_internships(request)
+    
+    try:
+        return await run_in_threadpool(
+            submit_job, "allocation", request, internships, diversity_boost=diversity_boost
+        )
+        
+    except Exception as e:
+        logger.error(f"Error submitting allocation job: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/{job_id}", response_model=JobStatus)
+async def job_status(job_id: str):
+    try:
+        return job_manager.status(job_id)
+    except JobNotFound:
+        raise HTTPException(status_code=404, detail=f"Unknown job: {job_id}")
+
+@router.get("/{job_id}/results", response_model=JobResultsPage)
+async def job_results(
+    job_id: str,
+    offset: int = Query(default=0, ge=0),
+    limit: int = Query(default=100, ge=1, le=1000)
+):
+    try:
+        return job_manager.results(job_id, offset, limit)
+    except JobNotFound:
+        raise HTTPException(status_code=404, detail=f"Unknown job: {job_id}")
+
+@router.delete("/{job_id}", response_model=JobStatus)
+async def delete_job(job_id: str):
+    try:
+        status = job_manager.status(job_id)
+        job_manager.delete(job_id)
+        return status
+    except JobNotFound:
+        raise HTTPException(status_code=404, detail=f"Unknown job: {job_id}")
@@ -1,44 +1,173 @@
-from fastapi import APIRouter, HTTPException, Depends
-from typing import List
+from fastapi import APIRouter, HTTPException, Depends, File, Form, Header, Response, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+from typing import List, Optional, Tuple
+import json
 import time
 from loguru import logger
 
 from app.models.schemas import (
-    MatchRequest, BatchMatchResponse, MatchResult,
-    SingleMatchRequest, StudentProfile, InternshipOpportunity
+    MatchRequest, BatchMatchResponse, BatchMatchSummary, MatchResult,
+    SingleMatchRequest, AllocationRequest, AllocationResponse,
+    RecallReportRequest, InternshipSource, InternshipOpportunity, MatchScore,
+    BulkMatchResponse, WhatIfRequest, WhatIfResponse
 )
 from app.services.matching_engine import MatchingEngine
-from app.core.model_manager import ModelManager
-from app.main import model_manager
+from app.services.internship_catalog import (
+    internship_catalog, CatalogVersionMismatch, UnknownInternships
+)
+from app.services.score_matrix import (
+    InternshipFeatures, fingerprint_internships, pruning_stats, tiling_stats
+)
+from app.services.result_cache import match_result_cache
+from app.services.micro_batcher import single_match_coalescer
+from app.services.match_runs import (
+    match_run_store, single_run_store, allocation_run_store, find_match_run
+)
+from app.services.bulk_ingest import UploadError, load_upload, load_students, load_internships
+from app.core.config import settings
+from app.core.executor import matching_executor, ExecutorSaturated
+from app.core.response_formats import negotiate, encode_batch_response
+from app.core.metrics import InstrumentedRoute, set_cohort, stage
+from app.core.model_manager import model_manager
 
-router = APIRouter()
+router = APIRouter(route_class=InstrumentedRoute)
 
 def get_matching_engine() -> MatchingEngine:
     return MatchingEngine(model_manager)
 
+def resolve_internships(
+    source: InternshipSource
+) -> Tuple[List[InternshipOpportunity], Optional[InternshipFeatures]]:
+    if source.internships is not None:
+        return source.internships, None
+    
+    try:
+        features = internship_catalog.features(source.catalog_version, source.internship_ids)
+    except CatalogVersionMismatch as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except UnknownInternships as e:
+        raise HTTPException(status_code=404, detail=f"Unknown internships: {', '.join(e.args[0])}")
+    
+    return features.internships, features
+
+def internship_fingerprint(
+    internships: List[InternshipOpportunity],
+    internship_features: Optional[InternshipFeatures]
+) -> str:
+    if internship_features is not None:
+        return internship_features.fingerprint()
+    return fingerprint_internships(internships)
+
+def result_cache_context(
+    internships: List[InternshipOpportunity],
+    internship_features: Optional[InternshipFeatures],
+    **params
+) -> Optional[str]:
+    if not match_result_cache.enabled:
+        return None
+    return match_result_cache.context(
+        internship_fingerprint(internships, internship_features), **params
+    )
+
+def timed_call(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+def saturated_error(e: ExecutorSaturated) -> HTTPException:
+    logger.warning(f"Rejecting matching request: {str(e)}")
+    return HTTPException(
+        status_code=e.status_code,
+        detail=str(e),
+        headers={"Retry-After": str(e.retry_after)}
+    )
+
+async def run_matching(func, *args, **kwargs):
+    try:
+        return await matching_executor.run(func, *args, **kwargs)
+    except ExecutorSaturated as e:
+        raise saturated_error(e)
+
+def record_run(
+    request: MatchRequest,
+    internships: List[InternshipOpportunity],
+    internship_features: Optional[InternshipFeatures]
+) -> Optional[str]:
+    # Runs are only kept when explanations were deferred to the explain
+    # endpoint.
+    if request.include_explanations:
+        return None
+    return match_run_store.record(
+        request.students, internships, internship_features, request.diversity_boost
+    )
+
+async def read_upload(upload: UploadFile, loader) -> tuple:
+    data = await upload.read()
+    try:
+        with stage("parse"):
+            return await run_in_threadpool(
+                load_upload, data, upload.filename, upload.content_type, loader
+            )
+    except UploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+
 @router.post("/batch", response_model=BatchMatchResponse)
 async def batch_match(
     request: MatchRequest,
+    accept: Optional[str] = Header(default=None),
     engine: MatchingEngine = Depends(get_matching_engine)
 ):
+    media_type = negotiate(accept)
+    internships, internship_features = resolve_internships(request)
+    
     try:
         start_time = time.time()
         
-        logger.info(f"Processing batch match for {len(request.students)} students and {len(request.internships)} internships")
+        logger.info(f"Processing batch match for {len(request.students)} students and {len(internships)} internships")
         
-        match_results = engine.batch_match(
-            students=request.students,
-            internships=request.internships,
-            max_matches_per_student=request.max_matches_per_student,
+        cache_context = result_cache_context(
+            internships,
+            internship_features,
+            endpoint="batch",
+            max_matches=request.max_matches_per_student,
             min_score=request.min_score_threshold,
-            diversity_boost=request.diversity_boost
+            diversity_boost=request.diversity_boost,
+            candidate_depth=request.candidate_depth,
+            explain=request.include_explanations
         )
+        cached = await run_in_threadpool(match_result_cache.lookup, cache_context, request.students)
+        missing = [s for s, matches in zip(request.students, cached) if matches is None]
+        
+        match_results = {}
+        if missing:
+            match_results, compute_time = await run_matching(
+                timed_call,
+                engine.batch_match,
+                students=missing,
+                internships=internships,
+                max_matches_per_student=request.max_matches_per_student,
+                min_score=request.min_score_threshold,
+                diversity_boost=request.diversity_boost,
+                internship_features=internship_features,
+                candidate_depth=request.candidate_depth,
+                explain=request.include_explanations
+            )
+            await run_in_threadpool(
+                match_result_cache.store, cache_context, missing, match_results, compute_time
+            )
+        if len(missing) < len(request.students):
+            logger.info(f"Served {len(request.students) - len(missing)} students from the result cache")
         
         results = []
         total_matches = 0
         
-        for student in request.students:
-            matches = match_results.get(student.student_id, [])
+        for student, cached_matches in zip(request.students, cached):
+            matches = (
+                cached_matches if cached_matches is not None
+                else match_results.get(student.student_id, [])
+            )
             total_matches += len(matches)
             
             results.append(MatchResult(
@@ -52,32 +181,249 @@ async def batch_match(
         
         logger.info(f"Batch matching completed in {processing_time:.2f}s. Generated {total_matches} matches")
         
-        return BatchMatchResponse(
+        response = BatchMatchResponse(
             results=results,
             total_students_processed=len(request.students),
             total_matches_generated=total_matches,
-            processing_time_seconds=round(processing_time, 2)
+            processing_time_seconds=round(processing_time, 2),
+            run_id=record_run(request, internships, internship_features)
         )
+        with stage("serialize"):
+            return await run_in_threadpool(encode_batch_response, response, media_type)
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error in batch matching: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/batch/stream")
+async def batch_match_stream(
+    request: MatchRequest,
+    engine: MatchingEngine = Depends(get_matching_engine)
+):
+    internships, internship_features = resolve_internships(request)
+    
+    logger.info(f"Streaming batch match for {len(request.students)} students and {len(internships)} internships")
+    
+    # The generator runs on the matching executor and holds one of its
+    # slots until it finishes or the client goes away. Lines are sent a
+    # scoring chunk at a time, as soon as that chunk has been scored.
+    def generate_results():
+        start_time = time.time()
+        total_students = 0
+        total_matches = 0
+        
+        try:
+            for student, matches in engine.iter_batch_match(
+                students=request.students,
+                internships=internships,
+                max_matches_per_student=request.max_matches_per_student,
+                min_score=request.min_score_threshold,
+                diversity_boost=request.diversity_boost,
+                internship_features=internship_features,
+                candidate_depth=request.candidate_depth,
+                explain=request.include_explanations
+            ):
+                total_students += 1
+                total_matches += len(matches)
+                with stage("serialize"):
+                    line = MatchResult(
+                        student_id=student.student_id,
+                        student_name=student.name,
+                        matches=matches,
+                        total_matches=len(matches)
+                    ).model_dump_json() + "\n"
+                yield line
+        except Exception as e:
+            logger.error(f"Error in streaming batch matching: {str(e)}")
+            yield json.dumps({"error": str(e)}) + "\n"
+            return
+        
+        processing_time = time.time() - start_time
+        logger.info(f"Streaming batch matching completed in {processing_time:.2f}s. Generated {total_matches} matches")
+        
+        summary = BatchMatchSummary(
+            total_students_processed=total_students,
+            total_matches_generated=total_matches,
+            processing_time_seconds=round(processing_time, 2),
+            run_id=record_run(request, internships, internship_features)
+        )
+        yield json.dumps({"summary": summary.model_dump()}) + "\n"
+    
+    try:
+        results = await matching_executor.stream(generate_results, batch_size=settings.SCORING_CHUNK_SIZE)
+    except ExecutorSaturated as e:
+        raise saturated_error(e)
+    
+    async def send_results():
+        async for lines in results:
+            yield "".join(lines)
+    
+    return StreamingResponse(
+        send_results(),
+        media_type="application/x-ndjson",
+        background=BackgroundTask(results.aclose)
+    )
+
+@router.post("/bulk", response_model=BulkMatchResponse)
+async def bulk_match(
+    students: UploadFile = File(...),
+    internships: Optional[UploadFile] = File(default=None),
+    catalog_version: Optional[int] = Form(default=None),
+    use_catalog: bool = Form(default=False),
+    diversity_boost: bool = Form(default=True),
+    max_matches_per_student: int = Form(default=10, ge=1, le=50),
+    min_score_threshold: float = Form(default=0.5, ge=0.0, le=1.0),
+    candidate_depth: Optional[int] = Form(default=None, ge=1),
+    include_explanations: bool = Form(default=True),
+    accept: Optional[str] = Header(default=None),
+    engine: MatchingEngine = Depends(get_matching_engine)
+):
+    media_type = negotiate(accept)
+    start_time = time.time()
+    
+    # Uploaded rows are validated column by column and handed to the engine
+    # without building a StudentProfile per row; invalid rows are left out
+    # and listed in the report.
+    student_rows, students_report = await read_upload(students, load_students)
+    internships_report = None
+    if internships is not None:
+        internship_list, internships_report = await read_upload(internships, load_internships)
+        internship_features = None
+    elif use_catalog or catalog_version is not None:
+        internship_list, internship_features = resolve_internships(
+            InternshipSource(catalog_version=catalog_version, use_catalog=True)
+        )
+    else:
+        raise HTTPException(
+            status_code=422,
+            detail="Upload an internships file, or pass use_catalog or catalog_version to match against the catalog"
+        )
+    set_cohort(len(student_rows))
+    if not student_rows:
+        raise HTTPException(
+            status_code=422,
+            detail={"message": "No valid student rows", "students_report": students_report}
+        )
+    
+    try:
+        logger.info(
+            f"Processing bulk match for {len(student_rows)} uploaded students "
+            f"({students_report['invalid_rows']} rejected) and {len(internship_list)} internships"
+        )
+        
+        match_results = await run_matching(
+            engine.batch_match,
+            students=student_rows,
+            internships=internship_list,
+            max_matches_per_student=max_matches_per_student,
+            min_score=min_score_threshold,
+            diversity_boost=diversity_boost,
+            internship_features=internship_features,
+            candidate_depth=candidate_depth,
+            explain=include_explanations
+        )
+        
+        results = [
+            MatchResult(
+                student_id=student.student_id,
+                student_name=student.name,
+                matches=match_results.get(student.student_id, []),
+                total_matches=len(match_results.get(student.student_id, []))
+            )
+            for student in student_rows
+        ]
+        total_matches = sum(result.total_matches for result in results)
+        processing_time = time.time() - start_time
+        
+        logger.info(f"Bulk matching completed in {processing_time:.2f}s. Generated {total_matches} matches")
+        
+        response = BulkMatchResponse(
+            results=results,
+            total_students_processed=len(student_rows),
+            total_matches_generated=total_matches,
+            processing_time_seconds=round(processing_time, 2),
+            run_id=(
+                match_run_store.record(student_rows, internship_list, internship_features, diversity_boost)
+                if not include_explanations else None
+            ),
+            students_report=students_report,
+            internships_report=internships_report
+        )
+        with stage("serialize"):
+            return await run_in_threadpool(encode_batch_response, response, media_type)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error in bulk matching: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.post("/single", response_model=MatchResult)
 async def single_match(
     request: SingleMatchRequest,
+    response: Response,
     engine: MatchingEngine = Depends(get_matching_engine)
 ):
+    internships, internship_features = resolve_internships(request)
+    
     try:
         logger.info(f"Processing single match for student {request.student.student_id}")
         
-        matches = engine.match_student_to_internships(
-            student=request.student,
-            internships=request.internships,
+        cache_context = result_cache_context(
+            internships,
+            internship_features,
+            endpoint="single",
             max_matches=request.max_matches,
-            min_score=0.0,
-            diversity_boost=True
+            candidate_depth=request.candidate_depth,
+            explain=request.include_explanations
         )
+        [cached] = await run_in_threadpool(match_result_cache.lookup, cache_context, [request.student])
+        
+        if cached is not None:
+            matches = cached
+        elif settings.MICRO_BATCHING:
+            try:
+                matches, compute_time = await single_match_coalescer.match(
+                    engine.score_matrix,
+                    student=request.student,
+                    internships=internships,
+                    internship_features=internship_features,
+                    fingerprint=internship_fingerprint(internships, internship_features),
+                    max_matches=request.max_matches,
+                    candidate_depth=request.candidate_depth,
+                    explain=request.include_explanations
+                )
+            except ExecutorSaturated as e:
+                raise saturated_error(e)
+        else:
+            matches, compute_time = await run_matching(
+                timed_call,
+                engine.match_student_to_internships,
+                student=request.student,
+                internships=internships,
+                max_matches=request.max_matches,
+                min_score=0.0,
+                diversity_boost=True,
+                internship_features=internship_features,
+                candidate_depth=request.candidate_depth,
+                explain=request.include_explanations
+            )
+        
+        if cached is None:
+            await run_in_threadpool(
+                match_result_cache.store,
+                cache_context,
+                [request.student],
+                {request.student.student_id: matches},
+                compute_time
+            )
+        
+        if not request.include_explanations:
+            run_id = single_run_store.record([request.student], internships, internship_features)
+            if run_id is not None:
+                response.headers["X-Run-Id"] = run_id
         
         return MatchResult(
             student_id=request.student.student_id,
@@ -86,33 +432,170 @@ async def single_match(
             total_matches=len(matches)
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error in single matching: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.post("/optimize")
+@router.post("/optimize", response_model=AllocationResponse)
 async def optimize_allocation(
-    students: List[StudentProfile],
-    internships: List[InternshipOpportunity],
+    request: AllocationRequest,
     diversity_boost: bool = True,
     engine: MatchingEngine = Depends(get_matching_engine)
 ):
+    students = request.students
+    internships, internship_features = resolve_internships(request)
+    solver = request.solver or settings.ALLOCATION_SOLVER
+    if request.keep_components:
+        if solver == "legacy":
+            raise HTTPException(
+                status_code=422,
+                detail="keep_components is not supported by the legacy solver"
+            )
+        if matching_executor.kind == "process":
+            # Snapshots are kept in the process that scored the run, which
+            # the API process cannot reach when matching runs in workers.
+            raise HTTPException(
+                status_code=422,
+                detail="keep_components requires MATCHING_EXECUTOR=thread"
+            )
+        pairs = len(students) * len(internships)
+        if pairs > settings.WHAT_IF_MAX_PAIRS:
+            raise HTTPException(
+                status_code=422,
+                detail=f"keep_components is limited to {settings.WHAT_IF_MAX_PAIRS} student-internship pairs, got {pairs}"
+            )
+    
     try:
         logger.info(f"Optimizing allocation for {len(students)} students")
         
-        allocation = engine.optimize_allocation(
+        return await run_matching(
+            engine.compare_allocations,
             students=students,
             internships=internships,
-            diversity_boost=diversity_boost
+            solvers=[solver, *request.compare_with],
+            diversity_boost=diversity_boost,
+            internship_features=internship_features,
+            top_k=request.top_k,
+            candidate_depth=request.candidate_depth,
+            keep_components=request.keep_components
         )
         
-        return {
-            "allocation": allocation,
-            "total_allocated": len(allocation),
-            "total_students": len(students),
-            "allocation_rate": round(len(allocation) / len(students) * 100, 2) if students else 0
-        }
-        
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error in optimization: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/what-if", response_model=WhatIfResponse)
+async def what_if_allocation(
+    request: WhatIfRequest,
+    engine: MatchingEngine = Depends(get_matching_engine)
+):
+    run = allocation_run_store.get(request.run_id)
+    if run is None:
+        raise HTTPException(status_code=404, detail=f"Unknown or expired allocation run: {request.run_id}")
+    
+    try:
+        logger.info(f"Re-ranking run {request.run_id} under {len(request.scenarios)} weight scenarios")
+        
+        return await run_matching(
+            engine.what_if,
+            request.run_id,
+            run,
+            request.scenarios,
+            solver=request.solver,
+            top_k=request.top_k,
+            include_allocation=request.include_allocation
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error in what-if re-ranking: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/explain", response_model=MatchScore)
+async def explain_match(
+    run_id: str,
+    student_id: str,
+    internship_id: str,
+    engine: MatchingEngine = Depends(get_matching_engine)
+):
+    run = find_match_run(run_id)
+    if run is None:
+        raise HTTPException(status_code=404, detail=f"Unknown or expired run: {run_id}")
+    student = run.students.get(student_id)
+    if student is None:
+        raise HTTPException(status_code=404, detail=f"Student {student_id} was not part of run {run_id}")
+    
+    try:
+        match = await run_matching(
+            engine.explain_match,
+            student,
+            run.internships,
+            internship_id,
+            diversity_boost=run.diversity_boost,
+            internship_features=run.internship_features
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error explaining match: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    if match is None:
+        raise HTTPException(status_code=404, detail=f"Internship {internship_id} was not part of run {run_id}")
+    return match
+
+@router.post("/retrieval/recall")
+async def retrieval_recall_report(
+    request: RecallReportRequest,
+    engine: MatchingEngine = Depends(get_matching_engine)
+):
+    internships, internship_features = resolve_internships(request)
+    
+    try:
+        logger.info(f"Measuring retrieval recall for {len(request.students)} students at depths {request.depths}")
+        
+        return await run_matching(
+            engine.score_matrix.recall_report,
+            students=request.students,
+            internships=internships,
+            depths=request.depths,
+            max_matches=request.max_matches_per_student,
+            min_score=request.min_score_threshold,
+            diversity_boost=request.diversity_boost,
+            internship_features=internship_features
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error measuring retrieval recall: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/embedding-cache")
+async def embedding_cache_stats():
+    return model_manager.embedding_cache.stats()
+
+
+@router.get("/result-cache")
+async def result_cache_stats():
+    return match_result_cache.stats()
+
+
+@router.get("/micro-batching")
+async def micro_batching_stats():
+    return single_match_coalescer.stats()
+
+
+@router.get("/pruning")
+async def score_pruning_stats():
+    return pruning_stats.stats()
+
+
+@router.get("/tiling")
+async def tiling_run_stats():
+    return tiling_stats.stats()
@@ -0,0 +1,12 @@
+from fastapi import APIRouter, HTTPException, Response
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+
+from app.core.config import settings
+
+router = APIRouter()
+
+@router.get("/metrics")
+async def prometheus_metrics():
+    if not settings.METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    return Response(content=generate_latest(), headers={"Content-Type": CONTENT_TYPE_LATEST})
@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import List, Optional
 import os
 
 class Settings(BaseSettings):
@@ -14,6 +14,10 @@ class Settings(BaseSettings):
     API_KEY: str = "your-secret-api-key-here"
     CACHE_TTL: int = 3600
     
+    SKILL_ENCODER_BACKEND: str = "torch"
+    SKILL_ENCODER_ONNX_DIR: str = "skill_encoder_onnx"
+    SKILL_ENCODER_THREADS: int = 0
+    
     SKILL_WEIGHT: float = 0.35
     QUALIFICATION_WEIGHT: float = 0.25
     LOCATION_WEIGHT: float = 0.15
@@ -23,6 +27,64 @@ class Settings(BaseSettings):
     MAX_MATCHES_PER_STUDENT: int = 10
     MIN_MATCH_SCORE: float = 0.5
     
+    SCORING_MODE: str = "vectorized"
+    SCORING_CHUNK_SIZE: int = 1024
+    SCORING_MEMORY_MB: int = 512
+    TILE_DTYPE: str = "float32"
+    SCORE_PRUNING: bool = True
+    SHARD_WORKERS: int = 0
+    
+    ALLOCATION_SOLVER: str = "assignment"
+    ALLOCATION_TOP_K: int = 50
+    ALLOCATION_SESSION_IDLE_TTL: int = 3600
+    
+    CANDIDATE_RETRIEVAL: bool = False
+    RETRIEVAL_DEPTH: int = 200
+    RETRIEVAL_INDEX: str = "flat"
+    RETRIEVAL_IVF_NLIST: int = 256
+    RETRIEVAL_IVF_NPROBE: int = 16
+    RETRIEVAL_HNSW_M: int = 32
+    RETRIEVAL_HNSW_EF_CONSTRUCTION: int = 200
+    RETRIEVAL_HNSW_EF_SEARCH: int = 128
+    
+    MATCHING_EXECUTOR: str = "thread"
+    MATCHING_WORKERS: int = 4
+    MATCHING_QUEUE_SIZE: int = 32
+    MATCHING_QUEUE_TIMEOUT: float = 30.0
+    
+    MICRO_BATCHING: bool = True
+    MICRO_BATCH_SIZE: int = 64
+    MICRO_BATCH_WAIT_MS: float = 5.0
+    
+    JOB_BACKEND: str = "local"
+    JOB_DIR: str = "./jobs"
+    JOB_WORKERS: int = 1
+    CELERY_BROKER_URL: Optional[str] = None
+    
+    RESULT_CACHE_BACKEND: str = "redis"
+    RESULT_CACHE_SIZE: int = 100000
+    MATCH_RUN_MAX_PROFILES: int = 200000
+    SINGLE_RUN_MAX_PROFILES: int = 20000
+    
+    WHAT_IF_DTYPE: str = "float32"
+    WHAT_IF_MAX_PAIRS: int = 50000000
+    WHAT_IF_RUNS: int = 2
+    
+    METRICS_ENABLED: bool = True
+    
+    PROFILING_ENABLED: bool = False
+    PROFILE_DIR: str = "./profiles"
+    PROFILE_INTERVAL_MS: float = 1.0
+    PROFILE_TOP_N: int = 25
+    
+    MODEL_LOAD_IN_BACKGROUND: bool = True
+    SKILL_ENCODER_LOCAL_DIR: str = "all-MiniLM-L6-v2"
+    WARMUP_SKILLS_FILE: Optional[str] = None
+    
+    EMBEDDING_CACHE_SIZE: int = 50000
+    EMBEDDING_CACHE_FILE: str = "skill_embeddings.npz"
+    EMBEDDING_CACHE_SAVE_EVERY: int = 1000
+    
     class Config:
         env_file = ".env"
         case_sensitive = True
@@ -0,0 +1,139 @@
+import fcntl
+import os
+import threading
+import numpy as np
+from collections import OrderedDict
+from pathlib import Path
+from loguru import logger
+from typing import Dict, List, Optional, Tuple
+
+
+def canonicalize_skill(skill: str) -> str:
+    # The MiniLM encoder is uncased, so folding case and whitespace only
+    # merges keys that would have produced the same embedding anyway.
+    return " ".join(skill.lower().split())
+
+
+class SkillEmbeddingCache:
+    # Every process that encodes skills, the API process and each process
+    # executor worker, shares the file at `path`. Each saves after
+    # `save_every` new entries, on a background thread, and the API process
+    # also saves on shutdown. Saves take an exclusive lock on a sibling
+    # .lock file, merge in what other processes saved since, and replace the
+    # file atomically, so a killed process loses at most its unsaved entries.
+
+    def __init__(
+        self,
+        max_size: int,
+        path: Optional[Path] = None,
+        model_name: str = "",
+        save_every: int = 0
+    ):
+        self.max_size = max_size
+        self.path = path
+        self.model_name = model_name
+        self.save_every = save_every
+        self._entries: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._saving = threading.Lock()
+        self._unsaved = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def lookup(self, keys: List[str]) -> Tuple[Dict[str, np.ndarray], List[str]]:
+        found = {}
+        missing = []
+        with self._lock:
+            for key in keys:
+                vector = self._entries.get(key)
+                if vector is None:
+                    missing.append(key)
+                else:
+                    self._entries.move_to_end(key)
+                    found[key] = vector
+            self.hits += len(found)
+            self.misses += len(missing)
+        return found, missing
+
+    def store(self, keys: List[str], vectors: np.ndarray):
+        with self._lock:
+            for key, vector in zip(keys, vectors):
+                self._entries[key] = vector
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            self._unsaved += len(keys)
+            due = self.save_every > 0 and self._unsaved >= self.save_every
+        if due and self.path and not self._saving.locked():
+            threading.Thread(target=self.save, name="embedding-cache-save", daemon=True).start()
+
+    def _read(self) -> Tuple[List[str], np.ndarray]:
+        if not self.path or not self.path.exists():
+            return [], np.zeros((0, 0), dtype=np.float32)
+        try:
+            with np.load(self.path) as data:
+                if str(data["model_name"]) != self.model_name:
+                    logger.info(f"Ignoring skill embedding cache built for {data['model_name']}")
+                    return [], np.zeros((0, 0), dtype=np.float32)
+                return [str(k) for k in data["keys"]], data["vectors"]
+        except Exception as e:
+            logger.warning(f"Could not load skill embedding cache: {str(e)}")
+            return [], np.zeros((0, 0), dtype=np.float32)
+
+    def load(self):
+        keys, vectors = self._read()
+        if not keys:
+            return
+
+        with self._lock:
+            for key, vector in zip(keys[-self.max_size:], vectors[-self.max_size:]):
+                self._entries[key] = vector
+        logger.info(f"Loaded {len(self._entries)} cached skill embeddings from {self.path}")
+
+    def save(self):
+        if not self.path:
+            return
+        with self._saving:
+            with self._lock:
+                entries = OrderedDict(self._entries)
+                self._unsaved = 0
+            if not entries:
+                return
+
+            with open(self.path.with_suffix(".lock"), "w") as lock:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+                # Entries only other processes have are kept, as the oldest.
+                saved_keys, saved_vectors = self._read()
+                merged = OrderedDict(
+                    (key, vector) for key, vector in zip(saved_keys, saved_vectors)
+                    if key not in entries
+                )
+                merged.update(entries)
+                keys = list(merged)[-self.max_size:]
+                vectors = np.array([merged[key] for key in keys], dtype=np.float32)
+
+                tmp_path = self.path.with_name(f"{self.path.stem}.{os.getpid()}.tmp.npz")
+                np.savez(
+                    tmp_path,
+                    keys=np.array(keys),
+                    vectors=vectors,
+                    model_name=np.array(self.model_name)
+                )
+                os.replace(tmp_path, self.path)
+        logger.info(f"Saved {len(keys)} skill embeddings to {self.path}")
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0
+        }
@@ -0,0 +1,316 @@
+import asyncio
+import concurrent.futures
+import contextvars
+import functools
+import itertools
+import math
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from loguru import logger
+from typing import Any, Callable, Iterable, Iterator, Optional
+
+from app.core.config import settings
+from app.core.profiling import profiled
+
+
+class ExecutorSaturated(Exception):
+    status_code = 429
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class ExecutorTimeout(ExecutorSaturated):
+    status_code = 503
+
+
+def _load_worker_models():
+    # Process workers start from a clean interpreter and need their own
+    # copy of the encoder; the parent's ModelManager pickles to this one.
+    from app.core.model_manager import model_manager
+    model_manager.load()
+    model_manager.warm_up()
+
+
+def _worker_pid() -> int:
+    # Long enough that workers still initialising are not beaten to every
+    # task by one that is already up.
+    time.sleep(0.05)
+    return os.getpid()
+
+
+class MatchingExecutor:
+    # Runs synchronous matching work off the event loop. At most `workers`
+    # jobs run at once and at most `queue_size` more wait for a slot; beyond
+    # that requests are rejected immediately instead of piling up.
+
+    def __init__(
+        self,
+        kind: Optional[str] = None,
+        workers: Optional[int] = None,
+        queue_size: Optional[int] = None,
+        queue_timeout: Optional[float] = None
+    ):
+        self.kind = kind or settings.MATCHING_EXECUTOR
+        self.workers = workers or settings.MATCHING_WORKERS
+        self.queue_size = settings.MATCHING_QUEUE_SIZE if queue_size is None else queue_size
+        self.queue_timeout = settings.MATCHING_QUEUE_TIMEOUT if queue_timeout is None else queue_timeout
+        self._pool: Optional[Executor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+        self.admitted = 0
+        self.running = 0
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.total_run = 0.0
+
+    def start(self):
+        if self._pool is not None:
+            return
+        self._slots = asyncio.Semaphore(self.workers)
+        self._loop = asyncio.get_running_loop()
+        if self.kind == "process":
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_load_worker_models
+            )
+        elif self.kind == "thread":
+            self._pool = ThreadPoolExecutor(
+                max_workers=self.workers, thread_name_prefix="matching"
+            )
+        else:
+            raise ValueError(f"Unknown matching executor: {self.kind}")
+        logger.info(
+            f"Started {self.kind} matching executor with {self.workers} workers "
+            f"and a queue of {self.queue_size}"
+        )
+
+    def warm_up(self):
+        # Process workers load their models in the pool initializer, which
+        # runs on the first task each one takes. Sends tasks until every
+        # worker has answered, so none of that happens on a request.
+        if self.kind != "process":
+            return
+        ready = set()
+        while len(ready) < self.workers:
+            futures = [self._pool.submit(_worker_pid) for _ in range(self.workers)]
+            ready.update(future.result() for future in futures)
+        logger.info(f"Loaded models in {len(ready)} matching worker processes")
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+            self._loop = None
+
+    def retry_after(self) -> int:
+        average_run = self.total_run / self.completed if self.completed else 1.0
+        waves = (self.admitted - self.running) / self.workers + 1
+        return max(1, math.ceil(average_run * waves))
+
+    async def acquire(self) -> float:
+        # Takes a slot, waiting in the queue if need be. Returns when the
+        # slot was taken, for `release`.
+        self.start()
+        if self.admitted >= self.workers + self.queue_size:
+            self.rejected += 1
+            raise ExecutorSaturated(
+                f"Matching queue is full ({self.queue_size} waiting)", self.retry_after()
+            )
+
+        self.admitted += 1
+        self.submitted += 1
+        enqueued_at = time.perf_counter()
+        try:
+            await asyncio.wait_for(self._slots.acquire(), timeout=self.queue_timeout)
+        except BaseException as e:
+            # Also on cancellation, or the admission would never be returned.
+            self.admitted -= 1
+            if not isinstance(e, asyncio.TimeoutError):
+                raise
+            self.timed_out += 1
+            raise ExecutorTimeout(
+                f"Timed out after {self.queue_timeout}s waiting for a matching worker",
+                self.retry_after()
+            )
+
+        started_at = time.perf_counter()
+        waited = started_at - enqueued_at
+        self.total_wait += waited
+        self.max_wait = max(self.max_wait, waited)
+        self.running += 1
+        return started_at
+
+    def release(self, started_at: float, failed: bool = False):
+        self.running -= 1
+        self.admitted -= 1
+        self.total_run += time.perf_counter() - started_at
+        if failed:
+            self.failed += 1
+        else:
+            self.completed += 1
+        self._slots.release()
+
+    async def run(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        return await self._run(functools.partial(func, *args, **kwargs), local=False)
+
+    async def run_local(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        # For work on state that lives in this process, such as allocation
+        # sessions, which cannot be sent to worker processes. With
+        # MATCHING_EXECUTOR=process it runs on the loop's default threadpool,
+        # still holding a slot.
+        return await self._run(functools.partial(func, *args, **kwargs), local=True)
+
+    async def _run(self, call: Callable[[], Any], local: bool) -> Any:
+        started_at = await self.acquire()
+
+        # The slot is released when the work finishes, not when the request
+        # does, so a disconnected client cannot free capacity that is still
+        # busy.
+        pool = self._pool
+        if self.kind == "thread" or local:
+            # Carries the request's metrics run and profiler into the worker
+            # thread.
+            call = functools.partial(contextvars.copy_context().run, profiled(call))
+            if self.kind != "thread":
+                pool = None
+        future = asyncio.get_running_loop().run_in_executor(pool, call)
+        future.add_done_callback(functools.partial(self._finish, started_at))
+        return await asyncio.shield(future)
+
+    def run_blocking(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        # For background threads such as the local job runners: the call
+        # takes a slot on the loop the executor was started on, like
+        # run_local, so jobs share the matching workers with requests instead
+        # of competing with them for the CPU, and wait out saturation rather
+        # than failing. Without a started executor, as in Celery workers, the
+        # call runs inline.
+        loop = self._loop
+        if loop is None:
+            return func(*args, **kwargs)
+        # Keeps the caller's metrics run, which the loop's context lacks.
+        call = functools.partial(contextvars.copy_context().run, func, *args, **kwargs)
+
+        while True:
+            future = asyncio.run_coroutine_threadsafe(self._run(call, local=True), loop)
+            try:
+                while True:
+                    try:
+                        return future.result(timeout=1.0)
+                    except concurrent.futures.TimeoutError:
+                        if self._loop is not loop or not loop.is_running():
+                            future.cancel()
+                            raise asyncio.CancelledError()
+            except ExecutorSaturated as e:
+                time.sleep(e.retry_after)
+
+    async def stream(self, func: Callable[[], Iterable], batch_size: int = 1) -> "MatchingStream":
+        # Admission happens here, before the response starts, so a saturated
+        # executor can still answer 429 or 503.
+        started_at = await self.acquire()
+        return MatchingStream(self, func, batch_size, started_at)
+
+    def _finish(self, started_at: float, future: asyncio.Future):
+        self.release(started_at, failed=future.cancelled() or future.exception() is not None)
+
+    def stats(self) -> dict:
+        started = self.completed + self.failed + self.running
+        return {
+            "kind": self.kind,
+            "workers": self.workers,
+            "queue_size": self.queue_size,
+            "running": self.running,
+            "queued": self.admitted - self.running,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+            "avg_wait_ms": round(self.total_wait / started * 1000, 3) if started else 0.0,
+            "max_wait_ms": round(self.max_wait * 1000, 3),
+            "avg_run_ms": (
+                round(self.total_run / (self.completed + self.failed) * 1000, 3)
+                if self.completed + self.failed else 0.0
+            )
+        }
+
+
+class MatchingStream:
+    # Iterates a synchronous iterator off the event loop while holding one
+    # executor slot, `batch_size` items per step. Iterators cannot be sent
+    # to worker processes, so with MATCHING_EXECUTOR=process the steps run
+    # on the loop's default threadpool, still limited by the slot.
+
+    def __init__(
+        self,
+        executor: MatchingExecutor,
+        func: Callable[[], Iterable],
+        batch_size: int,
+        started_at: float
+    ):
+        self.executor = executor
+        self.func = func
+        self.batch_size = batch_size
+        self.started_at = started_at
+        self.closed = False
+        self._iterator: Optional[Iterator] = None
+        self._pool = executor._pool if executor.kind == "thread" else None
+        self._loop = asyncio.get_running_loop()
+        self._step = functools.partial(contextvars.copy_context().run, profiled(self._next_batch))
+        # A step cancelled with its request keeps running on its worker;
+        # closing waits for it before closing the iterator.
+        self._lock = threading.Lock()
+
+    def _next_batch(self) -> list:
+        with self._lock:
+            if self._iterator is None:
+                self._iterator = iter(self.func())
+            return list(itertools.islice(self._iterator, self.batch_size))
+
+    def _close_iterator(self):
+        with self._lock:
+            close = getattr(self._iterator, "close", None)
+            if close is not None:
+                close()
+
+    def __aiter__(self) -> "MatchingStream":
+        return self
+
+    async def __anext__(self) -> list:
+        if self.closed:
+            raise StopAsyncIteration
+        try:
+            batch = await self._loop.run_in_executor(self._pool, self._step)
+        except BaseException:
+            await self.aclose(failed=True)
+            raise
+        if not batch:
+            await self.aclose()
+            raise StopAsyncIteration
+        return batch
+
+    async def aclose(self, failed: bool = False):
+        # Safe to call more than once. The slot is released once the
+        # iterator has been closed on a worker, not when the client goes.
+        if self.closed:
+            return
+        self.closed = True
+        cleanup = self._loop.run_in_executor(self._pool, self._close_iterator)
+        cleanup.add_done_callback(lambda future: self.executor.release(
+            self.started_at,
+            failed=failed or future.cancelled() or future.exception() is not None
+        ))
+
+
+matching_executor = MatchingExecutor()
@@ -0,0 +1,19 @@
+import os
+import resource
+import sys
+
+
+def current_rss() -> int:
+    # Resident set size in bytes. /proc is Linux-only; elsewhere fall back to
+    # the process peak, which is never lower than the current value.
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return peak_rss()
+
+
+def peak_rss() -> int:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS.
+    return peak if sys.platform == "darwin" else peak * 1024
@@ -0,0 +1,304 @@
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import AsyncIterator, Callable, Dict, Iterable, Iterator, Optional
+
+from fastapi import Request, Response
+from fastapi.responses import StreamingResponse
+from fastapi.routing import APIRoute
+from prometheus_client import Counter, Gauge, Histogram
+
+from app.core.config import settings
+from app.core.profiling import profile_request, requested_profile
+
+STAGES = ("parse", "encode", "score", "select", "explain", "solve", "serialize")
+COHORT_BUCKETS = (1, 10, 100, 1000, 10000, 100000)
+SECONDS_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+    1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0
+)
+
+REQUEST_SECONDS = Histogram(
+    "matching_request_seconds",
+    "Wall time of instrumented requests and background runs",
+    ["route", "cohort"],
+    buckets=SECONDS_BUCKETS
+)
+STAGE_SECONDS = Histogram(
+    "matching_stage_seconds",
+    "Time one request or run spent in a pipeline stage",
+    ["stage", "route", "cohort"],
+    buckets=SECONDS_BUCKETS
+)
+IN_FLIGHT = Gauge(
+    "matching_in_flight",
+    "Instrumented requests and background runs in progress",
+    ["route"]
+)
+PAIRS_SCORED = Counter(
+    "matching_pairs_scored_total",
+    "Student-internship pairs scored",
+    ["route", "cohort"]
+)
+PAIRS_PER_SECOND = Histogram(
+    "matching_pairs_scored_per_second",
+    "Pairs scored per second of scoring time, per request or run",
+    ["route", "cohort"],
+    buckets=(1e3, 1e4, 1e5, 1e6, 3e6, 1e7, 3e7, 1e8, 1e9)
+)
+ENCODER_BATCH_SIZE = Histogram(
+    "skill_encoder_batch_size",
+    "Skills sent to the encoder per call, after the embedding cache",
+    ["route", "cohort"],
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024, 4096, 16384)
+)
+EMBEDDING_CACHE_LOOKUPS = Counter(
+    "skill_embedding_cache_lookups_total",
+    "Skill embedding cache lookups by result",
+    ["result", "route", "cohort"]
+)
+STARTUP_SECONDS = Gauge(
+    "startup_phase_seconds",
+    "Duration of each startup phase of this process, and time_to_ready from process start",
+    ["phase"]
+)
+
+
+def cohort_bucket(size: int) -> str:
+    # "0" for requests without students, "1" for single-student requests,
+    # then ranges such as "2-10" and "11-100".
+    if size <= 1:
+        return str(max(size, 0))
+    lower = 2
+    for bound in COHORT_BUCKETS[1:]:
+        if size <= bound:
+            return f"{lower}-{bound}"
+        lower = bound + 1
+    return f"{lower}+"
+
+
+def cohort_size(values: Iterable) -> int:
+    # Students in a parsed request body: a `students` list or one `student`.
+    for value in values:
+        students = getattr(value, "students", None)
+        if isinstance(students, list):
+            return len(students)
+        if getattr(value, "student", None) is not None:
+            return 1
+    return 0
+
+
+class RunMetrics:
+    # Stage times and pair counts for one request or background run. They
+    # are summed while it runs and observed once when it finishes, so every
+    # stage histogram holds one observation per request.
+
+    def __init__(self, route: str, cohort: int = 0, in_flight: bool = True):
+        self.route = route
+        self.cohort = cohort
+        self.started_at = time.perf_counter()
+        self.returned_at: Optional[float] = None
+        self.stages: Dict[str, float] = {}
+        self.pairs = 0
+        self._lock = threading.Lock()
+        if in_flight:
+            IN_FLIGHT.labels(route).inc()
+
+    def labels(self) -> tuple:
+        return self.route, cohort_bucket(self.cohort)
+
+    def add(self, stage: str, seconds: float):
+        with self._lock:
+            self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+    def add_pairs(self, pairs: int):
+        with self._lock:
+            self.pairs += pairs
+
+    def finish(self):
+        route, cohort = self.labels()
+        IN_FLIGHT.labels(route).dec()
+        REQUEST_SECONDS.labels(route, cohort).observe(time.perf_counter() - self.started_at)
+        for stage, seconds in self.stages.items():
+            STAGE_SECONDS.labels(stage, route, cohort).observe(seconds)
+        if self.pairs:
+            PAIRS_SCORED.labels(route, cohort).inc(self.pairs)
+            if self.stages.get("score"):
+                PAIRS_PER_SECOND.labels(route, cohort).observe(self.pairs / self.stages["score"])
+
+
+class StageFrame:
+    __slots__ = ("name", "started_at")
+
+    def __init__(self, name: str, started_at: float):
+        self.name = name
+        self.started_at = started_at
+
+
+current_run: ContextVar[Optional[RunMetrics]] = ContextVar("metrics_run", default=None)
+current_stage: ContextVar[Optional[StageFrame]] = ContextVar("metrics_stage", default=None)
+
+
+@contextmanager
+def stage(name: str):
+    # A nested stage pauses the one around it, so skills encoded while
+    # scoring count once, as encoding. Outside a run this does nothing.
+    run = current_run.get()
+    if run is None:
+        yield
+        return
+
+    parent = current_stage.get()
+    now = time.perf_counter()
+    if parent is not None:
+        run.add(parent.name, now - parent.started_at)
+    frame = StageFrame(name, now)
+    token = current_stage.set(frame)
+    try:
+        yield
+    finally:
+        now = time.perf_counter()
+        run.add(name, now - frame.started_at)
+        current_stage.reset(token)
+        if parent is not None:
+            parent.started_at = now
+
+
+@contextmanager
+def track(route: str, cohort: int = 0):
+    # Records work that does not arrive as an instrumented request, such
+    # as job chunks and coalesced /single batches, as a run of its own.
+    if not settings.METRICS_ENABLED:
+        yield
+        return
+    run = RunMetrics(route, cohort)
+    token = current_run.set(run)
+    stage_token = current_stage.set(None)
+    try:
+        yield
+    finally:
+        current_stage.reset(stage_token)
+        current_run.reset(token)
+        run.finish()
+
+
+@contextmanager
+def collect(cohort: int = 0) -> Iterator[RunMetrics]:
+    # For work in a worker process, whose own metrics nobody scrapes: the
+    # run is never observed, and its stages and pairs are sent back to be
+    # merged into the caller's run.
+    run = RunMetrics("worker", cohort, in_flight=False)
+    token = current_run.set(run)
+    stage_token = current_stage.set(None)
+    try:
+        yield run
+    finally:
+        current_stage.reset(stage_token)
+        current_run.reset(token)
+
+
+def merge(stages: Dict[str, float], pairs: int):
+    # Work from parallel workers adds up, so stages can exceed wall time.
+    run = current_run.get()
+    if run is None:
+        return
+    for name, seconds in stages.items():
+        run.add(name, seconds)
+    run.add_pairs(pairs)
+
+
+def set_cohort(size: int):
+    run = current_run.get()
+    if run is not None:
+        run.cohort = size
+
+
+def count_pairs(pairs: int):
+    run = current_run.get()
+    if run is not None:
+        run.add_pairs(pairs)
+
+
+def observe_encode(batch_size: int, hits: int):
+    run = current_run.get()
+    if run is None:
+        return
+    labels = run.labels()
+    EMBEDDING_CACHE_LOOKUPS.labels("hit", *labels).inc(hits)
+    if batch_size:
+        EMBEDDING_CACHE_LOOKUPS.labels("miss", *labels).inc(batch_size)
+        ENCODER_BATCH_SIZE.labels(*labels).observe(batch_size)
+
+
+def instrument_endpoint(endpoint: Callable) -> Callable:
+    # Marks where parsing and validation end and serialisation of the
+    # returned value begins.
+    @wraps(endpoint)
+    async def instrumented(*args, **kwargs):
+        run = current_run.get()
+        if run is None:
+            return await endpoint(*args, **kwargs)
+        run.add("parse", time.perf_counter() - run.started_at)
+        run.cohort = run.cohort or cohort_size(kwargs.values())
+        try:
+            return await endpoint(*args, **kwargs)
+        finally:
+            run.returned_at = time.perf_counter()
+
+    instrumented.instrumented = True
+    return instrumented
+
+
+async def follow_stream(run: RunMetrics, body: AsyncIterator) -> AsyncIterator:
+    # Streaming bodies are produced after the handler returns; the run
+    # stays current while they are and finishes with the last chunk.
+    current_run.set(run)
+    try:
+        async for chunk in body:
+            yield chunk
+    finally:
+        run.finish()
+
+
+class InstrumentedRoute(APIRoute):
+    def __init__(self, path: str, endpoint: Callable, **kwargs):
+        # include_router builds the route again from the wrapped endpoint.
+        if not getattr(endpoint, "instrumented", False):
+            endpoint = instrument_endpoint(endpoint)
+        super().__init__(path, endpoint, **kwargs)
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+        route = self.path
+
+        async def measured_handler(request: Request) -> Response:
+            if not settings.METRICS_ENABLED:
+                return await handler(request)
+            run = RunMetrics(route)
+            token = current_run.set(run)
+            streaming = False
+            try:
+                response = await handler(request)
+                if run.returned_at is not None:
+                    run.add("serialize", time.perf_counter() - run.returned_at)
+                if isinstance(response, StreamingResponse):
+                    response.body_iterator = follow_stream(run, response.body_iterator)
+                    streaming = True
+                return response
+            finally:
+                current_run.reset(token)
+                if not streaming:
+                    run.finish()
+
+        async def instrumented_handler(request: Request) -> Response:
+            # Checked only when profiling is enabled, so requests pay nothing
+            # for it otherwise.
+            if settings.PROFILING_ENABLED:
+                mode = requested_profile(request)
+                if mode:
+                    return await profile_request(mode, route, lambda: measured_handler(request))
+            return await measured_handler(request)
+
+        return instrumented_handler
@@ -1,33 +1,72 @@
 import os
-import joblib
+import time
 import numpy as np
 from pathlib import Path
 from loguru import logger
-from sentence_transformers import SentenceTransformer
-from sklearn.preprocessing import StandardScaler
-from typing import Optional
+from typing import TYPE_CHECKING, Optional
 
 from app.core.config import settings
+from app.core.embedding_cache import SkillEmbeddingCache, canonicalize_skill
+from app.core.skill_encoders import SkillEncoder, load_skill_encoder, skill_encoder_id
+from app.core.metrics import observe_encode, stage
+from app.core.startup import startup
+
+# sklearn and joblib are imported while loading, off the startup path.
+if TYPE_CHECKING:
+    from sklearn.preprocessing import StandardScaler
+
+# Texts of different lengths, so the first real request does not pay for
+# the encoder's lazy initialisation.
+WARMUP_TEXTS = [
+    "Python",
+    "Machine Learning",
+    "Data Analysis and Visualisation",
+    "Customer relationship management and field sales operations"
+]
+WARMUP_PREFILL_BATCH = 1024
 
 class ModelManager:
     def __init__(self):
-        self.skill_encoder: Optional[SentenceTransformer] = None
-        self.scaler: Optional[StandardScaler] = None
+        self.skill_encoder: Optional[SkillEncoder] = None
+        self.scaler: Optional["StandardScaler"] = None
         self.model_path = Path(settings.MODEL_PATH)
         self.model_path.mkdir(parents=True, exist_ok=True)
+        self.embedding_cache = SkillEmbeddingCache(
+            max_size=settings.EMBEDDING_CACHE_SIZE,
+            path=self.model_path / settings.EMBEDDING_CACHE_FILE,
+            model_name=skill_encoder_id(),
+            save_every=settings.EMBEDDING_CACHE_SAVE_EVERY
+        )
         
+    def __reduce__(self):
+        # Executor workers load their own models, so the process-wide
+        # instance pickles by reference to the module global.
+        return "model_manager"
+    
     async def load_models(self):
+        self.load()
+    
+    def load(self):
         try:
-            logger.info("Loading sentence transformer model...")
-            self.skill_encoder = SentenceTransformer('all-MiniLM-L6-v2')
+            logger.info(f"Loading {settings.SKILL_ENCODER_BACKEND} skill encoder...")
+            start_time = time.perf_counter()
+            with startup.phase("skill_encoder"):
+                self.skill_encoder = load_skill_encoder(model_path=self.model_path)
+            logger.info(f"Skill encoder loaded in {time.perf_counter() - start_time:.2f}s")
+            with startup.phase("embedding_cache"):
+                self.embedding_cache.load()
             
-            scaler_path = self.model_path / "scaler.pkl"
-            if scaler_path.exists():
-                logger.info("Loading existing scaler...")
-                self.scaler = joblib.load(scaler_path)
-            else:
-                logger.info("Creating new scaler...")
-                self.scaler = StandardScaler()
+            with startup.phase("scaler"):
+                import joblib
+                from sklearn.preprocessing import StandardScaler
+                
+                scaler_path = self.model_path / "scaler.pkl"
+                if scaler_path.exists():
+                    logger.info("Loading existing scaler...")
+                    self.scaler = joblib.load(scaler_path)
+                else:
+                    logger.info("Creating new scaler...")
+                    self.scaler = StandardScaler()
                 
             logger.info("All models loaded successfully")
             
@@ -35,32 +74,99 @@ class ModelManager:
             logger.error(f"Error loading models: {str(e)}")
             raise
     
+    def warm_up(self):
+        # Runs the encoder directly, past the embedding cache, so its first
+        # forward pass happens here. WARMUP_SKILLS_FILE, one skill per line,
+        # is then encoded into the embedding cache ahead of traffic.
+        with startup.phase("warm_up"):
+            self.skill_encoder.encode(WARMUP_TEXTS, convert_to_numpy=True)
+        
+        if not settings.WARMUP_SKILLS_FILE:
+            return
+        with startup.phase("prefill"):
+            skills_file = Path(settings.WARMUP_SKILLS_FILE)
+            if not skills_file.exists():
+                logger.warning(f"Warm-up skills file {skills_file} not found")
+                return
+            skills = [line.strip() for line in skills_file.read_text().splitlines() if line.strip()]
+            for start in range(0, len(skills), WARMUP_PREFILL_BATCH):
+                self.encode_skill_vectors(skills[start:start + WARMUP_PREFILL_BATCH])
+            logger.info(f"Prefilled embeddings for {len(skills)} skills from {skills_file}")
+    
     async def cleanup(self):
         logger.info("Cleaning up model resources...")
+        self.embedding_cache.save()
         self.skill_encoder = None
         self.scaler = None
     
     def save_scaler(self):
+        import joblib
+        
         scaler_path = self.model_path / "scaler.pkl"
         joblib.dump(self.scaler, scaler_path)
         logger.info(f"Scaler saved to {scaler_path}")
     
+    def encode_skill_vectors(self, skills: list[str]) -> np.ndarray:
+        if not self.skill_encoder:
+            raise RuntimeError("Skill encoder not loaded")
+        
+        keys = [canonicalize_skill(s) for s in skills]
+        with stage("encode"):
+            found, missing = self.embedding_cache.lookup(list(dict.fromkeys(keys)))
+            observe_encode(len(missing), len(found))
+            
+            if missing:
+                encoded = self.skill_encoder.encode(missing, convert_to_numpy=True)
+                norms = np.linalg.norm(encoded, axis=1, keepdims=True)
+                encoded = np.divide(encoded, norms, out=np.zeros_like(encoded), where=norms > 0)
+                self.embedding_cache.store(missing, encoded)
+                found.update(zip(missing, encoded))
+        
+        dimension = self.skill_encoder.get_sentence_embedding_dimension()
+        if not keys:
+            return np.zeros((0, dimension), dtype=np.float32)
+        return np.array([found[k] for k in keys])
+    
     def encode_skills(self, skills: list[str]) -> np.ndarray:
         if not self.skill_encoder:
             raise RuntimeError("Skill encoder not loaded")
         
         if not skills:
-            return np.zeros((1, 384))
+            return np.zeros((1, self.skill_encoder.get_sentence_embedding_dimension()))
         
-        embeddings = self.skill_encoder.encode(skills)
+        embeddings = self.encode_skill_vectors(skills)
         return np.mean(embeddings, axis=0).reshape(1, -1)
     
-    def get_skill_encoder(self) -> SentenceTransformer:
+    def encode_skill_lists(self, skill_lists: list[list[str]]) -> np.ndarray:
+        if not self.skill_encoder:
+            raise RuntimeError("Skill encoder not loaded")
+        
+        unique_skills = list(dict.fromkeys(s for skills in skill_lists for s in skills))
+        skill_index = {skill: i for i, skill in enumerate(unique_skills)}
+        
+        dimension = self.skill_encoder.get_sentence_embedding_dimension()
+        result = np.zeros((len(skill_lists), dimension))
+        if not unique_skills:
+            return result
+        
+        embeddings = self.encode_skill_vectors(unique_skills)
+        list_means = {}
+        for row, skills in enumerate(skill_lists):
+            key = tuple(skills)
+            if key not in list_means and skills:
+                list_means[key] = np.mean(embeddings[[skill_index[s] for s in skills]], axis=0)
+            if skills:
+                result[row] = list_means[key]
+        return result
+    
+    def get_skill_encoder(self) -> SkillEncoder:
         if not self.skill_encoder:
             raise RuntimeError("Skill encoder not loaded")
         return self.skill_encoder
     
-    def get_scaler(self) -> StandardScaler:
+    def get_scaler(self) -> "StandardScaler":
         if not self.scaler:
             raise RuntimeError("Scaler not loaded")
         return self.scaler
+
+model_manager = ModelManager()
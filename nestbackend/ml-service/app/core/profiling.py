@@ -0,0 +1,198 @@
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, Optional
+
+from fastapi import Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
+from loguru import logger
+
+from app.core.config import settings
+
+PROFILE_MODES = ("top", "flamegraph")
+PROFILE_HEADER = "x-profile"
+
+# An event loop with nothing to run sits in the selector, or in asyncio's
+# own frames under uvloop, whose loop is not Python code; those samples are
+# idle time.
+IDLE_FILES = ("selectors.py",)
+IDLE_PACKAGES = ("asyncio",)
+
+
+class StackSampler(threading.Thread):
+    # Samples the Python stacks of the threads serving one request every
+    # `interval` seconds: the event loop thread for validation and
+    # serialisation, and matching workers while they run its work. Each
+    # sample is weighted by the time since the previous one, since ticks
+    # stretch when the sampler waits for the GIL. Stacks are tuples of frame
+    # labels from the outermost call inwards.
+
+    def __init__(self, interval: float):
+        super().__init__(name="profile-sampler", daemon=True)
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._threads: Dict[int, int] = {}
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+
+    def add_thread(self, ident: int):
+        with self._lock:
+            self._threads[ident] = self._threads.get(ident, 0) + 1
+
+    def remove_thread(self, ident: int):
+        with self._lock:
+            self._threads[ident] -= 1
+            if not self._threads[ident]:
+                del self._threads[ident]
+
+    def stop(self):
+        self._stopped.set()
+        self.join()
+
+    def run(self):
+        sampled_at = time.perf_counter()
+        while not self._stopped.wait(self.interval):
+            frames = sys._current_frames()
+            now = time.perf_counter()
+            elapsed, sampled_at = now - sampled_at, now
+            with self._lock:
+                threads = list(self._threads)
+            for ident in threads:
+                frame = frames.get(ident)
+                if frame is None or idle(frame):
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(frame_label(frame))
+                    frame = frame.f_back
+                self.stacks[tuple(reversed(stack))] += elapsed
+                self.samples += 1
+
+
+current_sampler: ContextVar[Optional[StackSampler]] = ContextVar("profile_sampler", default=None)
+
+
+def idle(frame) -> bool:
+    path = Path(frame.f_code.co_filename)
+    return path.name in IDLE_FILES or path.parent.name in IDLE_PACKAGES
+
+
+def frame_label(frame) -> str:
+    code = frame.f_code
+    path = Path(code.co_filename)
+    return f"{code.co_name} ({path.parent.name}/{path.name}:{code.co_firstlineno})"
+
+
+def requested_profile(request: Request) -> Optional[str]:
+    # Profiling is asked for with an `X-Profile` header or a `profile` query
+    # parameter, and only honoured on requests carrying the API key.
+    mode = request.headers.get(PROFILE_HEADER) or request.query_params.get("profile")
+    if not mode or request.headers.get("x-api-key") != settings.API_KEY:
+        return None
+    mode = mode.lower()
+    if mode in ("1", "true"):
+        return "top"
+    return mode if mode in PROFILE_MODES else None
+
+
+def profiled(call: Callable) -> Callable:
+    # Wraps work handed to a matching worker thread so the request's
+    # sampler follows it there. Returns the call unchanged otherwise.
+    sampler = current_sampler.get()
+    if sampler is None:
+        return call
+
+    def sampled(*args, **kwargs):
+        ident = threading.get_ident()
+        sampler.add_thread(ident)
+        try:
+            return call(*args, **kwargs)
+        finally:
+            sampler.remove_thread(ident)
+
+    return sampled
+
+
+def top_functions(stacks: Counter, limit: int) -> list:
+    # Self time is time a function was the innermost frame; total time
+    # counts a function once per sample it appears anywhere in.
+    own: Counter = Counter()
+    total: Counter = Counter()
+    for stack, seconds in stacks.items():
+        own[stack[-1]] += seconds
+        for label in set(stack):
+            total[label] += seconds
+    sampled = sum(stacks.values()) or 1.0
+    return [
+        {
+            "function": label,
+            "self_ms": round(seconds * 1000, 1),
+            "self_percent": round(seconds / sampled * 100, 1),
+            "total_ms": round(total[label] * 1000, 1),
+            "total_percent": round(total[label] / sampled * 100, 1)
+        }
+        for label, seconds in own.most_common(limit)
+    ]
+
+
+def write_collapsed(stacks: Counter, route: str) -> Path:
+    # One "outer;inner;leaf weight" line per distinct stack, weighted in
+    # microseconds: the input format of flamegraph.pl, speedscope and inferno.
+    directory = Path(settings.PROFILE_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    slug = route.strip("/").replace("/", "_") or "root"
+    path = directory / f"{time.strftime('%Y%m%dT%H%M%S')}-{slug}-{uuid.uuid4().hex[:8]}.collapsed"
+    path.write_text("".join(
+        f"{';'.join(label.replace(';', ':') for label in stack)} {round(seconds * 1e6)}\n"
+        for stack, seconds in stacks.most_common()
+    ))
+    return path
+
+
+async def drain(response: StreamingResponse) -> Response:
+    # Streamed bodies are produced after the handler returns, so they are
+    # read while the sampler is still running.
+    body = b"".join([
+        chunk if isinstance(chunk, bytes) else chunk.encode()
+        async for chunk in response.body_iterator
+    ])
+    headers = {k: v for k, v in response.headers.items() if k != "content-length"}
+    return Response(content=body, status_code=response.status_code, headers=headers)
+
+
+async def profile_request(
+    mode: str, route: str, call: Callable[[], Awaitable[Response]]
+) -> Response:
+    sampler = StackSampler(settings.PROFILE_INTERVAL_MS / 1000)
+    token = current_sampler.set(sampler)
+    sampler.add_thread(threading.get_ident())
+    started_at = time.perf_counter()
+    sampler.start()
+    try:
+        response = await call()
+        if isinstance(response, StreamingResponse):
+            response = await drain(response)
+    finally:
+        sampler.stop()
+        current_sampler.reset(token)
+    wall_seconds = time.perf_counter() - started_at
+
+    if mode == "flamegraph":
+        path = write_collapsed(sampler.stacks, route)
+        logger.info(f"Wrote profile of {route} ({sampler.samples} samples) to {path}")
+        response.headers["X-Profile-File"] = str(path)
+        return response
+
+    return JSONResponse({
+        "route": route,
+        "status_code": response.status_code,
+        "wall_seconds": round(wall_seconds, 4),
+        "samples": sampler.samples,
+        "interval_ms": settings.PROFILE_INTERVAL_MS,
+        "functions": top_functions(sampler.stacks, settings.PROFILE_TOP_N)
+    })
@@ -0,0 +1,176 @@
+import json
+import numpy as np
+from fastapi import HTTPException, Response
+from typing import Dict, List, Optional
+
+from app.models.schemas import BatchMatchResponse
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+JSON = "application/json"
+COLUMNAR_JSON = "application/vnd.match.columnar+json"
+MSGPACK = "application/x-msgpack"
+ARROW = "application/vnd.apache.arrow.stream"
+
+MEDIA_TYPES = {
+    JSON: JSON,
+    COLUMNAR_JSON: COLUMNAR_JSON,
+    MSGPACK: MSGPACK,
+    "application/msgpack": MSGPACK,
+    ARROW: ARROW
+}
+
+SCORE_FIELDS = (
+    "overall_score", "skill_score", "qualification_score",
+    "location_score", "sector_score", "diversity_score"
+)
+EXPLANATION_FIELDS = ("skills", "qualification", "location", "sector", "diversity")
+
+
+def available(media_type: str) -> bool:
+    if media_type == MSGPACK:
+        return msgpack is not None
+    if media_type == ARROW:
+        return pa is not None
+    return True
+
+
+def negotiate(accept: Optional[str]) -> str:
+    # Picks the highest-quality type we can produce. Anything unknown,
+    # including */*, gets the regular JSON body; asking only for a binary
+    # format whose package is not installed is a 406.
+    ranges = []
+    for position, part in enumerate((accept or "").split(",")):
+        media_type, *params = [p.strip() for p in part.split(";")]
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if media_type and quality > 0:
+            ranges.append((-quality, position, media_type.lower()))
+
+    unavailable = []
+    for _, _, media_type in sorted(ranges):
+        if media_type in MEDIA_TYPES:
+            media_type = MEDIA_TYPES[media_type]
+            if available(media_type):
+                return media_type
+            unavailable.append(media_type)
+        elif media_type in ("*/*", "application/*"):
+            return JSON
+
+    if unavailable and len(unavailable) == len(ranges):
+        raise HTTPException(
+            status_code=406,
+            detail=f"Response format not supported by this deployment: {', '.join(unavailable)}"
+        )
+    return JSON
+
+
+class MatchColumns:
+    # Batch results as flat columns: one entry per student for the student
+    # fields, and one entry per match for the rest, grouped by student in
+    # response order. total_matches gives each student's run of matches.
+
+    def __init__(self, response: BatchMatchResponse):
+        self.summary = response.model_dump(mode="json", exclude={"results"})
+        self.student_ids = [r.student_id for r in response.results]
+        self.student_names = [r.student_name for r in response.results]
+        self.total_matches = np.array([len(r.matches) for r in response.results], dtype=np.int64)
+
+        matches = [m for r in response.results for m in r.matches]
+        self.internship_ids = [m.internship_id for m in matches]
+        self.scores = {
+            name: np.array([getattr(m, name) for m in matches], dtype=np.float64)
+            for name in SCORE_FIELDS
+        }
+        # Runs without explanations leave the columns out entirely.
+        self.explanations: Dict[str, List[str]] = {}
+        if any(m.explanation for m in matches):
+            self.explanations = {
+                name: [m.explanation.get(name, "") for m in matches]
+                for name in EXPLANATION_FIELDS
+            }
+
+    def payload(self, lists: bool = False) -> dict:
+        return {
+            **self.summary,
+            "student_ids": self.student_ids,
+            "student_names": self.student_names,
+            "total_matches": self.total_matches.tolist() if lists else self.total_matches,
+            "internship_ids": self.internship_ids,
+            **{
+                name: values.tolist() if lists else values
+                for name, values in self.scores.items()
+            },
+            **{f"explanation_{name}": values for name, values in self.explanations.items()}
+        }
+
+    def to_json(self) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(self.payload(), option=orjson.OPT_SERIALIZE_NUMPY)
+        return json.dumps(self.payload(lists=True), separators=(",", ":")).encode()
+
+    def to_msgpack(self) -> bytes:
+        return msgpack.packb(self.payload(lists=True), use_bin_type=True)
+
+    def to_arrow(self) -> bytes:
+        # One row per student with list columns for its matches; the list
+        # offsets are the running total of total_matches. Run totals travel
+        # in the schema metadata.
+        offsets = pa.array(
+            np.concatenate([[0], np.cumsum(self.total_matches)]).astype(np.int32)
+        )
+        columns = {
+            "student_id": pa.array(self.student_ids, type=pa.string()),
+            "student_name": pa.array(self.student_names, type=pa.string()),
+            "internship_id": pa.ListArray.from_arrays(
+                offsets, pa.array(self.internship_ids, type=pa.string())
+            ),
+            **{
+                name: pa.ListArray.from_arrays(offsets, pa.array(values))
+                for name, values in self.scores.items()
+            },
+            **{
+                f"explanation_{name}": pa.ListArray.from_arrays(
+                    offsets, pa.array(values, type=pa.string())
+                )
+                for name, values in self.explanations.items()
+            }
+        }
+        table = pa.table(columns, metadata={"summary": json.dumps(self.summary)})
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue().to_pybytes()
+
+
+def encode_batch_response(response: BatchMatchResponse, media_type: str) -> Response:
+    if media_type == JSON:
+        # Serialised straight from the model, skipping FastAPI's second
+        # validation and jsonable_encoder pass over every match.
+        content = response.model_dump_json()
+    elif media_type == COLUMNAR_JSON:
+        content = MatchColumns(response).to_json()
+    elif media_type == MSGPACK:
+        content = MatchColumns(response).to_msgpack()
+    else:
+        content = MatchColumns(response).to_arrow()
+    return Response(content=content, media_type=media_type, headers={"Vary": "Accept"})
@@ -0,0 +1,191 @@
+import argparse
+import json
+import numpy as np
+from pathlib import Path
+from loguru import logger
+from typing import TYPE_CHECKING, List, Optional, Union
+
+from app.core.config import settings
+
+try:
+    import onnxruntime as ort
+    from tokenizers import Tokenizer
+except ImportError:
+    ort = None
+    Tokenizer = None
+
+if TYPE_CHECKING:
+    from sentence_transformers import SentenceTransformer
+
+SKILL_ENCODER_NAME = 'all-MiniLM-L6-v2'
+
+ONNX_MODEL_FILES = {"onnx": "model.onnx", "onnx-int8": "model.int8.onnx"}
+ONNX_CONFIG_FILE = "encoder.json"
+ONNX_TOKENIZER_FILE = "tokenizer.json"
+BACKENDS = ("torch", *ONNX_MODEL_FILES)
+
+# Same default batch size as SentenceTransformer.encode.
+ENCODE_BATCH_SIZE = 32
+
+
+class OnnxSkillEncoder:
+    # The exported transformer run through ONNX Runtime, with the rest of
+    # the sentence-transformers pipeline done in numpy: tokenise, mean-pool
+    # token embeddings over the attention mask, then L2-normalise. Neither
+    # torch nor sentence-transformers is imported.
+
+    def __init__(self, model_file: Path, threads: int = 0):
+        directory = model_file.parent
+        config = json.loads((directory / ONNX_CONFIG_FILE).read_text())
+        self.dimension = config["dimension"]
+
+        self.tokenizer = Tokenizer.from_file(str(directory / ONNX_TOKENIZER_FILE))
+        self.tokenizer.enable_truncation(max_length=config["max_length"])
+        self.tokenizer.enable_padding(pad_id=config["pad_token_id"], pad_token=config["pad_token"])
+
+        options = ort.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(
+            str(model_file), options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {model_input.name for model_input in self.session.get_inputs()}
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.dimension
+
+    def encode(self, sentences, batch_size: int = ENCODE_BATCH_SIZE, **kwargs) -> np.ndarray:
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        embeddings = np.zeros((len(texts), self.dimension), dtype=np.float32)
+
+        # Longest first, as sentence-transformers does, so each batch pads
+        # to similar lengths.
+        order = sorted(range(len(texts)), key=lambda i: -len(texts[i]))
+        for start in range(0, len(order), batch_size):
+            batch = order[start:start + batch_size]
+            encodings = self.tokenizer.encode_batch([texts[i] for i in batch])
+            mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+            inputs = {
+                "input_ids": np.array([e.ids for e in encodings], dtype=np.int64),
+                "attention_mask": mask,
+                "token_type_ids": np.array([e.type_ids for e in encodings], dtype=np.int64)
+            }
+            tokens = self.session.run(
+                None, {name: value for name, value in inputs.items() if name in self.input_names}
+            )[0]
+            weights = mask[:, :, None].astype(np.float32)
+            embeddings[batch] = (tokens * weights).sum(axis=1) / np.clip(weights.sum(axis=1), 1e-9, None)
+
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        embeddings = np.divide(embeddings, norms, out=np.zeros_like(embeddings), where=norms > 0)
+        return embeddings[0] if single else embeddings
+
+
+SkillEncoder = Union["SentenceTransformer", OnnxSkillEncoder]
+
+
+def onnx_directory(model_path: Optional[Path] = None) -> Path:
+    return Path(model_path or settings.MODEL_PATH) / settings.SKILL_ENCODER_ONNX_DIR
+
+
+def skill_encoder_id(backend: Optional[str] = None) -> str:
+    # Identifies the vectors a backend produces, for the embedding and
+    # result caches. Torch keeps the bare model name so existing caches
+    # stay valid.
+    backend = backend or settings.SKILL_ENCODER_BACKEND
+    return SKILL_ENCODER_NAME if backend == "torch" else f"{SKILL_ENCODER_NAME}:{backend}"
+
+
+def load_skill_encoder(backend: Optional[str] = None, model_path: Optional[Path] = None) -> SkillEncoder:
+    backend = backend or settings.SKILL_ENCODER_BACKEND
+    if backend == "torch":
+        # Imported here so ONNX deployments never load torch.
+        from sentence_transformers import SentenceTransformer
+        
+        # Loaded from a copy under MODEL_PATH when there is one, so starting
+        # up does not depend on reaching the model hub. The first load saves
+        # that copy.
+        local_dir = Path(model_path or settings.MODEL_PATH) / settings.SKILL_ENCODER_LOCAL_DIR
+        if (local_dir / "modules.json").exists():
+            return SentenceTransformer(str(local_dir))
+        model = SentenceTransformer(SKILL_ENCODER_NAME)
+        try:
+            model.save(str(local_dir))
+            logger.info(f"Saved {SKILL_ENCODER_NAME} to {local_dir}")
+        except OSError as e:
+            logger.warning(f"Could not save {SKILL_ENCODER_NAME} to {local_dir}: {str(e)}")
+        return model
+
+    if backend not in ONNX_MODEL_FILES:
+        raise ValueError(f"Unknown skill encoder backend: {backend}")
+    if ort is None:
+        raise RuntimeError(f"onnxruntime and tokenizers are required for the {backend} skill encoder")
+    model_file = onnx_directory(model_path) / ONNX_MODEL_FILES[backend]
+    if not model_file.exists():
+        raise RuntimeError(
+            f"{model_file} not found; export it with `python -m app.core.skill_encoders`"
+        )
+    return OnnxSkillEncoder(model_file, threads=settings.SKILL_ENCODER_THREADS)
+
+
+def export_onnx(directory: Path, quantize: bool = True) -> List[Path]:
+    # Needs the torch stack, so it runs once at build time rather than in
+    # the service.
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    model = SentenceTransformer(SKILL_ENCODER_NAME, device="cpu")
+    transformer = model[0].auto_model.eval()
+    tokenizer = model.tokenizer
+    directory.mkdir(parents=True, exist_ok=True)
+
+    sample = tokenizer(["Machine Learning", "Python"], padding=True, return_tensors="pt")
+    input_names = [
+        name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample
+    ]
+    model_file = directory / ONNX_MODEL_FILES["onnx"]
+    with torch.no_grad():
+        torch.onnx.export(
+            transformer,
+            tuple(sample[name] for name in input_names),
+            str(model_file),
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes={
+                name: {0: "batch", 1: "sequence"}
+                for name in [*input_names, "last_hidden_state"]
+            },
+            opset_version=14
+        )
+    tokenizer.backend_tokenizer.save(str(directory / ONNX_TOKENIZER_FILE))
+    (directory / ONNX_CONFIG_FILE).write_text(json.dumps({
+        "model": SKILL_ENCODER_NAME,
+        "dimension": model.get_sentence_embedding_dimension(),
+        "max_length": model.max_seq_length,
+        "pad_token": tokenizer.pad_token,
+        "pad_token_id": tokenizer.pad_token_id
+    }, indent=2))
+    written = [model_file]
+
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        int8_file = directory / ONNX_MODEL_FILES["onnx-int8"]
+        quantize_dynamic(str(model_file), str(int8_file), weight_type=QuantType.QInt8)
+        written.append(int8_file)
+
+    for path in written:
+        logger.info(f"Wrote {path} ({path.stat().st_size / 1e6:.1f} MB)")
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the skill encoder to ONNX")
+    parser.add_argument("--output", type=Path, default=None)
+    parser.add_argument("--no-quantize", action="store_true")
+    args = parser.parse_args()
+    export_onnx(args.output or onnx_directory(), quantize=not args.no_quantize)
+
+
+if __name__ == "__main__":
+    main()
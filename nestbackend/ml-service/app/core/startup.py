@@ -0,0 +1,85 @@
+import os
+import time
+from contextlib import contextmanager
+from loguru import logger
+from typing import Dict, Optional
+
+from app.core.metrics import STARTUP_SECONDS
+
+IMPORTED_AT = time.time()
+
+
+def process_started_at() -> float:
+    # Wall-clock start of this process, so time to ready includes the
+    # interpreter and imports. /proc is Linux-only; elsewhere this falls
+    # back to when this module was imported.
+    try:
+        with open("/proc/self/stat") as stat:
+            # Fields after the command name, which may contain spaces; the
+            # start time in clock ticks since boot is the 22nd field.
+            start_ticks = int(stat.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as uptime:
+            booted_at = time.time() - float(uptime.read().split()[0])
+        return booted_at + start_ticks / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError):
+        return IMPORTED_AT
+
+
+class StartupTracker:
+    # Where the process is in getting ready to serve matching traffic, with
+    # the duration of each phase. `status` moves from "starting" through
+    # "loading" to "ready", or to "failed" if loading raised.
+    #
+    # The "imports" phase runs before the health endpoints can answer, so
+    # heavy libraries needed only on some paths (torch, sklearn, pandas,
+    # each a fifth of a second or more) are imported where they are used.
+
+    def __init__(self):
+        self.started_at = process_started_at()
+        self.status = "starting"
+        self.error: Optional[str] = None
+        self.phases: Dict[str, float] = {}
+        self.time_to_ready: Optional[float] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.status == "ready"
+
+    def record(self, phase: str, seconds: float):
+        self.phases[phase] = round(seconds, 4)
+        STARTUP_SECONDS.labels(phase).set(seconds)
+
+    @contextmanager
+    def phase(self, name: str):
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start_time)
+
+    def mark_ready(self):
+        self.status = "ready"
+        self.time_to_ready = time.time() - self.started_at
+        STARTUP_SECONDS.labels("time_to_ready").set(self.time_to_ready)
+        logger.info(
+            f"Ready {self.time_to_ready:.2f}s after process start "
+            f"({', '.join(f'{name} {seconds:.2f}s' for name, seconds in self.phases.items())})"
+        )
+
+    def mark_failed(self, error: Exception):
+        self.status = "failed"
+        self.error = str(error)
+
+    def report(self) -> dict:
+        return {
+            "status": self.status,
+            "error": self.error,
+            "phases_seconds": dict(self.phases),
+            "time_to_ready_seconds": (
+                round(self.time_to_ready, 4) if self.time_to_ready is not None else None
+            ),
+            "uptime_seconds": round(time.time() - self.started_at, 4)
+        }
+
+
+startup = StartupTracker()
@@ -2,27 +2,63 @@ from fastapi import FastAPI, HTTPException, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from contextlib import asynccontextmanager
+import asyncio
+import time
 import uvicorn
 from loguru import logger
 import sys
 
-from app.api.routes import matching, health, analytics
+from app.api.routes import matching, health, analytics, catalog, allocation, jobs, metrics
 from app.core.config import settings
-from app.core.model_manager import ModelManager
+from app.core.executor import matching_executor
+from app.core.model_manager import model_manager
+from app.core.startup import startup
+from app.services.jobs import job_manager
 from app.middleware.auth import verify_api_key
+from app.middleware.readiness import require_ready
 
 logger.remove()
 logger.add(sys.stdout, level=settings.LOG_LEVEL)
 
-model_manager = ModelManager()
+def prepare_models():
+    model_manager.load()
+    model_manager.warm_up()
+    with startup.phase("workers"):
+        matching_executor.warm_up()
+
+async def prepare():
+    # Loading runs on a thread, so the event loop keeps answering
+    # /api/v1/health and /api/v1/ready while it does.
+    try:
+        await asyncio.to_thread(prepare_models)
+    except Exception as e:
+        startup.mark_failed(e)
+        logger.error(f"Startup failed: {str(e)}")
+        # In the background the failure is reported by /api/v1/ready and
+        # /api/v1/health instead.
+        if not settings.MODEL_LOAD_IN_BACKGROUND:
+            raise
+        return
+    job_manager.resume()
+    startup.mark_ready()
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     logger.info("Starting ML Service...")
-    await model_manager.load_models()
-    logger.info("Models loaded successfully")
+    startup.record("imports", time.time() - startup.started_at)
+    startup.status = "loading"
+    matching_executor.start()
+    loading = None
+    if settings.MODEL_LOAD_IN_BACKGROUND:
+        loading = asyncio.create_task(prepare())
+    else:
+        await prepare()
     yield
     logger.info("Shutting down ML Service...")
+    if loading is not None and not loading.done():
+        loading.cancel()
+    matching_executor.shutdown()
+    job_manager.shutdown()
     await model_manager.cleanup()
 
 app = FastAPI(
@@ -41,11 +77,30 @@ app.add_middleware(
 )
 
 app.include_router(health.router, prefix="/api/v1", tags=["Health"])
+app.include_router(metrics.router, tags=["Monitoring"])
 app.include_router(
     matching.router, 
     prefix="/api/v1/matching", 
     tags=["Matching"],
-    dependencies=[Depends(verify_api_key)]
+    dependencies=[Depends(verify_api_key), Depends(require_ready)]
+)
+app.include_router(
+    allocation.router, 
+    prefix="/api/v1/allocation/sessions", 
+    tags=["Allocation Sessions"],
+    dependencies=[Depends(verify_api_key), Depends(require_ready)]
+)
+app.include_router(
+    jobs.router, 
+    prefix="/api/v1/jobs", 
+    tags=["Jobs"],
+    dependencies=[Depends(verify_api_key), Depends(require_ready)]
+)
+app.include_router(
+    catalog.router, 
+    prefix="/api/v1/catalog", 
+    tags=["Catalog"],
+    dependencies=[Depends(verify_api_key), Depends(require_ready)]
 )
 app.include_router(
     analytics.router, 
@@ -0,0 +1,10 @@
+from fastapi import HTTPException, status
+from app.core.startup import startup
+
+async def require_ready():
+    if not startup.ready:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Service is not ready ({startup.status})",
+            headers={"Retry-After": "5"}
+        )
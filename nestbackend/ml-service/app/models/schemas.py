@@ -1,5 +1,6 @@
 from pydantic import BaseModel, Field, validator
-from typing import List, Optional, Dict
+from typing import List, Literal, Optional, Dict
+from datetime import datetime
 from enum import Enum
 
 class SocialCategory(str, Enum):
@@ -63,12 +64,31 @@ class InternshipOpportunity(BaseModel):
             raise ValueError("Filled positions cannot exceed capacity")
         return v
 
-class MatchRequest(BaseModel):
+class InternshipSource(BaseModel):
+    internships: Optional[List[InternshipOpportunity]] = None
+    catalog_version: Optional[int] = None
+    internship_ids: Optional[List[str]] = None
+    use_catalog: bool = False
+    
+    @validator('use_catalog', always=True)
+    def validate_internship_source(cls, v, values):
+        # The whole catalog has to be asked for, so a missing `internships`
+        # field is not silently matched against every posting.
+        if values.get('internships') is None and not (
+            v or values.get('catalog_version') is not None or values.get('internship_ids')
+        ):
+            raise ValueError(
+                "Pass internships, or use_catalog, catalog_version or internship_ids to match against the catalog"
+            )
+        return v
+
+class MatchRequest(InternshipSource):
     students: List[StudentProfile]
-    internships: List[InternshipOpportunity]
     diversity_boost: bool = Field(default=True)
     max_matches_per_student: int = Field(default=10, ge=1, le=50)
     min_score_threshold: float = Field(default=0.5, ge=0.0, le=1.0)
+    candidate_depth: Optional[int] = Field(default=None, ge=1)
+    include_explanations: bool = Field(default=True)
 
 class MatchScore(BaseModel):
     student_id: str
@@ -92,11 +112,174 @@ class BatchMatchResponse(BaseModel):
     total_students_processed: int
     total_matches_generated: int
     processing_time_seconds: float
+    run_id: Optional[str] = None
 
-class SingleMatchRequest(BaseModel):
+class BatchMatchSummary(BaseModel):
+    total_students_processed: int
+    total_matches_generated: int
+    processing_time_seconds: float
+    run_id: Optional[str] = None
+
+class IngestionError(BaseModel):
+    column: str
+    error: str
+    count: int
+    rows: List[int]
+
+class IngestionReport(BaseModel):
+    total_rows: int
+    valid_rows: int
+    invalid_rows: int
+    errors: List[IngestionError]
+
+class BulkMatchResponse(BatchMatchResponse):
+    students_report: IngestionReport
+    internships_report: Optional[IngestionReport] = None
+
+class SingleMatchRequest(InternshipSource):
     student: StudentProfile
-    internships: List[InternshipOpportunity]
     max_matches: int = Field(default=10, ge=1, le=50)
+    candidate_depth: Optional[int] = Field(default=None, ge=1)
+    include_explanations: bool = Field(default=True)
+
+class RecallReportRequest(InternshipSource):
+    students: List[StudentProfile] = Field(..., min_items=1)
+    depths: List[int] = Field(default=[50, 100, 200, 500], min_items=1)
+    max_matches_per_student: int = Field(default=10, ge=1, le=50)
+    min_score_threshold: float = Field(default=0.5, ge=0.0, le=1.0)
+    diversity_boost: bool = Field(default=True)
+
+AllocationSolverName = Literal["legacy", "greedy", "assignment", "deferred_acceptance"]
+
+class AllocationRequest(InternshipSource):
+    students: List[StudentProfile]
+    solver: Optional[AllocationSolverName] = None
+    top_k: Optional[int] = Field(default=None, ge=1)
+    candidate_depth: Optional[int] = Field(default=None, ge=1)
+    compare_with: List[AllocationSolverName] = []
+    keep_components: bool = Field(default=False)
+
+class AllocationSummary(BaseModel):
+    solver: str
+    total_allocated: int
+    total_students: int
+    allocation_rate: float
+    total_score: float
+    average_score: float
+    scoring_time_seconds: float
+    solve_time_seconds: float
+    blocking_pairs: Optional[int] = None
+
+class AllocationResponse(AllocationSummary):
+    allocation: Dict[str, str]
+    comparison: Dict[str, AllocationSummary] = {}
+    run_id: Optional[str] = None
+
+class ScoringWeights(BaseModel):
+    skill: Optional[float] = Field(default=None, ge=0.0)
+    qualification: Optional[float] = Field(default=None, ge=0.0)
+    location: Optional[float] = Field(default=None, ge=0.0)
+    sector: Optional[float] = Field(default=None, ge=0.0)
+    diversity: Optional[float] = Field(default=None, ge=0.0)
+
+class WhatIfRequest(BaseModel):
+    run_id: str
+    scenarios: List[ScoringWeights] = Field(..., min_items=1, max_items=20)
+    solver: Optional[Literal["greedy", "assignment", "deferred_acceptance"]] = None
+    top_k: Optional[int] = Field(default=None, ge=1)
+    include_allocation: bool = Field(default=False)
+
+class AllocationDiff(BaseModel):
+    students_changed: int
+    newly_allocated: int
+    newly_unallocated: int
+    top_match_changed: int
+    allocation_rate_change: float
+    average_score_change: float
+
+class WhatIfScenario(BaseModel):
+    weights: ScoringWeights
+    summary: AllocationSummary
+    diff: Optional[AllocationDiff] = None
+    allocation: Optional[Dict[str, str]] = None
+
+class WhatIfResponse(BaseModel):
+    run_id: str
+    baseline: WhatIfScenario
+    scenarios: List[WhatIfScenario]
+
+class AllocationSessionRequest(InternshipSource):
+    students: List[StudentProfile] = []
+    diversity_boost: bool = Field(default=True)
+    top_k: Optional[int] = Field(default=None, ge=1)
+    min_score_threshold: float = Field(default=0.0, ge=0.0, le=1.0)
+
+class SessionStudentsRequest(BaseModel):
+    students: List[StudentProfile] = Field(..., min_items=1)
+
+class AllocationSessionState(BaseModel):
+    session_id: str
+    total_students: int
+    total_internships: int
+    total_allocated: int
+    allocation_rate: float
+    total_score: float
+    average_score: float
+    remaining_seats: int
+    events: int
+    avg_event_ms: float
+
+class AllocationSessionEvent(AllocationSessionState):
+    changes: Dict[str, Optional[str]]
+    elapsed_ms: float
+    solver: Optional[str] = None
+
+class JobStatus(BaseModel):
+    job_id: str
+    kind: Literal["match", "allocation"]
+    status: Literal["queued", "running", "completed", "failed"]
+    total_students: int
+    processed_students: int
+    progress: float
+    eta_seconds: Optional[float] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    error: Optional[str] = None
+
+class JobResultsPage(BaseModel):
+    job_id: str
+    kind: Literal["match", "allocation"]
+    status: str
+    offset: int
+    limit: int
+    total: int
+    results: List[MatchResult] = []
+    allocation: Dict[str, str] = {}
+    summary: Optional[AllocationSummary] = None
+
+class CatalogUpsertRequest(BaseModel):
+    internships: List[InternshipOpportunity] = Field(..., min_items=1)
+
+class CatalogUpsertResponse(BaseModel):
+    version: int
+    inserted: int
+    updated: int
+    reembedded: int
+    total_internships: int
+
+class CatalogBulkUpsertResponse(CatalogUpsertResponse):
+    validation_report: IngestionReport
+
+class CapacityUpdate(BaseModel):
+    filled_positions: Optional[int] = Field(default=None, ge=0)
+    capacity: Optional[int] = Field(default=None, ge=1)
+
+class CatalogInfo(BaseModel):
+    version: int
+    revision: int
+    total_internships: int
+    total_remaining_capacity: int
 
 class AnalyticsRequest(BaseModel):
     match_results: List[MatchResult]
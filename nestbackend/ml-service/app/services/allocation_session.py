@@ -0,0 +1,457 @@
+import copy
+import heapq
+import itertools
+import threading
+import time
+import uuid
+import numpy as np
+from contextlib import contextmanager
+from loguru import logger
+from typing import Callable, Dict, List, Optional, Tuple
+
+from app.models.schemas import StudentProfile
+from app.core.config import settings
+from app.services.allocation_solver import SOLVERS
+from app.services.score_matrix import InternshipFeatures, ScoreMatrixEngine
+
+
+class AllocationSession:
+    # Maintains the student-proposing stable allocation under arrivals,
+    # withdrawals and capacity changes. Students rank internships by score
+    # and internships rank students by priority, as in the deferred
+    # acceptance solver. Each internship keeps a min-heap of its assignees
+    # and a max-heap waitlist of students it turned away, both keyed by
+    # priority with lazy deletion, so an event only touches the internships
+    # and students it actually displaces. Waitlist entries carry the
+    # generation of the preferences they were made under, and go stale
+    # when the student is re-added or withdrawn.
+    #
+    # Every change an event makes is journalled and undone if the event
+    # raises, so a failed event leaves the session as it was.
+
+    def __init__(
+        self,
+        session_id: str,
+        score_matrix: ScoreMatrixEngine,
+        internship_features: InternshipFeatures,
+        diversity_boost: bool = True,
+        top_k: Optional[int] = None,
+        min_score: float = 0.0
+    ):
+        self.session_id = session_id
+        self.score_matrix = score_matrix
+        self.diversity_boost = diversity_boost
+        self.top_k = top_k or settings.ALLOCATION_TOP_K
+        self.min_score = min_score
+
+        self.features = copy.copy(internship_features)
+        self.capacity = internship_features.capacity.copy()
+        self.filled_positions = internship_features.filled_positions.copy()
+        self.seats = np.maximum(self.capacity - self.filled_positions, 0)
+        self.features.capacity = self.seats.copy()
+        self.features.filled_positions = np.zeros(len(self.features), dtype=np.int64)
+        self._index = {id_: i for i, id_ in enumerate(self.features.ids)}
+
+        self.students: Dict[str, StudentProfile] = {}
+        self.preferences: Dict[str, List[Tuple[int, float]]] = {}
+        self._scores: Dict[str, Dict[int, float]] = {}
+        self._priorities: Dict[str, Dict[int, float]] = {}
+        self._generations: Dict[str, int] = {}
+        self.assignment: Dict[str, int] = {}
+        self.total_score = 0.0
+
+        self._counts = np.zeros(len(self.features), dtype=np.int64)
+        self._assignees: List[list] = [[] for _ in range(len(self.features))]
+        self._waitlists: List[list] = [[] for _ in range(len(self.features))]
+        self._tokens: Dict[str, int] = {}
+        self._sequence = itertools.count()
+        self._changes: Dict[str, Optional[int]] = {}
+        self._journal: List[Callable[[], None]] = []
+        self._lock = threading.RLock()
+
+        self.events = 0
+        self.event_time = 0.0
+        self.created_at = time.time()
+        self.last_used = self.created_at
+
+    def add_students(self, students: List[StudentProfile]) -> dict:
+        with self._event():
+            start_time = time.perf_counter()
+            for student in students:
+                if student.student_id in self.students:
+                    self._withdraw(student.student_id)
+
+            self._set_preferences(students)
+            self._settle(pending=[s.student_id for s in students])
+            return self._finish_event(start_time)
+
+    def withdraw(self, student_id: str) -> dict:
+        with self._event():
+            if student_id not in self.students:
+                raise KeyError(student_id)
+            start_time = time.perf_counter()
+            self._withdraw(student_id)
+            return self._finish_event(start_time)
+
+    def update_capacity(
+        self,
+        internship_id: str,
+        capacity: Optional[int] = None,
+        filled_positions: Optional[int] = None
+    ) -> dict:
+        with self._event():
+            internship = self._index[internship_id]
+            start_time = time.perf_counter()
+
+            for array in (self.capacity, self.filled_positions, self.seats):
+                self._remember_item(array, internship)
+            if capacity is not None:
+                self.capacity[internship] = capacity
+            if filled_positions is not None:
+                self.filled_positions[internship] = filled_positions
+            self.seats[internship] = max(
+                self.capacity[internship] - self.filled_positions[internship], 0
+            )
+            self._remember_attr(self.features, "capacity")
+            self.features.capacity = self.seats.copy()
+
+            pending = []
+            while self._counts[internship] > self.seats[internship]:
+                _, _, student_id = self._pop_min_assignee(internship)
+                self._unassign(student_id)
+                pending.append(student_id)
+
+            self._settle(pending=pending, open_internships=[internship])
+            return self._finish_event(start_time)
+
+    def reoptimize(self, solver: Optional[str] = None) -> dict:
+        with self._event():
+            start_time = time.perf_counter()
+            solver = solver or settings.ALLOCATION_SOLVER
+            if solver not in SOLVERS:
+                raise ValueError(f"Unknown allocation solver: {solver}")
+
+            previous = dict(self.assignment)
+            students = list(self.students.values())
+            edges = self._set_preferences(students)
+            edges.remaining_capacity = self.seats.copy()
+            assigned = SOLVERS[solver](edges)
+
+            for name in ("assignment", "total_score", "_counts", "_assignees", "_waitlists", "_tokens"):
+                self._remember_attr(self, name)
+            self.assignment = {}
+            self.total_score = 0.0
+            self._counts = np.zeros(len(self.features), dtype=np.int64)
+            self._assignees = [[] for _ in range(len(self.features))]
+            self._waitlists = [[] for _ in range(len(self.features))]
+            self._tokens = {}
+            self._changes = {}
+
+            for student, internship in zip(students, assigned.tolist()):
+                if internship >= 0:
+                    self._assign(student.student_id, internship)
+            for student in students:
+                current = self.assignment.get(student.student_id)
+                for internship, _ in self.preferences[student.student_id]:
+                    if internship == current:
+                        break
+                    self._push_waitlist(internship, student.student_id)
+
+            self._changes = {
+                student_id: self.assignment.get(student_id)
+                for student_id in set(previous) | set(self.assignment)
+                if previous.get(student_id) != self.assignment.get(student_id)
+            }
+            result = self._finish_event(start_time)
+            result["solver"] = solver
+            return result
+
+    def has_internship(self, internship_id: str) -> bool:
+        return internship_id in self._index
+
+    def allocation(self) -> Dict[str, str]:
+        with self._lock:
+            return {
+                student_id: self.features.ids[internship]
+                for student_id, internship in self.assignment.items()
+            }
+
+    def summary(self) -> dict:
+        with self._lock:
+            allocated = len(self.assignment)
+            return {
+                "session_id": self.session_id,
+                "total_students": len(self.students),
+                "total_internships": len(self.features),
+                "total_allocated": allocated,
+                "allocation_rate": (
+                    round(allocated / len(self.students) * 100, 2) if self.students else 0
+                ),
+                "total_score": round(self.total_score, 4),
+                "average_score": round(self.total_score / allocated, 4) if allocated else 0.0,
+                "remaining_seats": int(np.maximum(self.seats - self._counts, 0).sum()),
+                "events": self.events,
+                "avg_event_ms": (
+                    round(self.event_time / self.events * 1000, 3) if self.events else 0.0
+                )
+            }
+
+    def _set_preferences(self, students: List[StudentProfile]):
+        _, edges = self.score_matrix.top_k_edges(
+            students,
+            self.features.internships,
+            k=self.top_k,
+            min_score=self.min_score,
+            diversity_boost=self.diversity_boost,
+            internship_features=self.features,
+            include_full=True
+        )
+
+        order = np.lexsort((edges.internship_index, -edges.scores, edges.student_index))
+        grouped: Dict[int, List[Tuple[int, float]]] = {}
+        priorities: Dict[int, Dict[int, float]] = {}
+        for student, internship, score, priority in zip(
+            edges.student_index[order].tolist(),
+            edges.internship_index[order].tolist(),
+            edges.scores[order].tolist(),
+            edges.priorities[order].tolist()
+        ):
+            grouped.setdefault(student, []).append((internship, score))
+            priorities.setdefault(student, {})[internship] = priority
+
+        for position, student in enumerate(students):
+            preferences = grouped.get(position, [])
+            self._set(self.students, student.student_id, student)
+            self._set(self.preferences, student.student_id, preferences)
+            self._set(self._scores, student.student_id, dict(preferences))
+            self._set(self._priorities, student.student_id, priorities.get(position, {}))
+            self._set(self._generations, student.student_id, next(self._sequence))
+        return edges
+
+    def _withdraw(self, student_id: str):
+        internship = self.assignment.get(student_id)
+        if internship is not None:
+            self._unassign(student_id)
+        self._changes[student_id] = None
+        for mapping in (self.students, self.preferences, self._scores, self._priorities, self._generations):
+            self._delete(mapping, student_id)
+        if internship is not None:
+            self._settle(open_internships=[internship])
+
+    def _settle(
+        self,
+        pending: Optional[List[str]] = None,
+        open_internships: Optional[List[int]] = None
+    ):
+        pending = pending or []
+        open_internships = open_internships or []
+        while pending or open_internships:
+            if pending:
+                self._propose(pending.pop(), pending)
+            else:
+                self._fill_seats(open_internships.pop(), pending, open_internships)
+
+    def _propose(self, student_id: str, pending: List[str]):
+        for internship, _ in self.preferences[student_id]:
+            if self._counts[internship] < self.seats[internship]:
+                self._assign(student_id, internship)
+                return
+
+            weakest = self._peek_min_assignee(internship)
+            if weakest is not None and self._priorities[student_id][internship] > weakest[0]:
+                _, _, displaced = self._pop_min_assignee(internship)
+                self._unassign(displaced)
+                self._push_waitlist(internship, displaced)
+                self._assign(student_id, internship)
+                pending.append(displaced)
+                return
+
+            self._push_waitlist(internship, student_id)
+
+    def _fill_seats(self, internship: int, pending: List[str], open_internships: List[int]):
+        waitlist = self._waitlists[internship]
+        while self._counts[internship] < self.seats[internship] and waitlist:
+            _, _, student_id, generation = self._heappop(waitlist)
+            if self._generations.get(student_id) != generation:
+                continue
+
+            current = self.assignment.get(student_id)
+            if current == internship:
+                continue
+            scores = self._scores[student_id]
+            if current is not None and scores[internship] <= scores[current]:
+                continue
+
+            if current is not None:
+                self._unassign(student_id)
+                open_internships.append(current)
+            self._assign(student_id, internship)
+
+    def _assign(self, student_id: str, internship: int):
+        score = self._scores[student_id][internship]
+        token = next(self._sequence)
+        self._set(self.assignment, student_id, internship)
+        self._set(self._tokens, student_id, token)
+        self._remember_item(self._counts, internship)
+        self._counts[internship] += 1
+        self._remember_attr(self, "total_score")
+        self.total_score += score
+        self._heappush(
+            self._assignees[internship], (self._priorities[student_id][internship], token, student_id)
+        )
+        self._changes[student_id] = internship
+
+    def _unassign(self, student_id: str):
+        internship = self.assignment[student_id]
+        self._delete(self.assignment, student_id)
+        self._delete(self._tokens, student_id)
+        self._remember_item(self._counts, internship)
+        self._counts[internship] -= 1
+        self._remember_attr(self, "total_score")
+        self.total_score -= self._scores[student_id][internship]
+        self._changes[student_id] = None
+
+    def _push_waitlist(self, internship: int, student_id: str):
+        self._heappush(
+            self._waitlists[internship],
+            (
+                -self._priorities[student_id][internship],
+                next(self._sequence),
+                student_id,
+                self._generations[student_id]
+            )
+        )
+
+    def _peek_min_assignee(self, internship: int) -> Optional[Tuple[float, int, str]]:
+        heap = self._assignees[internship]
+        while heap and self._tokens.get(heap[0][2]) != heap[0][1]:
+            self._heappop(heap)
+        return heap[0] if heap else None
+
+    def _pop_min_assignee(self, internship: int) -> Tuple[float, int, str]:
+        self._peek_min_assignee(internship)
+        return self._heappop(self._assignees[internship])
+
+    @contextmanager
+    def _event(self):
+        with self._lock:
+            self._journal = []
+            try:
+                yield
+            except BaseException:
+                for undo in reversed(self._journal):
+                    undo()
+                self._changes = {}
+                raise
+            finally:
+                self._journal = []
+
+    def _remember(self, mapping: dict, key):
+        if key in mapping:
+            previous = mapping[key]
+            self._journal.append(lambda: mapping.__setitem__(key, previous))
+        else:
+            self._journal.append(lambda: mapping.pop(key, None))
+
+    def _set(self, mapping: dict, key, value):
+        self._remember(mapping, key)
+        mapping[key] = value
+
+    def _delete(self, mapping: dict, key):
+        self._remember(mapping, key)
+        del mapping[key]
+
+    def _remember_item(self, array: np.ndarray, index: int):
+        previous = array[index]
+        self._journal.append(lambda: array.__setitem__(index, previous))
+
+    def _remember_attr(self, owner, name: str):
+        previous = getattr(owner, name)
+        self._journal.append(lambda: setattr(owner, name, previous))
+
+    def _heappush(self, heap: list, entry: tuple):
+        heapq.heappush(heap, entry)
+        self._journal.append(lambda: (heap.remove(entry), heapq.heapify(heap)))
+
+    def _heappop(self, heap: list) -> tuple:
+        entry = heapq.heappop(heap)
+        self._journal.append(lambda: heapq.heappush(heap, entry))
+        return entry
+
+    def _finish_event(self, start_time: float) -> dict:
+        elapsed = time.perf_counter() - start_time
+        self.events += 1
+        self.event_time += elapsed
+        self.last_used = time.time()
+        changes = {
+            student_id: None if internship is None else self.features.ids[internship]
+            for student_id, internship in self._changes.items()
+        }
+        self._changes = {}
+        return {
+            "changes": changes,
+            "elapsed_ms": round(elapsed * 1000, 3),
+            **self.summary()
+        }
+
+
+class AllocationSessionStore:
+    # Sessions left idle for longer than `idle_ttl` seconds are dropped
+    # whenever one is created or looked up. Zero keeps them until closed.
+
+    def __init__(self, idle_ttl: Optional[int] = None):
+        self.idle_ttl = settings.ALLOCATION_SESSION_IDLE_TTL if idle_ttl is None else idle_ttl
+        self._sessions: Dict[str, AllocationSession] = {}
+        self._lock = threading.Lock()
+
+    def _expire(self):
+        if self.idle_ttl <= 0:
+            return
+        now = time.time()
+        expired = [
+            session_id for session_id, session in self._sessions.items()
+            if now - session.last_used > self.idle_ttl
+        ]
+        for session_id in expired:
+            del self._sessions[session_id]
+        if expired:
+            logger.info(f"Expired {len(expired)} idle allocation sessions")
+
+    def create(
+        self,
+        score_matrix: ScoreMatrixEngine,
+        internship_features: InternshipFeatures,
+        diversity_boost: bool = True,
+        top_k: Optional[int] = None,
+        min_score: float = 0.0
+    ) -> AllocationSession:
+        session = AllocationSession(
+            uuid.uuid4().hex,
+            score_matrix,
+            internship_features,
+            diversity_boost=diversity_boost,
+            top_k=top_k,
+            min_score=min_score
+        )
+        with self._lock:
+            self._expire()
+            self._sessions[session.session_id] = session
+        logger.info(
+            f"Created allocation session {session.session_id} over "
+            f"{len(internship_features)} internships"
+        )
+        return session
+
+    def get(self, session_id: str) -> AllocationSession:
+        with self._lock:
+            self._expire()
+            session = self._sessions[session_id]
+            session.last_used = time.time()
+            return session
+
+    def remove(self, session_id: str):
+        with self._lock:
+            del self._sessions[session_id]
+
+
+allocation_sessions = AllocationSessionStore()
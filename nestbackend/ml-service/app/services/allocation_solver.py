@@ -0,0 +1,188 @@
+import heapq
+import numpy as np
+from scipy import sparse
+from scipy.sparse.csgraph import min_weight_full_bipartite_matching
+from typing import Callable, Dict, List, Optional
+
+# Every real edge costs UNASSIGNED_COST - score and every student also gets a
+# private "unassigned" column at UNASSIGNED_COST, so a full matching always
+# exists and minimising total cost maximises the total allocated score.
+UNASSIGNED_COST = 2.0
+
+
+class AllocationEdges:
+    def __init__(
+        self,
+        student_index: np.ndarray,
+        internship_index: np.ndarray,
+        scores: np.ndarray,
+        num_students: int,
+        remaining_capacity: np.ndarray,
+        priorities: Optional[np.ndarray] = None
+    ):
+        self.student_index = student_index
+        self.internship_index = internship_index
+        self.scores = scores
+        self.priorities = scores if priorities is None else priorities
+        self.num_students = num_students
+        self.remaining_capacity = np.maximum(remaining_capacity, 0)
+
+    def __len__(self) -> int:
+        return len(self.scores)
+
+
+def greedy_allocation(edges: AllocationEdges) -> np.ndarray:
+    # Taking edges in descending score order is the same choice the legacy
+    # loop makes when it rescans every unallocated student for the best
+    # remaining pair, without the O(S^2 * I) rescans.
+    assigned = np.full(edges.num_students, -1, dtype=np.int64)
+    remaining = edges.remaining_capacity.copy()
+    unallocated = edges.num_students
+
+    order = np.lexsort((edges.internship_index, edges.student_index, -edges.scores))
+    for student, internship in zip(edges.student_index[order], edges.internship_index[order]):
+        if assigned[student] < 0 and remaining[internship] > 0:
+            assigned[student] = internship
+            remaining[internship] -= 1
+            unallocated -= 1
+            if not unallocated:
+                break
+
+    return assigned
+
+
+def assignment_allocation(edges: AllocationEdges) -> np.ndarray:
+    assigned = np.full(edges.num_students, -1, dtype=np.int64)
+    if not len(edges):
+        return assigned
+
+    # Expand each internship into one column per seat it can actually fill.
+    indegree = np.bincount(edges.internship_index, minlength=len(edges.remaining_capacity))
+    seats = np.minimum(edges.remaining_capacity, indegree)
+    seat_offsets = np.concatenate([[0], np.cumsum(seats)])
+    total_seats = int(seat_offsets[-1])
+
+    keep = seats[edges.internship_index] > 0
+    students = edges.student_index[keep]
+    internships = edges.internship_index[keep]
+    costs = UNASSIGNED_COST - edges.scores[keep]
+
+    repeats = seats[internships]
+    seat_within = np.arange(repeats.sum()) - np.repeat(np.cumsum(repeats) - repeats, repeats)
+    rows = np.concatenate([np.repeat(students, repeats), np.arange(edges.num_students)])
+    cols = np.concatenate([
+        np.repeat(seat_offsets[internships], repeats) + seat_within,
+        total_seats + np.arange(edges.num_students)
+    ])
+    weights = np.concatenate([
+        np.repeat(costs, repeats),
+        np.full(edges.num_students, UNASSIGNED_COST)
+    ])
+
+    graph = sparse.csr_matrix(
+        (weights, (rows, cols)),
+        shape=(edges.num_students, total_seats + edges.num_students)
+    )
+    matched_rows, matched_cols = min_weight_full_bipartite_matching(graph)
+
+    seated = matched_cols < total_seats
+    assigned[matched_rows[seated]] = (
+        np.searchsorted(seat_offsets, matched_cols[seated], side="right") - 1
+    )
+    return assigned
+
+
+def deferred_acceptance_allocation(edges: AllocationEdges) -> np.ndarray:
+    # Student-proposing deferred acceptance over truncated preference lists.
+    # Students rank internships by overall score; internships rank proposers
+    # by priority, with the lower student index winning exact ties.
+    assigned = np.full(edges.num_students, -1, dtype=np.int64)
+    order = np.lexsort((edges.internship_index, -edges.scores, edges.student_index))
+    proposal_internships = edges.internship_index[order].tolist()
+    proposal_priorities = edges.priorities[order].tolist()
+    starts = np.searchsorted(edges.student_index[order], np.arange(edges.num_students + 1))
+
+    next_proposal = starts[:-1].tolist()
+    last_proposal = starts[1:].tolist()
+    capacity = edges.remaining_capacity.tolist()
+    holders: List[list] = [[] for _ in capacity]
+
+    free = [s for s in range(edges.num_students - 1, -1, -1) if next_proposal[s] < last_proposal[s]]
+    while free:
+        student = free.pop()
+        while next_proposal[student] < last_proposal[student]:
+            proposal = next_proposal[student]
+            next_proposal[student] += 1
+            internship = proposal_internships[proposal]
+            if not capacity[internship]:
+                continue
+
+            key = (proposal_priorities[proposal], -student)
+            held = holders[internship]
+            if len(held) < capacity[internship]:
+                heapq.heappush(held, key)
+                assigned[student] = internship
+                break
+            if key > held[0]:
+                _, displaced = heapq.heapreplace(held, key)
+                assigned[-displaced] = -1
+                assigned[student] = internship
+                free.append(-displaced)
+                break
+
+    return assigned
+
+
+def count_blocking_pairs(edges: AllocationEdges, assigned: np.ndarray) -> int:
+    # A pair blocks when the student prefers the internship to its current
+    # allocation and the internship has a free seat or holds someone it
+    # ranks lower, using the same tie-breaks as deferred acceptance.
+    num_internships = len(edges.remaining_capacity)
+    current = assigned[edges.student_index]
+    is_current = edges.internship_index == current
+
+    current_scores = np.full(edges.num_students, -np.inf)
+    current_scores[edges.student_index[is_current]] = edges.scores[is_current]
+    own_score = current_scores[edges.student_index]
+    own_internship = np.where(current >= 0, current, num_internships)
+    prefers = (edges.scores > own_score) | (
+        (edges.scores == own_score) & (edges.internship_index < own_internship)
+    )
+
+    held = np.bincount(assigned[assigned >= 0], minlength=num_internships)
+    worst_priority = np.full(num_internships, np.inf)
+    worst_student = np.full(num_internships, -1)
+    if is_current.any():
+        holder_internships = edges.internship_index[is_current]
+        holder_priorities = edges.priorities[is_current]
+        holder_students = edges.student_index[is_current]
+        worst = np.lexsort((-holder_students, holder_priorities))
+        internships, first = np.unique(holder_internships[worst], return_index=True)
+        worst_priority[internships] = holder_priorities[worst][first]
+        worst_student[internships] = holder_students[worst][first]
+
+    target = edges.internship_index
+    free_seat = held[target] < edges.remaining_capacity[target]
+    outranks = (edges.priorities > worst_priority[target]) | (
+        (edges.priorities == worst_priority[target])
+        & (edges.student_index < worst_student[target])
+    )
+    return int((prefers & ~is_current & (free_seat | outranks)).sum())
+
+
+SOLVERS: Dict[str, Callable[[AllocationEdges], np.ndarray]] = {
+    "greedy": greedy_allocation,
+    "assignment": assignment_allocation,
+    "deferred_acceptance": deferred_acceptance_allocation
+}
+
+
+def allocation_score(edges: AllocationEdges, assigned: np.ndarray) -> float:
+    num_internships = len(edges.remaining_capacity)
+    edge_keys = edges.student_index * num_internships + edges.internship_index
+    order = np.argsort(edge_keys)
+
+    students = np.flatnonzero(assigned >= 0)
+    keys = students * num_internships + assigned[students]
+    positions = order[np.searchsorted(edge_keys, keys, sorter=order)]
+    return float(edges.scores[positions].sum())
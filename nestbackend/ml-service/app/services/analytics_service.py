@@ -3,6 +3,7 @@ from collections import defaultdict
 import numpy as np
 
 from app.models.schemas import MatchResult, AnalyticsResponse
+from app.services.score_matrix import LOCATION_SCORES, SECTOR_SCORES
 
 class AnalyticsService:
     @staticmethod
@@ -44,11 +45,15 @@ class AnalyticsService:
                         if factor != "No diversity factors":
                             diversity_dist[factor] += 1
                 
-                if 'sector' in match.explanation:
-                    sector_dist[match.explanation['sector']] += 1
+                # Runs without explanations still carry the component scores,
+                # which map one-to-one onto the sector and location labels.
+                sector = match.explanation.get('sector') or SECTOR_SCORES.get(match.sector_score)
+                if sector:
+                    sector_dist[sector] += 1
                 
-                if 'location' in match.explanation:
-                    location_dist[match.explanation['location']] += 1
+                location = match.explanation.get('location') or LOCATION_SCORES.get(match.location_score)
+                if location:
+                    location_dist[location] += 1
         
         return AnalyticsResponse(
             total_students=total_students,
@@ -0,0 +1,278 @@
+import io
+import numpy as np
+from itertools import compress
+from typing import TYPE_CHECKING, List, NamedTuple, Optional, Tuple
+
+from app.models.schemas import (
+    InternshipOpportunity, QualificationLevel, SocialCategory, DistrictType
+)
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+# pandas is imported when the first upload is read.
+if TYPE_CHECKING:
+    import pandas as pd
+
+LIST_SEPARATOR = "|"
+REPORT_SAMPLE_ROWS = 20
+
+CSV_TYPES = ("text/csv", "application/csv")
+PARQUET_TYPES = ("application/vnd.apache.parquet", "application/x-parquet")
+ARROW_TYPES = ("application/vnd.apache.arrow.file", "application/vnd.apache.arrow.stream")
+
+
+class UploadError(Exception):
+    status_code = 422
+
+
+class UnsupportedUpload(UploadError):
+    status_code = 415
+
+
+class StudentRow(NamedTuple):
+    # Plain stand-in for StudentProfile with the same attributes. Rows are
+    # only built once their columns have passed validation, so the engine
+    # can score them without pydantic checking every field again.
+    student_id: str
+    name: str
+    skills: List[str]
+    qualification: QualificationLevel
+    field_of_study: str
+    cgpa: float
+    location_preference: List[str]
+    sector_interests: List[str]
+    social_category: SocialCategory
+    district_type: DistrictType
+    past_internships: int
+    languages: List[str]
+    certifications: List[str]
+
+
+def upload_format(filename: Optional[str], content_type: Optional[str]) -> str:
+    name = (filename or "").lower()
+    content_type = (content_type or "").split(";")[0].strip().lower()
+    if name.endswith(".csv") or content_type in CSV_TYPES:
+        return "csv"
+    if name.endswith((".parquet", ".pq")) or content_type in PARQUET_TYPES:
+        return "parquet"
+    if name.endswith((".arrow", ".feather", ".ipc")) or content_type in ARROW_TYPES:
+        return "arrow"
+    raise UnsupportedUpload(
+        f"Cannot tell the format of {filename or 'upload'} ({content_type or 'no content type'}); "
+        f"send a .csv, .parquet or .arrow file"
+    )
+
+
+def read_table(data: bytes, fmt: str) -> "pd.DataFrame":
+    import pandas as pd
+    
+    if fmt == "csv":
+        # Everything is read as text so IDs keep their leading zeros; numeric
+        # columns are converted during validation.
+        return pd.read_csv(io.BytesIO(data), dtype=str, keep_default_na=False, na_values=[""])
+    if pa is None:
+        raise UnsupportedUpload(f"pyarrow is required to read {fmt} uploads")
+    if fmt == "parquet":
+        return pq.read_table(pa.BufferReader(data)).to_pandas()
+    try:
+        table = pa.ipc.open_file(pa.BufferReader(data)).read_all()
+    except pa.ArrowInvalid:
+        table = pa.ipc.open_stream(pa.BufferReader(data)).read_all()
+    return table.to_pandas()
+
+
+def load_upload(data: bytes, filename: Optional[str], content_type: Optional[str], loader) -> tuple:
+    fmt = upload_format(filename, content_type)
+    try:
+        frame = read_table(data, fmt)
+    except UploadError:
+        raise
+    except Exception as e:
+        raise UploadError(f"Could not read {filename or 'upload'} as {fmt}: {str(e)}")
+    return loader(frame)
+
+
+class ColumnValidator:
+    # Checks whole columns at a time and records which rows failed which
+    # check. The report groups failures by column and message, with a
+    # sample of row numbers (0-based, header excluded) for each group.
+
+    def __init__(self, frame: "pd.DataFrame", required: List[str]):
+        missing = [c for c in required if c not in frame.columns]
+        if missing:
+            raise UploadError(f"Missing required columns: {', '.join(missing)}")
+        self.frame = frame.reset_index(drop=True)
+        self.invalid = np.zeros(len(frame), dtype=bool)
+        self.errors: List[dict] = []
+
+    def fail(self, column: str, mask, message: str):
+        mask = np.asarray(mask, dtype=bool)
+        count = int(mask.sum())
+        if not count:
+            return
+        self.invalid |= mask
+        self.errors.append({
+            "column": column,
+            "error": message,
+            "count": count,
+            "rows": np.flatnonzero(mask)[:REPORT_SAMPLE_ROWS].tolist()
+        })
+
+    def column(self, name: str) -> "pd.Series":
+        import pandas as pd
+        
+        if name in self.frame.columns:
+            return self.frame[name]
+        return pd.Series([None] * len(self.frame), dtype=object)
+
+    def text(self, name: str) -> "pd.Series":
+        values = self.column(name)
+        missing = values.isna().to_numpy()
+        self.fail(name, missing, "Field required")
+        return values.where(~missing, "").astype(str)
+
+    def number(
+        self,
+        name: str,
+        minimum: Optional[float] = None,
+        maximum: Optional[float] = None,
+        default: Optional[float] = None,
+        integer: bool = False
+    ) -> np.ndarray:
+        import pandas as pd
+        
+        raw = self.column(name)
+        values = pd.to_numeric(raw, errors="coerce").to_numpy(dtype=np.float64)
+        absent = raw.isna().to_numpy()
+        if default is not None:
+            values[absent] = default
+        else:
+            self.fail(name, absent, "Field required")
+        self.fail(name, np.isnan(values) & ~absent, "Input should be a valid number")
+        with np.errstate(invalid="ignore"):
+            if integer:
+                self.fail(name, np.isfinite(values) & (values % 1 != 0), "Input should be a valid integer")
+            if minimum is not None:
+                self.fail(name, values < minimum, f"Input should be greater than or equal to {minimum:g}")
+            if maximum is not None:
+                self.fail(name, values > maximum, f"Input should be less than or equal to {maximum:g}")
+        return values
+
+    def choice(self, name: str, enum) -> "pd.Series":
+        values = self.column(name)
+        members = enum._value2member_map_
+        self.fail(name, values.isna().to_numpy(), "Field required")
+        unknown = values.notna() & ~values.isin(list(members))
+        self.fail(
+            name, unknown.to_numpy(),
+            f"Input should be one of: {', '.join(members)}"
+        )
+        return values.map(members)
+
+    def items(self, name: str, min_items: int = 0, non_empty: bool = False) -> List[List[str]]:
+        # CSV cells hold LIST_SEPARATOR-joined items; Parquet and Arrow
+        # uploads may carry native list columns instead.
+        values = self.column(name)
+        present = values.notna().to_numpy()
+        lists = [
+            (
+                [item.strip() for item in cell.split(LIST_SEPARATOR)] if isinstance(cell, str)
+                else [str(item).strip() for item in cell]
+            ) if keep else []
+            for cell, keep in zip(values.tolist(), present)
+        ]
+        counts = np.fromiter(map(len, lists), dtype=np.int64, count=len(lists))
+        if min_items:
+            self.fail(name, counts < min_items, f"List should have at least {min_items} item after validation")
+        if non_empty:
+            blank = np.fromiter(("" in items for items in lists), dtype=bool, count=len(lists))
+            self.fail(name, blank & (counts >= min_items), "List items cannot be empty strings")
+        return lists
+
+    def report(self) -> dict:
+        return {
+            "total_rows": len(self.frame),
+            "valid_rows": int((~self.invalid).sum()),
+            "invalid_rows": int(self.invalid.sum()),
+            "errors": self.errors
+        }
+
+
+def load_students(frame: "pd.DataFrame") -> Tuple[List[StudentRow], dict]:
+    check = ColumnValidator(frame, [
+        "student_id", "name", "skills", "qualification", "field_of_study", "cgpa",
+        "location_preference", "sector_interests", "social_category", "district_type"
+    ])
+    columns = (
+        check.text("student_id"),
+        check.text("name"),
+        check.items("skills", min_items=1, non_empty=True),
+        check.choice("qualification", QualificationLevel),
+        check.text("field_of_study"),
+        check.number("cgpa", minimum=0.0, maximum=10.0),
+        check.items("location_preference", min_items=1, non_empty=True),
+        check.items("sector_interests", min_items=1, non_empty=True),
+        check.choice("social_category", SocialCategory),
+        check.choice("district_type", DistrictType),
+        check.number("past_internships", minimum=0, default=0, integer=True),
+        check.items("languages"),
+        check.items("certifications")
+    )
+    columns = [
+        values if isinstance(values, list) else values.tolist()
+        for values in columns
+    ]
+    columns[10] = [int(value) for value in columns[10]]
+    students = list(map(StudentRow._make, compress(zip(*columns), ~check.invalid)))
+    return students, check.report()
+
+
+def load_internships(frame: "pd.DataFrame") -> Tuple[List[InternshipOpportunity], dict]:
+    check = ColumnValidator(frame, [
+        "internship_id", "company_name", "title", "description", "required_skills",
+        "preferred_qualification", "sector", "location", "duration_months", "capacity"
+    ])
+    ids = check.text("internship_id")
+    company_names = check.text("company_name")
+    titles = check.text("title")
+    descriptions = check.text("description")
+    required_skills = check.items("required_skills", min_items=1)
+    qualifications = check.choice("preferred_qualification", QualificationLevel)
+    sectors = check.text("sector")
+    locations = check.text("location")
+    stipends = check.number("stipend", default=np.nan)
+    durations = check.number("duration_months", minimum=1, maximum=12, integer=True)
+    capacities = check.number("capacity", minimum=1, integer=True)
+    filled = check.number("filled_positions", minimum=0, default=0, integer=True)
+    with np.errstate(invalid="ignore"):
+        check.fail("filled_positions", filled > capacities, "Filled positions cannot exceed capacity")
+    min_cgpa = check.number("min_cgpa", minimum=0.0, maximum=10.0, default=0.0)
+    preferred_fields = check.items("preferred_fields")
+
+    # Validated column by column above, so the models are constructed
+    # without running the field validators per row.
+    internships = [
+        InternshipOpportunity.model_construct(
+            internship_id=ids[row],
+            company_name=company_names[row],
+            title=titles[row],
+            description=descriptions[row],
+            required_skills=required_skills[row],
+            preferred_qualification=qualifications[row],
+            sector=sectors[row],
+            location=locations[row],
+            stipend=None if np.isnan(stipends[row]) else float(stipends[row]),
+            duration_months=int(durations[row]),
+            capacity=int(capacities[row]),
+            filled_positions=int(filled[row]),
+            min_cgpa=float(min_cgpa[row]),
+            preferred_fields=preferred_fields[row]
+        )
+        for row in np.flatnonzero(~check.invalid)
+    ]
+    return internships, check.report()
@@ -0,0 +1,65 @@
+import numpy as np
+from loguru import logger
+from typing import Optional, Tuple
+
+from app.core.config import settings
+
+try:
+    import faiss
+except ImportError:
+    faiss = None
+
+
+class CandidateRetriever:
+    def __init__(self, embeddings: np.ndarray, index_type: Optional[str] = None):
+        self.index_type = index_type or settings.RETRIEVAL_INDEX
+        self.size, self.dimension = embeddings.shape
+        self.embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+        self.index = None
+
+        if faiss is None:
+            logger.warning("faiss is not installed, falling back to exhaustive NumPy search")
+            self.index_type = "numpy"
+        elif self.size:
+            self.index = self._build_index()
+
+    def _build_index(self):
+        if self.index_type == "flat":
+            index = faiss.IndexFlatIP(self.dimension)
+        elif self.index_type == "ivf":
+            nlist = max(1, min(settings.RETRIEVAL_IVF_NLIST, self.size // 39))
+            quantizer = faiss.IndexFlatIP(self.dimension)
+            index = faiss.IndexIVFFlat(quantizer, self.dimension, nlist, faiss.METRIC_INNER_PRODUCT)
+            index.train(self.embeddings)
+            index.nprobe = min(settings.RETRIEVAL_IVF_NPROBE, nlist)
+        elif self.index_type == "hnsw":
+            index = faiss.IndexHNSWFlat(
+                self.dimension, settings.RETRIEVAL_HNSW_M, faiss.METRIC_INNER_PRODUCT
+            )
+            index.hnsw.efConstruction = settings.RETRIEVAL_HNSW_EF_CONSTRUCTION
+            index.hnsw.efSearch = settings.RETRIEVAL_HNSW_EF_SEARCH
+        else:
+            raise ValueError(f"Unknown retrieval index type: {self.index_type}")
+
+        index.add(self.embeddings)
+        logger.info(f"Built {self.index_type} retrieval index over {self.size} internships")
+        return index
+
+    def search(self, queries: np.ndarray, depth: int) -> Tuple[np.ndarray, np.ndarray]:
+        depth = min(depth, self.size)
+        queries = np.ascontiguousarray(queries, dtype=np.float32)
+        if depth == 0:
+            empty = np.empty((len(queries), 0))
+            return empty, empty.astype(np.int64)
+
+        if self.index is None:
+            similarity = queries @ self.embeddings.T
+            indices = np.argpartition(-similarity, depth - 1, axis=1)[:, :depth]
+            return np.take_along_axis(similarity, indices, axis=1), indices
+
+        params = None
+        if self.index_type == "hnsw":
+            params = faiss.SearchParametersHNSW(
+                efSearch=max(settings.RETRIEVAL_HNSW_EF_SEARCH, depth)
+            )
+        return self.index.search(queries, depth, params=params)
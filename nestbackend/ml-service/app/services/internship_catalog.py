@@ -0,0 +1,178 @@
+import copy
+import threading
+import numpy as np
+from loguru import logger
+from typing import Dict, List, Optional
+
+from app.models.schemas import InternshipOpportunity
+from app.core.model_manager import ModelManager, model_manager
+from app.services.score_matrix import InternshipFeatures
+
+
+class CatalogVersionMismatch(Exception):
+    pass
+
+
+class UnknownInternships(KeyError):
+    pass
+
+
+class InternshipCatalog:
+    def __init__(self, model_manager: ModelManager):
+        self.model_manager = model_manager
+        self.version = 0
+        self.revision = 0
+        self._internships: Dict[str, InternshipOpportunity] = {}
+        self._embeddings: Dict[str, np.ndarray] = {}
+        self._features: Optional[InternshipFeatures] = None
+        self._index: Dict[str, int] = {}
+        self._lock = threading.RLock()
+        self._write_lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._internships)
+
+    def upsert(self, internships: List[InternshipOpportunity]) -> dict:
+        # Upserts are serialised, but skills are encoded outside `_lock`, so
+        # reads and capacity updates are not held up behind the encoder. An
+        # internship removed while encoding is picked up on the next pass.
+        with self._write_lock:
+            embeddings = {}
+            while True:
+                with self._lock:
+                    to_embed = [
+                        internship for internship in internships
+                        if internship.internship_id not in embeddings and (
+                            internship.internship_id not in self._internships
+                            or self._internships[internship.internship_id].required_skills
+                            != internship.required_skills
+                        )
+                    ]
+                    if not to_embed:
+                        return self._apply(internships, embeddings)
+                encoded = self.model_manager.encode_skill_lists([i.required_skills for i in to_embed])
+                embeddings.update(zip((i.internship_id for i in to_embed), encoded))
+
+    def _apply(self, internships: List[InternshipOpportunity], embeddings: Dict[str, np.ndarray]) -> dict:
+        inserted, updated = 0, 0
+        for internship in internships:
+            if internship.internship_id in self._internships:
+                updated += 1
+            else:
+                inserted += 1
+            self._internships[internship.internship_id] = internship
+        self._embeddings.update(embeddings)
+
+        self._invalidate()
+        logger.info(
+            f"Catalog v{self.version}: {inserted} inserted, {updated} updated, "
+            f"{len(embeddings)} re-embedded"
+        )
+        return {
+            "version": self.version,
+            "inserted": inserted,
+            "updated": updated,
+            "reembedded": len(embeddings),
+            "total_internships": len(self._internships)
+        }
+
+    def remove(self, internship_id: str):
+        with self._lock:
+            if internship_id not in self._internships:
+                raise UnknownInternships([internship_id])
+            del self._internships[internship_id]
+            del self._embeddings[internship_id]
+            self._invalidate()
+
+    def update_capacity(
+        self,
+        internship_id: str,
+        filled_positions: Optional[int] = None,
+        capacity: Optional[int] = None
+    ) -> InternshipOpportunity:
+        with self._lock:
+            existing = self._internships.get(internship_id)
+            if existing is None:
+                raise UnknownInternships([internship_id])
+
+            changes = {}
+            if capacity is not None:
+                changes["capacity"] = capacity
+            if filled_positions is not None:
+                changes["filled_positions"] = filled_positions
+            updated = existing.model_copy(update=changes)
+            if updated.filled_positions > updated.capacity:
+                raise ValueError("Filled positions cannot exceed capacity")
+
+            self._internships[internship_id] = updated
+            self.revision += 1
+
+            if self._features is not None:
+                # Copy-on-write so a match already running on the previous
+                # snapshot keeps a consistent view of capacity.
+                index = self._index[internship_id]
+                features = copy.copy(self._features)
+                features.capacity = features.capacity.copy()
+                features.filled_positions = features.filled_positions.copy()
+                features.internships = list(features.internships)
+                features.capacity[index] = updated.capacity
+                features.filled_positions[index] = updated.filled_positions
+                features.internships[index] = updated
+                features._fingerprint = None
+                self._features = features
+
+            return updated
+
+    def get(self, internship_id: str) -> InternshipOpportunity:
+        with self._lock:
+            if internship_id not in self._internships:
+                raise UnknownInternships([internship_id])
+            return self._internships[internship_id]
+
+    def features(
+        self,
+        version: Optional[int] = None,
+        internship_ids: Optional[List[str]] = None
+    ) -> InternshipFeatures:
+        with self._lock:
+            if version is not None and version != self.version:
+                raise CatalogVersionMismatch(
+                    f"Requested catalog version {version}, current version is {self.version}"
+                )
+
+            if self._features is None:
+                internships = list(self._internships.values())
+                embeddings = (
+                    np.array([self._embeddings[i.internship_id] for i in internships])
+                    if internships else np.empty((0, 0))
+                )
+                self._features = InternshipFeatures(internships, embeddings)
+                self._index = {id_: i for i, id_ in enumerate(self._features.ids)}
+
+            if internship_ids is None:
+                return self._features
+
+            unknown = [id_ for id_ in internship_ids if id_ not in self._index]
+            if unknown:
+                raise UnknownInternships(unknown)
+            return self._features.subset([self._index[id_] for id_ in internship_ids])
+
+    def info(self) -> dict:
+        with self._lock:
+            return {
+                "version": self.version,
+                "revision": self.revision,
+                "total_internships": len(self._internships),
+                "total_remaining_capacity": sum(
+                    i.capacity - i.filled_positions for i in self._internships.values()
+                )
+            }
+
+    def _invalidate(self):
+        self.version += 1
+        self.revision += 1
+        self._features = None
+        self._index = {}
+
+
+internship_catalog = InternshipCatalog(model_manager)
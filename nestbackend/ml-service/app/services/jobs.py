@@ -0,0 +1,517 @@
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from loguru import logger
+from typing import Any, Dict, List, Optional
+
+from app.models.schemas import StudentProfile, InternshipOpportunity, MatchResult
+from app.core.config import settings
+from app.core.executor import matching_executor
+from app.core.model_manager import ModelManager, model_manager
+from app.core.metrics import track
+from app.services.allocation_solver import AllocationEdges
+from app.services.matching_engine import MatchingEngine
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+try:
+    from celery import Celery
+except ImportError:
+    Celery = None
+
+UNFINISHED_STATUSES = ("queued", "running")
+
+
+class JobNotFound(KeyError):
+    pass
+
+
+class FileJobStore:
+    # One directory per job: job.json for status, request.json for the
+    # inputs, one file per finished chunk and result.json for allocations.
+    # Every write goes through a temporary file and os.replace, so a crash
+    # never leaves a half-written checkpoint behind.
+
+    def __init__(self, root: Path):
+        self.root = root
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def _path(self, job_id: str) -> Path:
+        return self.root / job_id
+
+    def _write(self, path: Path, payload: Any):
+        tmp_path = path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(payload))
+        os.replace(tmp_path, path)
+
+    def _read(self, path: Path, job_id: str) -> Any:
+        try:
+            return json.loads(path.read_text())
+        except FileNotFoundError:
+            raise JobNotFound(job_id)
+
+    def create(self, job: dict, request: dict):
+        path = self._path(job["job_id"])
+        (path / "chunks").mkdir(parents=True)
+        self._write(path / "request.json", request)
+        self._write(path / "job.json", job)
+
+    def exists(self, job_id: str) -> bool:
+        return (self._path(job_id) / "job.json").exists()
+
+    def get(self, job_id: str) -> dict:
+        return self._read(self._path(job_id) / "job.json", job_id)
+
+    def update(self, job_id: str, **fields) -> dict:
+        with self._lock:
+            job = self.get(job_id)
+            job.update(fields)
+            self._write(self._path(job_id) / "job.json", job)
+            return job
+
+    def load_request(self, job_id: str) -> dict:
+        return self._read(self._path(job_id) / "request.json", job_id)
+
+    def save_chunk(self, job_id: str, index: int, payload: Any):
+        self._write(self._path(job_id) / "chunks" / f"{index:06d}.json", payload)
+
+    def chunk_indices(self, job_id: str) -> List[int]:
+        return sorted(int(p.stem) for p in (self._path(job_id) / "chunks").glob("*.json"))
+
+    def load_chunk(self, job_id: str, index: int) -> Any:
+        return self._read(self._path(job_id) / "chunks" / f"{index:06d}.json", job_id)
+
+    def save_result(self, job_id: str, payload: Any):
+        self._write(self._path(job_id) / "result.json", payload)
+
+    def load_result(self, job_id: str) -> Any:
+        return self._read(self._path(job_id) / "result.json", job_id)
+
+    def job_ids(self) -> List[str]:
+        return [p.name for p in self.root.iterdir() if (p / "job.json").exists()]
+
+    def delete(self, job_id: str):
+        if not self.exists(job_id):
+            raise JobNotFound(job_id)
+        shutil.rmtree(self._path(job_id))
+
+
+class RedisJobStore:
+    # Same layout as FileJobStore under ml:job:<id> keys, so API replicas and
+    # Celery workers on other hosts share checkpoints.
+
+    def __init__(self, client):
+        self.client = client
+
+    def _key(self, job_id: str, *parts: str) -> str:
+        return ":".join(["ml:job", job_id, *parts])
+
+    def _read(self, key: str, job_id: str) -> Any:
+        value = self.client.get(key)
+        if value is None:
+            raise JobNotFound(job_id)
+        return json.loads(value)
+
+    def create(self, job: dict, request: dict):
+        job_id = job["job_id"]
+        pipeline = self.client.pipeline()
+        pipeline.set(self._key(job_id, "request"), json.dumps(request))
+        pipeline.set(self._key(job_id), json.dumps(job))
+        pipeline.sadd("ml:jobs", job_id)
+        pipeline.execute()
+
+    def exists(self, job_id: str) -> bool:
+        return bool(self.client.exists(self._key(job_id)))
+
+    def get(self, job_id: str) -> dict:
+        return self._read(self._key(job_id), job_id)
+
+    def update(self, job_id: str, **fields) -> dict:
+        key = self._key(job_id)
+        with self.client.pipeline() as pipeline:
+            while True:
+                try:
+                    pipeline.watch(key)
+                    value = pipeline.get(key)
+                    if value is None:
+                        raise JobNotFound(job_id)
+                    job = {**json.loads(value), **fields}
+                    pipeline.multi()
+                    pipeline.set(key, json.dumps(job))
+                    pipeline.execute()
+                    return job
+                except redis.WatchError:
+                    continue
+
+    def load_request(self, job_id: str) -> dict:
+        return self._read(self._key(job_id, "request"), job_id)
+
+    def save_chunk(self, job_id: str, index: int, payload: Any):
+        pipeline = self.client.pipeline()
+        pipeline.set(self._key(job_id, "chunk", str(index)), json.dumps(payload))
+        pipeline.sadd(self._key(job_id, "chunks"), index)
+        pipeline.execute()
+
+    def chunk_indices(self, job_id: str) -> List[int]:
+        return sorted(int(i) for i in self.client.smembers(self._key(job_id, "chunks")))
+
+    def load_chunk(self, job_id: str, index: int) -> Any:
+        return self._read(self._key(job_id, "chunk", str(index)), job_id)
+
+    def save_result(self, job_id: str, payload: Any):
+        self.client.set(self._key(job_id, "result"), json.dumps(payload))
+
+    def load_result(self, job_id: str) -> Any:
+        return self._read(self._key(job_id, "result"), job_id)
+
+    def job_ids(self) -> List[str]:
+        return [i.decode() if isinstance(i, bytes) else i for i in self.client.smembers("ml:jobs")]
+
+    def delete(self, job_id: str):
+        if not self.exists(job_id):
+            raise JobNotFound(job_id)
+        keys = [self._key(job_id), self._key(job_id, "request"), self._key(job_id, "chunks"),
+                self._key(job_id, "result")]
+        keys += [self._key(job_id, "chunk", str(i)) for i in self.chunk_indices(job_id)]
+        pipeline = self.client.pipeline()
+        pipeline.delete(*keys)
+        pipeline.srem("ml:jobs", job_id)
+        pipeline.execute()
+
+
+def create_celery_app():
+    if Celery is None:
+        raise RuntimeError("JOB_BACKEND=celery requires the celery package")
+    broker_url = settings.CELERY_BROKER_URL or (
+        f"redis://{settings.REDIS_HOST}:{settings.REDIS_PORT}/{settings.REDIS_DB}"
+    )
+    app = Celery("ml_service", broker=broker_url)
+    # Acknowledge only after the task returns, so a job whose worker dies is
+    # redelivered and resumes from its last checkpoint.
+    app.conf.update(
+        task_acks_late=True,
+        task_reject_on_worker_lost=True,
+        worker_prefetch_multiplier=1
+    )
+    return app
+
+
+class JobManager:
+    def __init__(self, model_manager: ModelManager, backend: Optional[str] = None):
+        self.model_manager = model_manager
+        self.backend = backend or settings.JOB_BACKEND
+        self._store = None
+        self._runner: Optional[ThreadPoolExecutor] = None
+        self._celery = None
+        self._running: Dict[str, bool] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def store(self):
+        if self._store is None:
+            if self.backend == "local":
+                self._store = FileJobStore(Path(settings.JOB_DIR))
+            elif self.backend == "celery":
+                if redis is None:
+                    raise RuntimeError("JOB_BACKEND=celery requires the redis package")
+                self._store = RedisJobStore(redis.Redis(
+                    host=settings.REDIS_HOST, port=settings.REDIS_PORT, db=settings.REDIS_DB
+                ))
+            else:
+                raise ValueError(f"Unknown job backend: {self.backend}")
+        return self._store
+
+    @property
+    def celery(self):
+        if self._celery is None:
+            self._celery = create_celery_app()
+        return self._celery
+
+    def submit(self, kind: str, request: dict, total_students: int) -> dict:
+        job = {
+            "job_id": uuid.uuid4().hex,
+            "kind": kind,
+            "status": "queued",
+            "total_students": total_students,
+            "processed_students": 0,
+            "chunk_size": settings.SCORING_CHUNK_SIZE,
+            "created_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+            "run_started_at": None,
+            "run_start_processed": 0,
+            "scoring_seconds": 0.0,
+            "error": None
+        }
+        self.store.create(job, request)
+        self._dispatch(job["job_id"])
+        logger.info(f"Queued {kind} job {job['job_id']} for {total_students} students")
+        return job
+
+    def _dispatch(self, job_id: str):
+        if self.backend == "celery":
+            self.celery.send_task("jobs.run", args=[job_id])
+            return
+        with self._lock:
+            if self._running.get(job_id):
+                return
+            self._running[job_id] = True
+            if self._runner is None:
+                self._runner = ThreadPoolExecutor(
+                    max_workers=settings.JOB_WORKERS, thread_name_prefix="jobs"
+                )
+        self._runner.submit(self._run_local, job_id)
+
+    def _run_local(self, job_id: str):
+        try:
+            self.run(job_id)
+        finally:
+            with self._lock:
+                self._running.pop(job_id, None)
+
+    def resume(self):
+        # Called on startup of a single-node install: anything a previous
+        # process left queued or running picks up from its last chunk.
+        if self.backend != "local":
+            return
+        for job_id in self.store.job_ids():
+            try:
+                if self.store.get(job_id)["status"] in UNFINISHED_STATUSES:
+                    logger.info(f"Resuming job {job_id}")
+                    self._dispatch(job_id)
+            except JobNotFound:
+                continue
+
+    def shutdown(self):
+        if self._runner is not None:
+            self._runner.shutdown(wait=False, cancel_futures=True)
+            self._runner = None
+
+    def run(self, job_id: str):
+        job = self.store.get(job_id)
+        if job["status"] not in UNFINISHED_STATUSES:
+            return
+
+        try:
+            request = self.store.load_request(job_id)
+            students = [StudentProfile(**s) for s in request["students"]]
+            internships = [InternshipOpportunity(**i) for i in request["internships"]]
+            engine = MatchingEngine(self.model_manager)
+            internship_features = engine.score_matrix.build_internship_features(internships)
+
+            chunk_size = job["chunk_size"]
+            done = set(self.store.chunk_indices(job_id))
+            processed = sum(
+                min(chunk_size, len(students) - index * chunk_size) for index in done
+            )
+            now = time.time()
+            job = self.store.update(
+                job_id,
+                status="running",
+                started_at=job["started_at"] or now,
+                run_started_at=now,
+                run_start_processed=processed,
+                processed_students=processed
+            )
+            if done:
+                logger.info(f"Job {job_id} resuming with {len(done)} chunks already done")
+
+            for index, start in enumerate(range(0, len(students), chunk_size)):
+                if index in done:
+                    continue
+                if not self.store.exists(job_id):
+                    logger.info(f"Job {job_id} was deleted, stopping")
+                    return
+                chunk = students[start:start + chunk_size]
+                chunk_start = time.perf_counter()
+                with track(f"job:{job['kind']}", len(chunk)):
+                    if job["kind"] == "match":
+                        payload = matching_executor.run_blocking(
+                            self._match_chunk, engine, chunk, internships, internship_features, request
+                        )
+                    else:
+                        payload = matching_executor.run_blocking(
+                            self._edges_chunk, engine, chunk, start, internships, internship_features, request
+                        )
+                self.store.save_chunk(job_id, index, payload)
+                processed += len(chunk)
+                job = self.store.update(
+                    job_id,
+                    processed_students=processed,
+                    scoring_seconds=job["scoring_seconds"] + time.perf_counter() - chunk_start
+                )
+
+            if job["kind"] == "allocation":
+                with track("job:allocation:solve", len(students)):
+                    result = matching_executor.run_blocking(
+                        self._solve, job_id, engine, students, internship_features, request
+                    )
+                self.store.save_result(job_id, result)
+
+            self.store.update(job_id, status="completed", finished_at=time.time())
+            logger.info(f"Job {job_id} completed")
+
+        except JobNotFound:
+            logger.info(f"Job {job_id} was deleted, stopping")
+        except Exception as e:
+            logger.error(f"Job {job_id} failed: {str(e)}")
+            if self.store.exists(job_id):
+                self.store.update(job_id, status="failed", error=str(e), finished_at=time.time())
+
+    def _match_chunk(
+        self,
+        engine: MatchingEngine,
+        students: List[StudentProfile],
+        internships: List[InternshipOpportunity],
+        internship_features,
+        request: dict
+    ) -> List[dict]:
+        matches = engine.batch_match(
+            students=students,
+            internships=internships,
+            max_matches_per_student=request["max_matches_per_student"],
+            min_score=request["min_score_threshold"],
+            diversity_boost=request["diversity_boost"],
+            internship_features=internship_features,
+            candidate_depth=request.get("candidate_depth"),
+            explain=request.get("include_explanations", True)
+        )
+        return [
+            MatchResult(
+                student_id=student.student_id,
+                student_name=student.name,
+                matches=matches.get(student.student_id, []),
+                total_matches=len(matches.get(student.student_id, []))
+            ).model_dump(mode="json")
+            for student in students
+        ]
+
+    def _edges_chunk(
+        self,
+        engine: MatchingEngine,
+        students: List[StudentProfile],
+        offset: int,
+        internships: List[InternshipOpportunity],
+        internship_features,
+        request: dict
+    ) -> dict:
+        _, edges = engine.score_matrix.top_k_edges(
+            students,
+            internships,
+            k=request.get("top_k") or settings.ALLOCATION_TOP_K,
+            min_score=0.0,
+            diversity_boost=request["diversity_boost"],
+            internship_features=internship_features,
+            candidate_depth=request.get("candidate_depth") or engine.score_matrix.default_candidate_depth()
+        )
+        return {
+            "student_index": (edges.student_index + offset).tolist(),
+            "internship_index": edges.internship_index.tolist(),
+            "scores": edges.scores.tolist(),
+            "priorities": edges.priorities.tolist()
+        }
+
+    def _solve(
+        self,
+        job_id: str,
+        engine: MatchingEngine,
+        students: List[StudentProfile],
+        internship_features,
+        request: dict
+    ) -> dict:
+        chunks = [self.store.load_chunk(job_id, i) for i in self.store.chunk_indices(job_id)]
+
+        def concat(name: str, dtype) -> np.ndarray:
+            return np.array([v for chunk in chunks for v in chunk[name]], dtype=dtype)
+
+        edges = AllocationEdges(
+            concat("student_index", np.int64),
+            concat("internship_index", np.int64),
+            concat("scores", np.float64),
+            len(students),
+            internship_features.remaining_capacity(),
+            priorities=concat("priorities", np.float64)
+        )
+        response = engine.solve_edges(
+            students,
+            internship_features,
+            edges,
+            request.get("solver") or settings.ALLOCATION_SOLVER,
+            scoring_time=self.store.get(job_id)["scoring_seconds"]
+        )
+        return response.model_dump(mode="json")
+
+    def status(self, job_id: str) -> dict:
+        job = self.store.get(job_id)
+        remaining = job["total_students"] - job["processed_students"]
+        eta_seconds = None
+        processed_this_run = job["processed_students"] - job["run_start_processed"]
+        if job["status"] == "running" and processed_this_run > 0:
+            elapsed = time.time() - job["run_started_at"]
+            eta_seconds = round(elapsed / processed_this_run * remaining, 1)
+        elif job["status"] == "completed":
+            eta_seconds = 0.0
+        return {
+            **job,
+            "progress": (
+                round(job["processed_students"] / job["total_students"] * 100, 2)
+                if job["total_students"] else 100.0
+            ),
+            "eta_seconds": eta_seconds
+        }
+
+    def results(self, job_id: str, offset: int, limit: int) -> dict:
+        job = self.store.get(job_id)
+        page = {
+            "job_id": job_id,
+            "kind": job["kind"],
+            "status": job["status"],
+            "offset": offset,
+            "limit": limit,
+            "total": job["total_students"]
+        }
+
+        if job["kind"] == "match":
+            # Completed chunks are readable while the job is still running.
+            chunk_size = job["chunk_size"]
+            done = set(self.store.chunk_indices(job_id))
+            results = []
+            position = offset
+            while len(results) < limit and position < job["total_students"]:
+                index = position // chunk_size
+                if index not in done:
+                    break
+                chunk = self.store.load_chunk(job_id, index)
+                skip = position - index * chunk_size
+                taken = chunk[skip:skip + limit - len(results)]
+                results.extend(taken)
+                position += len(taken)
+            page["results"] = results
+            return page
+
+        if job["status"] != "completed":
+            page["allocation"] = {}
+            return page
+        result = self.store.load_result(job_id)
+        allocation = list(result.pop("allocation").items())
+        result.pop("comparison", None)
+        page["total"] = len(allocation)
+        page["allocation"] = dict(allocation[offset:offset + limit])
+        page["summary"] = result
+        return page
+
+    def delete(self, job_id: str):
+        self.store.delete(job_id)
+
+
+job_manager = JobManager(model_manager)
@@ -0,0 +1,111 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Callable, List, Optional, Tuple
+
+from app.models.schemas import StudentProfile, InternshipOpportunity
+from app.core.config import settings
+from app.services.score_matrix import ComponentSnapshot, InternshipFeatures
+
+
+class MatchRun:
+    def __init__(
+        self,
+        students: List[StudentProfile],
+        internships: List[InternshipOpportunity],
+        internship_features: Optional[InternshipFeatures],
+        diversity_boost: bool
+    ):
+        self.students = {s.student_id: s for s in students}
+        self.internships = internships
+        self.internship_features = internship_features
+        self.diversity_boost = diversity_boost
+        self.created_at = time.time()
+        self.size = len(students) + (len(internships) if internship_features is None else 0)
+
+
+class AllocationRun:
+    def __init__(
+        self,
+        students: List[StudentProfile],
+        internship_features: InternshipFeatures,
+        snapshot: ComponentSnapshot,
+        weights: Tuple[float, ...],
+        solver: str,
+        top_k: int
+    ):
+        self.students = students
+        self.internship_features = internship_features
+        self.snapshot = snapshot
+        self.weights = weights
+        self.solver = solver
+        self.top_k = top_k
+        self.created_at = time.time()
+
+
+class RunStore:
+    # Keeps the most recent runs whose total size, one per run unless
+    # `size` says otherwise, fits in `capacity`. A run larger than the whole
+    # store is not kept.
+
+    def __init__(self, capacity: int, size: Callable[[object], int] = lambda run: 1):
+        self.capacity = capacity
+        self.size = size
+        self.total = 0
+        self._runs: "OrderedDict[str, Tuple[object, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, run) -> Optional[str]:
+        size = self.size(run)
+        if size > self.capacity:
+            return None
+
+        run_id = uuid.uuid4().hex
+        with self._lock:
+            self._runs[run_id] = run, size
+            self.total += size
+            while self.total > self.capacity:
+                _, (_, evicted) = self._runs.popitem(last=False)
+                self.total -= evicted
+        return run_id
+
+    def get(self, run_id: str):
+        with self._lock:
+            run, _ = self._runs.get(run_id, (None, 0))
+            return run
+
+
+class MatchRunStore(RunStore):
+    # Remembers the inputs of runs that deferred their explanations, so a
+    # single pair can be explained after the fact. Bounded by the profiles
+    # held: each run's students, plus its internships unless they came
+    # from the catalog, whose feature snapshot is shared.
+
+    def __init__(self, max_profiles: int):
+        super().__init__(max_profiles, size=lambda run: run.size)
+
+    def record(
+        self,
+        students: List[StudentProfile],
+        internships: List[InternshipOpportunity],
+        internship_features: Optional[InternshipFeatures] = None,
+        diversity_boost: bool = True
+    ) -> Optional[str]:
+        if self.capacity <= 0:
+            return None
+        return self.add(MatchRun(students, internships, internship_features, diversity_boost))
+
+
+# /single runs have their own store, so steady single traffic cannot evict
+# batch runs.
+match_run_store = MatchRunStore(settings.MATCH_RUN_MAX_PROFILES)
+single_run_store = MatchRunStore(settings.SINGLE_RUN_MAX_PROFILES)
+
+
+def find_match_run(run_id: str) -> Optional[MatchRun]:
+    return match_run_store.get(run_id) or single_run_store.get(run_id)
+
+# Component snapshots are large, so only the last few allocation runs that
+# asked for them are kept for what-if re-ranking.
+allocation_run_store = RunStore(settings.WHAT_IF_RUNS)
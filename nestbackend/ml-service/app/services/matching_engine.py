@@ -1,43 +1,60 @@
+import heapq
+import time
 import numpy as np
-from typing import List, Dict, Tuple
+from typing import Iterator, List, Dict, Tuple, Optional
 from loguru import logger
-from sklearn.metrics.pairwise import cosine_similarity
 from collections import defaultdict
 
 from app.models.schemas import (
-    StudentProfile, InternshipOpportunity, MatchScore,
-    QualificationLevel, SocialCategory, DistrictType
+    StudentProfile, InternshipOpportunity, MatchScore, AllocationResponse, AllocationSummary,
+    QualificationLevel, SocialCategory, DistrictType, ScoringWeights, AllocationDiff,
+    WhatIfScenario, WhatIfResponse
 )
 from app.core.config import settings
 from app.core.model_manager import ModelManager
+from app.core.metrics import count_pairs, stage
+from app.services.allocation_solver import (
+    SOLVERS, AllocationEdges, allocation_score, count_blocking_pairs
+)
+from app.services.score_matrix import (
+    PRUNING_MARGIN, QUALIFICATION_HIERARCHY, ComponentSnapshot, InternshipFeatures,
+    ScoreMatrixEngine, diversity_factors, pruning_stats
+)
+from app.services.sharded_matching import ShardedScoreMatrix
+from app.services.match_runs import AllocationRun, allocation_run_store
+
+WEIGHT_NAMES = ("skill", "qualification", "location", "sector", "diversity")
 
 class MatchingEngine:
     def __init__(self, model_manager: ModelManager):
         self.model_manager = model_manager
-        self.qualification_hierarchy = {
-            QualificationLevel.DIPLOMA: 1,
-            QualificationLevel.UNDERGRADUATE: 2,
-            QualificationLevel.POSTGRADUATE: 3,
-            QualificationLevel.DOCTORATE: 4
-        }
+        self.qualification_hierarchy = QUALIFICATION_HIERARCHY
+        self.score_matrix = ScoreMatrixEngine(model_manager)
+        self.sharded_matrix = ShardedScoreMatrix(self.score_matrix)
         
     def calculate_skill_score(
         self, 
         student_skills: List[str], 
-        required_skills: List[str]
+        required_skills: List[str],
+        explain: bool = True
     ) -> Tuple[float, str]:
+        # Only this per-pair path needs sklearn, so it is imported here.
+        from sklearn.metrics.pairwise import cosine_similarity
+        
         try:
             student_embeddings = self.model_manager.encode_skills(student_skills)
             required_embeddings = self.model_manager.encode_skills(required_skills)
             
             similarity = cosine_similarity(student_embeddings, required_embeddings)[0][0]
             
-            skill_overlap = set(s.lower() for s in student_skills) & set(r.lower() for r in required_skills)
-            overlap_ratio = len(skill_overlap) / len(required_skills) if required_skills else 0
+            overlap_ratio = self.skill_overlap_ratio(student_skills, required_skills)
             
             final_score = (similarity * 0.7) + (overlap_ratio * 0.3)
             
-            explanation = f"Semantic similarity: {similarity:.2f}, Direct overlap: {overlap_ratio:.2f}"
+            explanation = (
+                f"Semantic similarity: {similarity:.2f}, Direct overlap: {overlap_ratio:.2f}"
+                if explain else ""
+            )
             
             return min(final_score, 1.0), explanation
             
@@ -45,12 +62,21 @@ class MatchingEngine:
             logger.error(f"Error calculating skill score: {str(e)}")
             return 0.0, "Error in calculation"
     
+    def skill_overlap_ratio(
+        self,
+        student_skills: List[str],
+        required_skills: List[str]
+    ) -> float:
+        skill_overlap = set(s.lower() for s in student_skills) & set(r.lower() for r in required_skills)
+        return len(skill_overlap) / len(required_skills) if required_skills else 0
+    
     def calculate_qualification_score(
         self,
         student_qual: QualificationLevel,
         required_qual: QualificationLevel,
         student_cgpa: float,
-        min_cgpa: float
+        min_cgpa: float,
+        explain: bool = True
     ) -> Tuple[float, str]:
         student_level = self.qualification_hierarchy[student_qual]
         required_level = self.qualification_hierarchy[required_qual]
@@ -69,7 +95,10 @@ class MatchingEngine:
         
         final_score = (qual_score * 0.6) + (cgpa_score * 0.4)
         
-        explanation = f"Qualification match: {qual_score:.2f}, CGPA score: {cgpa_score:.2f}"
+        explanation = (
+            f"Qualification match: {qual_score:.2f}, CGPA score: {cgpa_score:.2f}"
+            if explain else ""
+        )
         
         return final_score, explanation
     
@@ -117,70 +146,119 @@ class MatchingEngine:
         self,
         student: StudentProfile,
         internship: InternshipOpportunity,
-        diversity_boost: bool
+        diversity_boost: bool,
+        explain: bool = True
     ) -> Tuple[float, str]:
         if not diversity_boost:
             return 0.5, "Diversity boost disabled"
         
         score = 0.5
-        factors = []
         
         if student.social_category in [SocialCategory.SC, SocialCategory.ST, SocialCategory.OBC]:
             score += 0.2
-            factors.append(f"Social category: {student.social_category.value}")
         
         if student.district_type in [DistrictType.RURAL, DistrictType.ASPIRATIONAL]:
             score += 0.2
-            factors.append(f"District type: {student.district_type.value}")
         
         if student.past_internships == 0:
             score += 0.1
-            factors.append("First-time applicant")
         
+        if not explain:
+            return min(score, 1.0), ""
+        factors = diversity_factors(student)
         explanation = ", ".join(factors) if factors else "No diversity factors"
         
         return min(score, 1.0), explanation
     
+    def calculate_categorical_scores(
+        self,
+        student: StudentProfile,
+        internship: InternshipOpportunity,
+        diversity_boost: bool = True,
+        explain: bool = True
+    ) -> Dict[str, Tuple[float, str]]:
+        return {
+            "qualification": self.calculate_qualification_score(
+                student.qualification,
+                internship.preferred_qualification,
+                student.cgpa,
+                internship.min_cgpa,
+                explain
+            ),
+            "location": self.calculate_location_score(
+                student.location_preference,
+                internship.location
+            ),
+            "sector": self.calculate_sector_score(
+                student.sector_interests,
+                internship.sector
+            ),
+            "diversity": self.calculate_diversity_score(
+                student,
+                internship,
+                diversity_boost,
+                explain
+            )
+        }
+    
+    def weighted_score(
+        self,
+        skill_score: float,
+        qual_score: float,
+        location_score: float,
+        sector_score: float,
+        diversity_score: float
+    ) -> float:
+        return (
+            skill_score * settings.SKILL_WEIGHT +
+            qual_score * settings.QUALIFICATION_WEIGHT +
+            location_score * settings.LOCATION_WEIGHT +
+            sector_score * settings.SECTOR_WEIGHT +
+            diversity_score * settings.DIVERSITY_WEIGHT
+        )
+    
+    def score_upper_bound(
+        self,
+        student: StudentProfile,
+        internship: InternshipOpportunity,
+        categorical: Dict[str, Tuple[float, str]]
+    ) -> float:
+        # The categorical components are exact; the embedding similarity is
+        # at most 1, which caps the skill score at 0.7 + 0.3 * overlap.
+        overlap_ratio = self.skill_overlap_ratio(student.skills, internship.required_skills)
+        return self.weighted_score(
+            min(0.7 + overlap_ratio * 0.3, 1.0),
+            categorical["qualification"][0],
+            categorical["location"][0],
+            categorical["sector"][0],
+            categorical["diversity"][0]
+        )
+    
     def calculate_match_score(
         self,
         student: StudentProfile,
         internship: InternshipOpportunity,
-        diversity_boost: bool = True
+        diversity_boost: bool = True,
+        categorical: Optional[Dict[str, Tuple[float, str]]] = None,
+        explain: bool = True
     ) -> MatchScore:
+        if categorical is None:
+            categorical = self.calculate_categorical_scores(
+                student, internship, diversity_boost, explain
+            )
+        
         skill_score, skill_exp = self.calculate_skill_score(
             student.skills, 
-            internship.required_skills
-        )
-        
-        qual_score, qual_exp = self.calculate_qualification_score(
-            student.qualification,
-            internship.preferred_qualification,
-            student.cgpa,
-            internship.min_cgpa
-        )
-        
-        location_score, loc_exp = self.calculate_location_score(
-            student.location_preference,
-            internship.location
-        )
-        
-        sector_score, sector_exp = self.calculate_sector_score(
-            student.sector_interests,
-            internship.sector
-        )
-        
-        diversity_score, div_exp = self.calculate_diversity_score(
-            student,
-            internship,
-            diversity_boost
+            internship.required_skills,
+            explain
         )
+        qual_score, qual_exp = categorical["qualification"]
+        location_score, loc_exp = categorical["location"]
+        sector_score, sector_exp = categorical["sector"]
+        diversity_score, div_exp = categorical["diversity"]
         
-        overall_score = (
-            skill_score * settings.SKILL_WEIGHT +
-            qual_score * settings.QUALIFICATION_WEIGHT +
-            location_score * settings.LOCATION_WEIGHT +
-            sector_score * settings.SECTOR_WEIGHT +
-            diversity_score * settings.DIVERSITY_WEIGHT
+        overall_score = self.weighted_score(
+            skill_score, qual_score, location_score, sector_score, diversity_score
         )
         
         return MatchScore(
@@ -198,7 +276,7 @@ class MatchingEngine:
                 "location": loc_exp,
                 "sector": sector_exp,
                 "diversity": div_exp
-            }
+            } if explain else {}
         )
     
     def match_student_to_internships(
@@ -207,8 +285,23 @@ class MatchingEngine:
         internships: List[InternshipOpportunity],
         max_matches: int = 10,
         min_score: float = 0.5,
-        diversity_boost: bool = True
+        diversity_boost: bool = True,
+        internship_features: Optional[InternshipFeatures] = None,
+        candidate_depth: Optional[int] = None,
+        explain: bool = True
     ) -> List[MatchScore]:
+        if internship_features is not None or candidate_depth is not None or settings.CANDIDATE_RETRIEVAL:
+            return self.score_matrix.match(
+                [student],
+                internships,
+                max_matches=max_matches,
+                min_score=min_score,
+                diversity_boost=diversity_boost,
+                internship_features=internship_features,
+                candidate_depth=candidate_depth or self.score_matrix.default_candidate_depth(),
+                explain=explain
+            )[student.student_id]
+        
         available_internships = [
             i for i in internships 
             if i.filled_positions < i.capacity
@@ -218,15 +311,114 @@ class MatchingEngine:
             logger.warning(f"No available internships for student {student.student_id}")
             return []
         
-        matches = []
-        for internship in available_internships:
-            match_score = self.calculate_match_score(student, internship, diversity_boost)
-            if match_score.overall_score >= min_score:
-                matches.append(match_score)
-        
-        matches.sort(key=lambda x: x.overall_score, reverse=True)
-        
-        return matches[:max_matches]
+        count_pairs(len(available_internships))
+        with stage("score"):
+            if settings.SCORE_PRUNING:
+                matches = self._pruned_matches(
+                    student, available_internships, max_matches, min_score, diversity_boost
+                )
+            else:
+                matches = []
+                for internship in available_internships:
+                    match_score = self.calculate_match_score(
+                        student, internship, diversity_boost, explain=False
+                    )
+                    if match_score.overall_score >= min_score:
+                        matches.append(match_score)
+                
+                matches.sort(key=lambda x: x.overall_score, reverse=True)
+                matches = matches[:max_matches]
+        
+        if explain:
+            # The per-pair path keeps no component scores, so the returned
+            # pairs are rescored; timed apart from ranking.
+            with stage("explain"):
+                matches = self.explain_matches(student, available_internships, matches, diversity_boost)
+        return matches
+    
+    def explain_matches(
+        self,
+        student: StudentProfile,
+        internships: List[InternshipOpportunity],
+        matches: List[MatchScore],
+        diversity_boost: bool = True
+    ) -> List[MatchScore]:
+        # Pairs are ranked without explanations; only the ones actually
+        # returned get their text built.
+        by_id = {i.internship_id: i for i in internships}
+        return [
+            self.calculate_match_score(student, by_id[m.internship_id], diversity_boost)
+            for m in matches
+        ]
+    
+    def explain_match(
+        self,
+        student: StudentProfile,
+        internships: List[InternshipOpportunity],
+        internship_id: str,
+        diversity_boost: bool = True,
+        internship_features: Optional[InternshipFeatures] = None
+    ) -> Optional[MatchScore]:
+        if internship_features is None:
+            internships = [i for i in internships if i.internship_id == internship_id][:1]
+            if not internships:
+                return None
+            internship_features = self.score_matrix.build_internship_features(internships)
+        if internship_id not in internship_features.ids:
+            return None
+        return self.score_matrix.explain_pair(
+            student,
+            internship_features,
+            internship_features.ids.index(internship_id),
+            diversity_boost
+        )
+    
+    def _pruned_matches(
+        self,
+        student: StudentProfile,
+        internships: List[InternshipOpportunity],
+        max_matches: int,
+        min_score: float,
+        diversity_boost: bool
+    ) -> List[MatchScore]:
+        candidates = []
+        for index, internship in enumerate(internships):
+            categorical = self.calculate_categorical_scores(
+                student, internship, diversity_boost, explain=False
+            )
+            bound = self.score_upper_bound(student, internship, categorical)
+            if bound >= min_score - PRUNING_MARGIN:
+                candidates.append((-bound, index, internship, categorical))
+        candidates.sort(key=lambda c: c[:2])
+        
+        # Min-heap of the best matches so far, keyed like the final ranking:
+        # higher score first, earlier internship on ties. Candidates arrive in
+        # descending bound order, so once the heap is full and the next bound
+        # falls below its minimum nothing left can enter it.
+        top_matches = []
+        top_k_pruned = 0
+        for position, (negative_bound, index, internship, categorical) in enumerate(candidates):
+            if len(top_matches) == max_matches and -negative_bound < top_matches[0][0] - PRUNING_MARGIN:
+                top_k_pruned = len(candidates) - position
+                break
+            
+            match_score = self.calculate_match_score(
+                student, internship, diversity_boost, categorical, explain=False
+            )
+            if match_score.overall_score < min_score:
+                continue
+            entry = (match_score.overall_score, -index, match_score)
+            if len(top_matches) < max_matches:
+                heapq.heappush(top_matches, entry)
+            elif entry[:2] > top_matches[0][:2]:
+                heapq.heapreplace(top_matches, entry)
+        
+        pruning_stats.record(
+            len(internships),
+            bound_pruned=len(internships) - len(candidates),
+            top_k_pruned=top_k_pruned
+        )
+        return [entry[2] for entry in sorted(top_matches, key=lambda e: (-e[0], -e[1]))]
     
     def batch_match(
         self,
@@ -234,9 +426,61 @@ class MatchingEngine:
         internships: List[InternshipOpportunity],
         max_matches_per_student: int = 10,
         min_score: float = 0.5,
-        diversity_boost: bool = True
+        diversity_boost: bool = True,
+        scoring_mode: Optional[str] = None,
+        internship_features: Optional[InternshipFeatures] = None,
+        candidate_depth: Optional[int] = None,
+        explain: bool = True
     ) -> Dict[str, List[MatchScore]]:
-        results = {}
+        return {
+            student.student_id: matches
+            for student, matches in self.iter_batch_match(
+                students,
+                internships,
+                max_matches_per_student,
+                min_score,
+                diversity_boost,
+                scoring_mode=scoring_mode,
+                internship_features=internship_features,
+                candidate_depth=candidate_depth,
+                explain=explain
+            )
+        }
+    
+    def iter_batch_match(
+        self,
+        students: List[StudentProfile],
+        internships: List[InternshipOpportunity],
+        max_matches_per_student: int = 10,
+        min_score: float = 0.5,
+        diversity_boost: bool = True,
+        scoring_mode: Optional[str] = None,
+        internship_features: Optional[InternshipFeatures] = None,
+        candidate_depth: Optional[int] = None,
+        explain: bool = True
+    ) -> Iterator[Tuple[StudentProfile, List[MatchScore]]]:
+        scoring_mode = scoring_mode or settings.SCORING_MODE
+        if scoring_mode in ("vectorized", "tiled"):
+            candidate_depth = candidate_depth or self.score_matrix.default_candidate_depth()
+            if self.sharded_matrix.enabled(len(students), candidate_depth):
+                score_matrix = self.sharded_matrix
+            else:
+                score_matrix = self.score_matrix
+            for chunk in score_matrix.iter_match(
+                students,
+                internships,
+                max_matches=max_matches_per_student,
+                min_score=min_score,
+                diversity_boost=diversity_boost,
+                internship_features=internship_features,
+                candidate_depth=candidate_depth,
+                tiled=scoring_mode == "tiled",
+                explain=explain
+            ):
+                for student, matches in chunk:
+                    logger.info(f"Student {student.student_id}: {len(matches)} matches found")
+                    yield student, matches
+            return
         
         for student in students:
             matches = self.match_student_to_internships(
@@ -244,34 +488,288 @@ class MatchingEngine:
                 internships,
                 max_matches_per_student,
                 min_score,
-                diversity_boost
+                diversity_boost,
+                explain=explain
             )
-            results[student.student_id] = matches
             
             logger.info(
                 f"Student {student.student_id}: {len(matches)} matches found"
             )
-        
-        return results
+            yield student, matches
     
     def optimize_allocation(
         self,
         students: List[StudentProfile],
         internships: List[InternshipOpportunity],
-        diversity_boost: bool = True
+        diversity_boost: bool = True,
+        internship_features: Optional[InternshipFeatures] = None,
+        solver: Optional[str] = None
     ) -> Dict[str, str]:
-        all_matches = {}
-        for student in students:
-            matches = self.match_student_to_internships(
-                student,
+        return self.allocate(
+            students,
+            internships,
+            diversity_boost=diversity_boost,
+            internship_features=internship_features,
+            solver=solver
+        ).allocation
+    
+    def allocate(
+        self,
+        students: List[StudentProfile],
+        internships: List[InternshipOpportunity],
+        diversity_boost: bool = True,
+        internship_features: Optional[InternshipFeatures] = None,
+        solver: Optional[str] = None,
+        top_k: Optional[int] = None,
+        candidate_depth: Optional[int] = None,
+        keep_components: bool = False
+    ) -> AllocationResponse:
+        solver = solver or settings.ALLOCATION_SOLVER
+        top_k = top_k or settings.ALLOCATION_TOP_K
+        start_time = time.perf_counter()
+        
+        if solver == "legacy":
+            all_matches = self.batch_match(
+                students,
                 internships,
-                max_matches=len(internships),
+                max_matches_per_student=len(internships),
                 min_score=0.0,
-                diversity_boost=diversity_boost
+                diversity_boost=diversity_boost,
+                internship_features=internship_features,
+                candidate_depth=candidate_depth,
+                explain=False
+            )
+            solve_start = time.perf_counter()
+            with stage("solve"):
+                allocation, total_score = self._legacy_greedy_allocation(
+                    students, internships, all_matches
+                )
+            return self._allocation_response(
+                students,
+                solver,
+                allocation,
+                total_score,
+                scoring_time=solve_start - start_time,
+                solve_time=time.perf_counter() - solve_start,
+                blocking_pairs=None
             )
-            all_matches[student.student_id] = matches
         
+        if solver not in SOLVERS:
+            raise ValueError(f"Unknown allocation solver: {solver}")
+        
+        if keep_components:
+            # Snapshots need every pair, so the run is scored exhaustively
+            # in this process.
+            if internship_features is None:
+                internship_features = self.score_matrix.build_internship_features(internships)
+            snapshot = ComponentSnapshot(len(students), internship_features)
+            features, edges = self.score_matrix.top_k_edges(
+                students,
+                internships,
+                k=top_k,
+                min_score=0.0,
+                diversity_boost=diversity_boost,
+                internship_features=internship_features,
+                keep_components=snapshot
+            )
+            response = self.solve_edges(
+                students, features, edges, solver, scoring_time=time.perf_counter() - start_time
+            )
+            response.run_id = allocation_run_store.add(AllocationRun(
+                students, features, snapshot, self.current_weights(), solver, top_k
+            ))
+            logger.info(f"Kept {snapshot.nbytes / 1e6:.1f} MB of component scores as run {response.run_id}")
+            return response
+        
+        candidate_depth = candidate_depth or self.score_matrix.default_candidate_depth()
+        if self.sharded_matrix.enabled(len(students), candidate_depth):
+            score_matrix = self.sharded_matrix
+        else:
+            score_matrix = self.score_matrix
+        features, edges = score_matrix.top_k_edges(
+            students,
+            internships,
+            k=top_k,
+            min_score=0.0,
+            diversity_boost=diversity_boost,
+            internship_features=internship_features,
+            candidate_depth=candidate_depth
+        )
+        return self.solve_edges(
+            students, features, edges, solver, scoring_time=time.perf_counter() - start_time
+        )
+    
+    def current_weights(self) -> Tuple[float, ...]:
+        return (
+            settings.SKILL_WEIGHT,
+            settings.QUALIFICATION_WEIGHT,
+            settings.LOCATION_WEIGHT,
+            settings.SECTOR_WEIGHT,
+            settings.DIVERSITY_WEIGHT
+        )
+    
+    def what_if(
+        self,
+        run_id: str,
+        run: AllocationRun,
+        scenarios: List[ScoringWeights],
+        solver: Optional[str] = None,
+        top_k: Optional[int] = None,
+        include_allocation: bool = False
+    ) -> WhatIfResponse:
+        solver = solver or run.solver
+        top_k = top_k or run.top_k
+        remaining_capacity = run.internship_features.remaining_capacity()
+        
+        def evaluate(weights: Tuple[float, ...]) -> Tuple[AllocationResponse, np.ndarray]:
+            start_time = time.perf_counter()
+            edges, top_match = run.snapshot.rank(
+                weights, top_k, remaining_capacity, self.score_matrix.chunk_size
+            )
+            outcome = self.solve_edges(
+                run.students, run.internship_features, edges, solver,
+                scoring_time=time.perf_counter() - start_time
+            )
+            return outcome, top_match
+        
+        def scenario(
+            weights: Tuple[float, ...],
+            outcome: AllocationResponse,
+            diff: Optional[AllocationDiff] = None
+        ) -> WhatIfScenario:
+            return WhatIfScenario(
+                weights=ScoringWeights(**dict(zip(WEIGHT_NAMES, weights))),
+                summary=AllocationSummary(**outcome.model_dump(exclude={"allocation", "comparison", "run_id"})),
+                diff=diff,
+                allocation=outcome.allocation if include_allocation else None
+            )
+        
+        # The baseline is re-ranked from the same snapshot with the run's own
+        # weights, so it shares the solver and top_k of the scenarios.
+        baseline, baseline_top = evaluate(run.weights)
+        results = []
+        for weights in scenarios:
+            resolved = tuple(
+                run.weights[i] if value is None else value
+                for i, value in enumerate(getattr(weights, name) for name in WEIGHT_NAMES)
+            )
+            outcome, top_match = evaluate(resolved)
+            allocated_before = set(baseline.allocation)
+            allocated_after = set(outcome.allocation)
+            results.append(scenario(resolved, outcome, AllocationDiff(
+                students_changed=sum(
+                    baseline.allocation.get(s.student_id) != outcome.allocation.get(s.student_id)
+                    for s in run.students
+                ),
+                newly_allocated=len(allocated_after - allocated_before),
+                newly_unallocated=len(allocated_before - allocated_after),
+                top_match_changed=int((top_match != baseline_top).sum()),
+                allocation_rate_change=round(outcome.allocation_rate - baseline.allocation_rate, 2),
+                average_score_change=round(outcome.average_score - baseline.average_score, 4)
+            )))
+        
+        return WhatIfResponse(
+            run_id=run_id,
+            baseline=scenario(run.weights, baseline),
+            scenarios=results
+        )
+    
+    def solve_edges(
+        self,
+        students: List[StudentProfile],
+        internship_features: InternshipFeatures,
+        edges: AllocationEdges,
+        solver: str,
+        scoring_time: float = 0.0
+    ) -> AllocationResponse:
+        with stage("solve"):
+            solve_start = time.perf_counter()
+            assigned = SOLVERS[solver](edges)
+            solve_time = time.perf_counter() - solve_start
+            allocation = {
+                students[student].student_id: internship_features.ids[internship]
+                for student, internship in enumerate(assigned.tolist())
+                if internship >= 0
+            }
+            return self._allocation_response(
+                students,
+                solver,
+                allocation,
+                allocation_score(edges, assigned),
+                scoring_time=scoring_time,
+                solve_time=solve_time,
+                blocking_pairs=count_blocking_pairs(edges, assigned)
+            )
+    
+    def _allocation_response(
+        self,
+        students: List[StudentProfile],
+        solver: str,
+        allocation: Dict[str, str],
+        total_score: float,
+        scoring_time: float,
+        solve_time: float,
+        blocking_pairs: Optional[int]
+    ) -> AllocationResponse:
+        logger.info(
+            f"Allocated {len(allocation)} out of {len(students)} students "
+            f"with {solver} solver in {solve_time:.2f}s"
+        )
+        
+        return AllocationResponse(
+            solver=solver,
+            allocation=allocation,
+            total_allocated=len(allocation),
+            total_students=len(students),
+            allocation_rate=round(len(allocation) / len(students) * 100, 2) if students else 0,
+            total_score=round(total_score, 4),
+            average_score=round(total_score / len(allocation), 4) if allocation else 0.0,
+            scoring_time_seconds=round(scoring_time, 4),
+            solve_time_seconds=round(solve_time, 4),
+            blocking_pairs=blocking_pairs
+        )
+    
+    def compare_allocations(
+        self,
+        students: List[StudentProfile],
+        internships: List[InternshipOpportunity],
+        solvers: List[str],
+        diversity_boost: bool = True,
+        internship_features: Optional[InternshipFeatures] = None,
+        top_k: Optional[int] = None,
+        candidate_depth: Optional[int] = None,
+        keep_components: bool = False
+    ) -> AllocationResponse:
+        runs = {}
+        for solver in solvers:
+            if solver not in runs:
+                # Only the primary solver's run is kept for what-if re-ranking.
+                runs[solver] = self.allocate(
+                    students,
+                    internships,
+                    diversity_boost=diversity_boost,
+                    internship_features=internship_features,
+                    solver=solver,
+                    top_k=top_k,
+                    candidate_depth=candidate_depth,
+                    keep_components=keep_components and not runs
+                )
+        
+        response, *others = runs.values()
+        response.comparison = {
+            run.solver: AllocationSummary(**run.model_dump(exclude={"allocation", "comparison", "run_id"}))
+            for run in others
+        }
+        return response
+    
+    def _legacy_greedy_allocation(
+        self,
+        students: List[StudentProfile],
+        internships: List[InternshipOpportunity],
+        all_matches: Dict[str, List[MatchScore]]
+    ) -> Tuple[Dict[str, str], float]:
         allocation = {}
+        total_score = 0.0
         internship_capacity = {
             i.internship_id: i.capacity - i.filled_positions 
             for i in internships
@@ -299,9 +797,8 @@ class MatchingEngine:
             
             student_id, internship_id = best_match
             allocation[student_id] = internship_id
+            total_score += best_score
             internship_capacity[internship_id] -= 1
             unallocated_students.remove(student_id)
         
-        logger.info(f"Allocated {len(allocation)} out of {len(students)} students")
-        
-        return allocation
+        return allocation, total_score
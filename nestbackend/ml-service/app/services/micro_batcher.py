@@ -0,0 +1,168 @@
+import asyncio
+import time
+from loguru import logger
+from typing import Dict, List, Optional, Tuple
+
+from app.models.schemas import StudentProfile, InternshipOpportunity, MatchScore
+from app.core.config import settings
+from app.core.executor import matching_executor
+from app.core.metrics import track
+from app.services.score_matrix import InternshipFeatures, ScoreMatrixEngine
+
+
+def score_batch(
+    score_matrix: ScoreMatrixEngine,
+    students: List[StudentProfile],
+    internships: List[InternshipOpportunity],
+    internship_features: Optional[InternshipFeatures],
+    max_matches: int,
+    candidate_depth: Optional[int],
+    explain: bool = True
+) -> Tuple[List[List[MatchScore]], float]:
+    start = time.perf_counter()
+    results = [
+        matches
+        for chunk in score_matrix.iter_match(
+            students,
+            internships,
+            max_matches=max_matches,
+            min_score=0.0,
+            diversity_boost=True,
+            internship_features=internship_features,
+            candidate_depth=candidate_depth or score_matrix.default_candidate_depth(),
+            explain=explain
+        )
+        for _, matches in chunk
+    ]
+    return results, time.perf_counter() - start
+
+
+class PendingBatch:
+    def __init__(
+        self,
+        score_matrix: ScoreMatrixEngine,
+        internships: List[InternshipOpportunity],
+        internship_features: Optional[InternshipFeatures]
+    ):
+        self.score_matrix = score_matrix
+        self.internships = internships
+        self.internship_features = internship_features
+        self.students: List[StudentProfile] = []
+        self.futures: List[asyncio.Future] = []
+        self.created_at = time.perf_counter()
+        self.timer: Optional[asyncio.TimerHandle] = None
+
+
+class SingleMatchCoalescer:
+    # Concurrent /single requests for the same internships and parameters
+    # wait at most max_wait_ms for company, then share one batched skill
+    # encode and one matrix scoring pass. A batch that fills up is sent
+    # straight away, so no request ever waits longer than the budget.
+
+    def __init__(self, max_batch_size: Optional[int] = None, max_wait_ms: Optional[float] = None):
+        self.max_batch_size = max_batch_size or settings.MICRO_BATCH_SIZE
+        self.max_wait_ms = settings.MICRO_BATCH_WAIT_MS if max_wait_ms is None else max_wait_ms
+        self._pending: Dict[tuple, PendingBatch] = {}
+
+        self.requests = 0
+        self.batches = 0
+        self.largest_batch = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    async def match(
+        self,
+        score_matrix: ScoreMatrixEngine,
+        student: StudentProfile,
+        internships: List[InternshipOpportunity],
+        internship_features: Optional[InternshipFeatures],
+        fingerprint: str,
+        max_matches: int,
+        candidate_depth: Optional[int],
+        explain: bool = True
+    ) -> Tuple[List[MatchScore], float]:
+        key = (fingerprint, max_matches, candidate_depth, explain)
+        batch = self._pending.get(key)
+        # A busy event loop can run the timer late; a batch already past its
+        # budget goes out now rather than collecting more requests.
+        if batch is not None and time.perf_counter() - batch.created_at >= self.max_wait_ms / 1000:
+            self._flush(key)
+            batch = None
+        if batch is None:
+            batch = PendingBatch(score_matrix, internships, internship_features)
+            batch.timer = asyncio.get_running_loop().call_later(
+                self.max_wait_ms / 1000, self._flush, key
+            )
+            self._pending[key] = batch
+
+        future = asyncio.get_running_loop().create_future()
+        batch.students.append(student)
+        batch.futures.append(future)
+        self.requests += 1
+        if len(batch.students) >= self.max_batch_size:
+            self._flush(key)
+        return await future
+
+    def _flush(self, key: tuple):
+        batch = self._pending.pop(key, None)
+        if batch is None:
+            return
+        batch.timer.cancel()
+
+        waited = time.perf_counter() - batch.created_at
+        self.batches += 1
+        self.largest_batch = max(self.largest_batch, len(batch.students))
+        self.total_wait += waited
+        self.max_wait = max(self.max_wait, waited)
+        asyncio.ensure_future(self._run(batch, *key[1:]))
+
+    async def _run(
+        self,
+        batch: PendingBatch,
+        max_matches: int,
+        candidate_depth: Optional[int],
+        explain: bool
+    ):
+        try:
+            # Scored as one run, apart from the requests that joined it.
+            with track("single:coalesced", len(batch.students)):
+                results, compute_time = await matching_executor.run(
+                    score_batch,
+                    batch.score_matrix,
+                    batch.students,
+                    batch.internships,
+                    batch.internship_features,
+                    max_matches,
+                    candidate_depth,
+                    explain
+                )
+        except Exception as e:
+            logger.error(f"Error in coalesced single matching: {str(e)}")
+            for future in batch.futures:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        if len(batch.students) > 1:
+            logger.info(f"Scored {len(batch.students)} coalesced single requests in {compute_time:.3f}s")
+        # Callers that disconnected while waiting have cancelled futures.
+        share = compute_time / len(batch.students)
+        for future, matches in zip(batch.futures, results):
+            if not future.done():
+                future.set_result((matches, share))
+
+    def stats(self) -> dict:
+        return {
+            "enabled": settings.MICRO_BATCHING,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait_ms,
+            "requests": self.requests,
+            "batches": self.batches,
+            "avg_batch_size": round(self.requests / self.batches, 2) if self.batches else 0.0,
+            "largest_batch": self.largest_batch,
+            "avg_wait_ms": round(self.total_wait / self.batches * 1000, 3) if self.batches else 0.0,
+            "max_wait_ms_observed": round(self.max_wait * 1000, 3)
+        }
+
+
+single_match_coalescer = SingleMatchCoalescer()
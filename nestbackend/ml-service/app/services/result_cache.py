@@ -0,0 +1,262 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from loguru import logger
+from typing import Dict, List, Optional, Tuple
+
+from app.models.schemas import StudentProfile, MatchScore
+from app.core.config import settings
+from app.core.skill_encoders import skill_encoder_id
+
+try:
+    import redis
+    CONNECTION_ERRORS = (redis.ConnectionError, redis.TimeoutError)
+except ImportError:
+    redis = None
+    CONNECTION_ERRORS = ()
+
+REDIS_KEY_PREFIX = "ml:match:"
+# After a connection error the cache is bypassed for this long, so requests
+# do not each wait out the socket timeout while Redis is down.
+UNAVAILABLE_SECONDS = 30
+
+
+class MemoryResultBackend:
+    name = "memory"
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_many(self, keys: List[str]) -> List[Optional[str]]:
+        now = time.monotonic()
+        values = []
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is not None and entry[0] <= now:
+                    del self._entries[key]
+                    entry = None
+                if entry is None:
+                    values.append(None)
+                else:
+                    self._entries.move_to_end(key)
+                    values.append(entry[1])
+        return values
+
+    def set_many(self, items: Dict[str, str], ttl: int):
+        expires_at = time.monotonic() + ttl
+        with self._lock:
+            for key, value in items.items():
+                self._entries[key] = (expires_at, value)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class RedisResultBackend:
+    name = "redis"
+
+    def __init__(self, client):
+        self.client = client
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self.client.scan_iter(f"{REDIS_KEY_PREFIX}*", count=1000))
+
+    def get_many(self, keys: List[str]) -> List[Optional[str]]:
+        if not keys:
+            return []
+        return self.client.mget([REDIS_KEY_PREFIX + key for key in keys])
+
+    def set_many(self, items: Dict[str, str], ttl: int):
+        pipeline = self.client.pipeline(transaction=False)
+        for key, value in items.items():
+            pipeline.setex(REDIS_KEY_PREFIX + key, ttl, value)
+        pipeline.execute()
+
+    def clear(self):
+        keys = list(self.client.scan_iter(f"{REDIS_KEY_PREFIX}*", count=1000))
+        if keys:
+            self.client.delete(*keys)
+
+
+class MatchResultCache:
+    # Per-student match lists keyed by a hash of everything that can change
+    # them: the student profile, the exact internship data (capacity
+    # included), the scoring weights and model, and the request parameters.
+    # An edited or refilled internship hashes differently, so stale entries
+    # are never read again and simply age out through CACHE_TTL.
+
+    def __init__(
+        self,
+        backend: Optional[str] = None,
+        ttl: Optional[int] = None,
+        max_size: Optional[int] = None
+    ):
+        self.backend_name = backend or settings.RESULT_CACHE_BACKEND
+        self.ttl = settings.CACHE_TTL if ttl is None else ttl
+        self.max_size = max_size or settings.RESULT_CACHE_SIZE
+        self._backend = None
+        self._lock = threading.Lock()
+        self._unavailable_until = 0.0
+
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self.saved_seconds = 0.0
+        self.compute_seconds = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        return self.backend_name != "off" and self.ttl > 0
+
+    @property
+    def backend(self):
+        with self._lock:
+            if self._backend is None:
+                self._backend = self._create_backend()
+            return self._backend
+
+    def _create_backend(self):
+        if self.backend_name == "redis":
+            if redis is None:
+                logger.warning("redis package not installed, using in-memory result cache")
+                return MemoryResultBackend(self.max_size)
+            # Connects on first use; an unreachable Redis is handled per call.
+            client = redis.Redis(
+                host=settings.REDIS_HOST,
+                port=settings.REDIS_PORT,
+                db=settings.REDIS_DB,
+                socket_connect_timeout=1,
+                socket_timeout=1
+            )
+            logger.info(f"Caching match results in Redis at {settings.REDIS_HOST}:{settings.REDIS_PORT}")
+            return RedisResultBackend(client)
+        if self.backend_name == "memory":
+            return MemoryResultBackend(self.max_size)
+        raise ValueError(f"Unknown result cache backend: {self.backend_name}")
+
+    def available(self) -> bool:
+        return time.monotonic() >= self._unavailable_until
+
+    def _failed(self, action: str, e: Exception):
+        self.errors += 1
+        if isinstance(e, CONNECTION_ERRORS):
+            self._unavailable_until = time.monotonic() + UNAVAILABLE_SECONDS
+            logger.warning(
+                f"Result cache {action} failed, bypassing the cache for {UNAVAILABLE_SECONDS}s: {str(e)}"
+            )
+        else:
+            logger.warning(f"Result cache {action} failed: {str(e)}")
+
+    def context(self, internship_fingerprint: str, **params) -> str:
+        payload = {
+            "internships": internship_fingerprint,
+            "model": skill_encoder_id(),
+            "weights": [
+                settings.SKILL_WEIGHT,
+                settings.QUALIFICATION_WEIGHT,
+                settings.LOCATION_WEIGHT,
+                settings.SECTOR_WEIGHT,
+                settings.DIVERSITY_WEIGHT
+            ],
+            "scoring_mode": settings.SCORING_MODE,
+            "retrieval": [
+                settings.CANDIDATE_RETRIEVAL,
+                settings.RETRIEVAL_DEPTH,
+                settings.RETRIEVAL_INDEX
+            ],
+            "params": params
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+    def key(self, context: str, student: StudentProfile) -> str:
+        return hashlib.sha256(f"{context}:{student.model_dump_json()}".encode()).hexdigest()
+
+    def lookup(
+        self,
+        context: str,
+        students: List[StudentProfile]
+    ) -> List[Optional[List[MatchScore]]]:
+        if not self.enabled or not students:
+            return [None] * len(students)
+
+        values = [None] * len(students)
+        if self.available():
+            try:
+                values = self.backend.get_many([self.key(context, s) for s in students])
+            except Exception as e:
+                self._failed("lookup", e)
+
+        results = []
+        for value in values:
+            if value is None:
+                self.misses += 1
+                results.append(None)
+                continue
+            entry = json.loads(value)
+            self.hits += 1
+            self.saved_seconds += entry["compute_seconds"]
+            results.append([MatchScore(**m) for m in entry["matches"]])
+        return results
+
+    def store(
+        self,
+        context: str,
+        students: List[StudentProfile],
+        matches: Dict[str, List[MatchScore]],
+        compute_seconds: float
+    ):
+        if not self.enabled or not students:
+            return
+
+        # Batches are scored together, so each entry records its share of
+        # the batch time as the cost a later hit avoids.
+        per_student = compute_seconds / len(students)
+        self.compute_seconds += compute_seconds
+        if not self.available():
+            return
+        items = {
+            self.key(context, student): json.dumps({
+                "matches": [m.model_dump(mode="json") for m in matches.get(student.student_id, [])],
+                "compute_seconds": per_student
+            })
+            for student in students
+        }
+        try:
+            self.backend.set_many(items, self.ttl)
+        except Exception as e:
+            self._failed("store", e)
+
+    def clear(self):
+        self.backend.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        # Reads only what exists: stats never create the backend.
+        backend = self._backend.name if self._backend is not None else self.backend_name
+        return {
+            "enabled": self.enabled,
+            "backend": backend if self.enabled else "off",
+            "available": self.enabled and self.available(),
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "compute_seconds": round(self.compute_seconds, 3),
+            "saved_seconds": round(self.saved_seconds, 3)
+        }
+
+
+match_result_cache = MatchResultCache()
@@ -0,0 +1,1206 @@
+import copy
+import hashlib
+import threading
+import time
+import numpy as np
+from collections import deque
+from loguru import logger
+from scipy import sparse
+from typing import Deque, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from app.models.schemas import (
+    StudentProfile, InternshipOpportunity, MatchScore,
+    QualificationLevel, SocialCategory, DistrictType
+)
+from app.core.config import settings
+from app.core.memory import current_rss, peak_rss
+from app.core.metrics import count_pairs, stage
+from app.core.model_manager import ModelManager
+from app.services.candidate_retriever import CandidateRetriever
+from app.services.allocation_solver import AllocationEdges
+
+QUALIFICATION_HIERARCHY = {
+    QualificationLevel.DIPLOMA: 1,
+    QualificationLevel.UNDERGRADUATE: 2,
+    QualificationLevel.POSTGRADUATE: 3,
+    QualificationLevel.DOCTORATE: 4
+}
+
+DIVERSITY_CATEGORIES = (SocialCategory.SC, SocialCategory.ST, SocialCategory.OBC)
+DIVERSITY_DISTRICTS = (DistrictType.RURAL, DistrictType.ASPIRATIONAL)
+
+LOCATION_SCORES = {1.0: "Exact location match", 0.8: "Partial location match", 0.3: "No location match"}
+SECTOR_SCORES = {1.0: "Exact sector match", 0.7: "Partial sector match", 0.2: "No sector match"}
+LOCATION_VALUES = np.array(sorted(LOCATION_SCORES))
+SECTOR_VALUES = np.array(sorted(SECTOR_SCORES))
+
+# Scores are rounded to four decimals before thresholding, so a pair is only
+# pruned when its upper bound misses the cut-off by more than that.
+PRUNING_MARGIN = 1e-4
+
+# Measured peak for one float32 tile: the component arrays plus the
+# selection keys.
+TILE_BYTES_PER_PAIR = 64
+
+# Tiles rank pairs by one int64 key: the score in 1e-4 steps in the high
+# bits and the negated column in the low 32, so the larger key is the
+# higher rounded score with the lower column winning ties, as in the dense
+# path, and the column can be recovered from the key alone.
+TILE_KEY_SHIFT = 2**32
+NO_CANDIDATE = np.iinfo(np.int64).min
+
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return np.divide(matrix, norms, out=np.zeros_like(matrix), where=norms > 0)
+
+
+def encode_categories(values: Sequence[str]) -> Tuple[List[str], np.ndarray]:
+    categories: Dict[str, int] = {}
+    codes = np.array(
+        [categories.setdefault(value, len(categories)) for value in values],
+        dtype=np.int64
+    )
+    return list(categories), codes
+
+
+def preference_score(
+    preferences: Tuple[str, ...],
+    category: str,
+    exact: float,
+    partial: float,
+    miss: float
+) -> float:
+    if category in preferences:
+        return exact
+    if any(pref in category or category in pref for pref in preferences):
+        return partial
+    return miss
+
+
+def preference_matrix(
+    preferences: List[Tuple[str, ...]],
+    categories: List[str],
+    scores: Dict[float, str]
+) -> np.ndarray:
+    exact, partial, miss = scores.keys()
+    matrix = np.empty((len(preferences), len(categories)))
+    rows: Dict[Tuple[str, ...], np.ndarray] = {}
+
+    for index, prefs in enumerate(preferences):
+        row = rows.get(prefs)
+        if row is None:
+            row = np.array([
+                preference_score(prefs, category, exact, partial, miss)
+                for category in categories
+            ])
+            rows[prefs] = row
+        matrix[index] = row
+
+    return matrix
+
+
+def diversity_factors(student: StudentProfile) -> List[str]:
+    factors = []
+    if student.social_category in DIVERSITY_CATEGORIES:
+        factors.append(f"Social category: {student.social_category.value}")
+    if student.district_type in DIVERSITY_DISTRICTS:
+        factors.append(f"District type: {student.district_type.value}")
+    if student.past_internships == 0:
+        factors.append("First-time applicant")
+    return factors
+
+
+def fingerprint_internships(internships: List[InternshipOpportunity]) -> str:
+    digest = hashlib.sha256()
+    for internship in internships:
+        digest.update(internship.model_dump_json().encode())
+        digest.update(b"\n")
+    return digest.hexdigest()
+
+
+FLOAT_FEATURE_ARRAYS = ("skill_embeddings", "required_skill_counts", "qualification_levels", "min_cgpa")
+
+SHARED_FEATURE_ARRAYS = (
+    "skill_embeddings", "required_skill_counts", "qualification_levels", "min_cgpa",
+    "location_codes", "sector_codes", "capacity", "filled_positions"
+)
+
+
+class InternshipFeatures:
+    def __init__(self, internships: List[InternshipOpportunity], skill_embeddings: np.ndarray):
+        self.internships = internships
+        self.ids = [i.internship_id for i in internships]
+        self.skill_embeddings = normalize_rows(np.asarray(skill_embeddings, dtype=np.float64))
+
+        self.skill_vocabulary: Dict[str, int] = {}
+        rows, cols = [], []
+        for row, internship in enumerate(internships):
+            for skill in {s.lower() for s in internship.required_skills}:
+                rows.append(row)
+                cols.append(self.skill_vocabulary.setdefault(skill, len(self.skill_vocabulary)))
+        self.skill_matrix = sparse.csr_matrix(
+            (np.ones(len(rows)), (rows, cols)),
+            shape=(len(internships), len(self.skill_vocabulary))
+        )
+        self.required_skill_counts = np.array(
+            [len(i.required_skills) for i in internships], dtype=np.float64
+        )
+
+        self.qualification_levels = np.array(
+            [QUALIFICATION_HIERARCHY[i.preferred_qualification] for i in internships],
+            dtype=np.float64
+        )
+        self.min_cgpa = np.array([i.min_cgpa for i in internships], dtype=np.float64)
+        self.locations, self.location_codes = encode_categories(
+            [i.location.lower() for i in internships]
+        )
+        self.sectors, self.sector_codes = encode_categories(
+            [i.sector.lower() for i in internships]
+        )
+        self.capacity = np.array([i.capacity for i in internships], dtype=np.int64)
+        self.filled_positions = np.array([i.filled_positions for i in internships], dtype=np.int64)
+        self._retriever: Optional[CandidateRetriever] = None
+        self._fingerprint: Optional[str] = None
+
+    @classmethod
+    def build(
+        cls,
+        internships: List[InternshipOpportunity],
+        model_manager: ModelManager
+    ) -> "InternshipFeatures":
+        embeddings = model_manager.encode_skill_lists([i.required_skills for i in internships])
+        return cls(internships, embeddings)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def shared_state(self) -> Tuple[Dict[str, np.ndarray], dict]:
+        arrays = {name: getattr(self, name) for name in SHARED_FEATURE_ARRAYS}
+        arrays.update(
+            skill_data=self.skill_matrix.data,
+            skill_indices=self.skill_matrix.indices,
+            skill_indptr=self.skill_matrix.indptr
+        )
+        metadata = {
+            "ids": self.ids,
+            "skill_vocabulary": self.skill_vocabulary,
+            "locations": self.locations,
+            "sectors": self.sectors
+        }
+        return arrays, metadata
+
+    @classmethod
+    def from_shared_state(cls, arrays: Dict[str, np.ndarray], metadata: dict) -> "InternshipFeatures":
+        # Rebuilds the features around existing arrays without copying them,
+        # e.g. views onto shared memory in a shard worker.
+        features = cls.__new__(cls)
+        features.internships = []
+        features.ids = metadata["ids"]
+        features.skill_vocabulary = metadata["skill_vocabulary"]
+        features.locations = metadata["locations"]
+        features.sectors = metadata["sectors"]
+        for name in SHARED_FEATURE_ARRAYS:
+            setattr(features, name, arrays[name])
+        features.skill_matrix = sparse.csr_matrix(
+            (arrays["skill_data"], arrays["skill_indices"], arrays["skill_indptr"]),
+            shape=(len(features.ids), len(features.skill_vocabulary)),
+            copy=False
+        )
+        features._retriever = None
+        features._fingerprint = None
+        return features
+
+    def __getstate__(self) -> dict:
+        # ANN indexes are rebuilt lazily wherever the features are unpickled.
+        return {**self.__dict__, "_retriever": None}
+
+    def available_mask(self) -> np.ndarray:
+        return self.filled_positions < self.capacity
+
+    def remaining_capacity(self) -> np.ndarray:
+        return self.capacity - self.filled_positions
+
+    def subset(self, indices: Sequence[int]) -> "InternshipFeatures":
+        indices = np.asarray(indices, dtype=np.int64)
+        features = InternshipFeatures.__new__(InternshipFeatures)
+        features.internships = [self.internships[i] for i in indices]
+        features.ids = [self.ids[i] for i in indices]
+        features.skill_embeddings = self.skill_embeddings[indices]
+        features.skill_vocabulary = self.skill_vocabulary
+        features.skill_matrix = self.skill_matrix[indices]
+        features.required_skill_counts = self.required_skill_counts[indices]
+        features.qualification_levels = self.qualification_levels[indices]
+        features.min_cgpa = self.min_cgpa[indices]
+        features.locations = self.locations
+        features.location_codes = self.location_codes[indices]
+        features.sectors = self.sectors
+        features.sector_codes = self.sector_codes[indices]
+        features.capacity = self.capacity[indices]
+        features.filled_positions = self.filled_positions[indices]
+        features._retriever = None
+        features._fingerprint = None
+        return features
+
+    def astype(self, dtype) -> "InternshipFeatures":
+        features = copy.copy(self)
+        for name in FLOAT_FEATURE_ARRAYS:
+            setattr(features, name, getattr(self, name).astype(dtype, copy=False))
+        features.skill_matrix = self.skill_matrix.astype(dtype)
+        features._retriever = None
+        return features
+
+    def retriever(self) -> CandidateRetriever:
+        if self._retriever is None:
+            self._retriever = CandidateRetriever(self.skill_embeddings)
+        return self._retriever
+
+    def fingerprint(self) -> str:
+        if self._fingerprint is None:
+            self._fingerprint = fingerprint_internships(self.internships)
+        return self._fingerprint
+
+    def skill_incidence(self, skill_sets: List[frozenset]) -> sparse.csr_matrix:
+        rows, cols = [], []
+        for row, skills in enumerate(skill_sets):
+            for skill in skills:
+                col = self.skill_vocabulary.get(skill)
+                if col is not None:
+                    rows.append(row)
+                    cols.append(col)
+        return sparse.csr_matrix(
+            (np.ones(len(rows), dtype=self.skill_matrix.dtype), (rows, cols)),
+            shape=(len(skill_sets), len(self.skill_vocabulary))
+        )
+
+
+class PruningStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.pairs = 0
+        self.bound_pruned = 0
+        self.top_k_pruned = 0
+        self.students_skipped = 0
+
+    def record(
+        self,
+        pairs: int,
+        bound_pruned: int = 0,
+        top_k_pruned: int = 0,
+        students_skipped: int = 0
+    ):
+        with self._lock:
+            self.pairs += pairs
+            self.bound_pruned += bound_pruned
+            self.top_k_pruned += top_k_pruned
+            self.students_skipped += students_skipped
+
+    def stats(self) -> dict:
+        pruned = self.bound_pruned + self.top_k_pruned
+        return {
+            "enabled": settings.SCORE_PRUNING,
+            "pairs": self.pairs,
+            "bound_pruned": self.bound_pruned,
+            "top_k_pruned": self.top_k_pruned,
+            "students_skipped": self.students_skipped,
+            "pruned_fraction": round(pruned / self.pairs, 4) if self.pairs else 0.0
+        }
+
+
+pruning_stats = PruningStats()
+
+
+class StudentFeatures:
+    def __init__(self, students: List[StudentProfile], skill_embeddings: Optional[np.ndarray] = None):
+        # Without embeddings the features are encoded lazily, row by row, so
+        # students whose every pair is pruned never reach the encoder.
+        self.students = students
+        self.ids = [s.student_id for s in students]
+        self.skill_embeddings = (
+            None if skill_embeddings is None
+            else normalize_rows(np.asarray(skill_embeddings, dtype=np.float64))
+        )
+        self.encoded = np.full(len(students), skill_embeddings is not None)
+        self.skill_sets = [frozenset(skill.lower() for skill in s.skills) for s in students]
+        self.qualification_levels = np.array(
+            [QUALIFICATION_HIERARCHY[s.qualification] for s in students], dtype=np.float64
+        )
+        self.cgpa = np.array([s.cgpa for s in students], dtype=np.float64)
+        self.location_preferences = [
+            tuple(p.lower() for p in s.location_preference) for s in students
+        ]
+        self.sector_interests = [tuple(i.lower() for i in s.sector_interests) for s in students]
+        self.diversity_base = np.array([
+            0.5
+            + 0.2 * (s.social_category in DIVERSITY_CATEGORIES)
+            + 0.2 * (s.district_type in DIVERSITY_DISTRICTS)
+            + 0.1 * (s.past_internships == 0)
+            for s in students
+        ], dtype=np.float64)
+
+    @classmethod
+    def build(
+        cls,
+        students: List[StudentProfile],
+        model_manager: ModelManager
+    ) -> "StudentFeatures":
+        embeddings = model_manager.encode_skill_lists([s.skills for s in students])
+        return cls(students, embeddings)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def select(self, rows: slice) -> "StudentFeatures":
+        # Features of a contiguous block of students, as views where possible.
+        features = copy.copy(self)
+        for name in (
+            "students", "ids", "encoded", "skill_sets", "qualification_levels", "cgpa",
+            "location_preferences", "sector_interests", "diversity_base"
+        ):
+            setattr(features, name, getattr(self, name)[rows])
+        if self.skill_embeddings is not None:
+            features.skill_embeddings = self.skill_embeddings[rows]
+        return features
+
+    def astype(self, dtype) -> "StudentFeatures":
+        features = copy.copy(self)
+        for name in ("qualification_levels", "cgpa", "diversity_base"):
+            setattr(features, name, getattr(self, name).astype(dtype, copy=False))
+        if self.skill_embeddings is not None:
+            features.skill_embeddings = self.skill_embeddings.astype(dtype, copy=False)
+        return features
+
+    def encode_rows(self, indices: np.ndarray, model_manager: ModelManager) -> np.ndarray:
+        missing = indices[~self.encoded[indices]]
+        if len(missing):
+            embeddings = normalize_rows(np.asarray(
+                model_manager.encode_skill_lists([self.students[i].skills for i in missing]),
+                dtype=np.float64
+            ))
+            if self.skill_embeddings is None:
+                self.skill_embeddings = np.zeros((len(self), embeddings.shape[1]))
+            self.skill_embeddings[missing] = embeddings
+            self.encoded[missing] = True
+        return self.skill_embeddings[indices]
+
+    def diversity_scores(self, diversity_boost: bool) -> np.ndarray:
+        if not diversity_boost:
+            return np.full(len(self), 0.5, dtype=self.diversity_base.dtype)
+        return np.minimum(self.diversity_base, 1.0)
+
+
+class ComponentScores:
+    def __init__(
+        self,
+        similarity: np.ndarray,
+        overlap: np.ndarray,
+        qualification: np.ndarray,
+        cgpa: np.ndarray,
+        location: np.ndarray,
+        sector: np.ndarray,
+        diversity: np.ndarray
+    ):
+        self.similarity = similarity
+        self.overlap = overlap
+        self.qualification = qualification
+        self.cgpa = cgpa
+        self.location = location
+        self.sector = sector
+        self.diversity = diversity
+
+        self.skill = np.minimum(similarity * 0.7 + overlap * 0.3, 1.0)
+        self.qualification_total = qualification * 0.6 + cgpa * 0.4
+        self.overall = (
+            self.skill * settings.SKILL_WEIGHT +
+            self.qualification_total * settings.QUALIFICATION_WEIGHT +
+            location * settings.LOCATION_WEIGHT +
+            sector * settings.SECTOR_WEIGHT +
+            diversity * settings.DIVERSITY_WEIGHT
+        )
+
+    @property
+    def priority(self) -> np.ndarray:
+        # How strongly an internship ranks a candidate: the candidate-side
+        # components only, leaving out location and sector, which describe
+        # the student's own preferences.
+        return (
+            self.skill * settings.SKILL_WEIGHT +
+            self.qualification_total * settings.QUALIFICATION_WEIGHT +
+            self.diversity * settings.DIVERSITY_WEIGHT
+        )
+
+
+def gather(values: np.ndarray, columns: Optional[np.ndarray]) -> np.ndarray:
+    return values if columns is None else values[columns]
+
+
+def categorical_components(
+    students: StudentFeatures,
+    internships: InternshipFeatures,
+    rows: slice,
+    diversity_boost: bool = True,
+    columns: Optional[np.ndarray] = None
+) -> Tuple[np.ndarray, ...]:
+    # Components follow the dtype of the feature arrays, so float32 features
+    # score in float32 throughout.
+    dtype = students.cgpa.dtype
+    incidence = internships.skill_incidence(students.skill_sets[rows])
+    if columns is None:
+        overlap_counts = (incidence @ internships.skill_matrix.T).toarray()
+    else:
+        pair_rows = np.repeat(np.arange(columns.shape[0]), columns.shape[1])
+        overlap_counts = np.asarray(
+            incidence[pair_rows].multiply(internships.skill_matrix[columns.ravel()]).sum(axis=1)
+        ).reshape(columns.shape)
+
+    required_counts = gather(internships.required_skill_counts, columns)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        overlap = np.where(required_counts > 0, overlap_counts / required_counts, 0.0)
+
+    student_levels = students.qualification_levels[rows, None]
+    required_levels = gather(internships.qualification_levels, columns)
+    qualification = np.where(
+        student_levels < required_levels,
+        0.5 * (student_levels / required_levels),
+        np.where(student_levels == required_levels, dtype.type(1.0), dtype.type(0.9))
+    )
+
+    cgpa = students.cgpa[rows, None]
+    min_cgpa = gather(internships.min_cgpa, columns)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        below_minimum = np.where(min_cgpa > 0, 0.5 * (cgpa / min_cgpa), 0.5)
+    cgpa_score = np.where(cgpa < min_cgpa, below_minimum, np.minimum(cgpa / 10.0, 1.0))
+
+    location_matrix = preference_matrix(
+        students.location_preferences[rows], internships.locations, LOCATION_SCORES
+    ).astype(dtype, copy=False)
+    sector_matrix = preference_matrix(
+        students.sector_interests[rows], internships.sectors, SECTOR_SCORES
+    ).astype(dtype, copy=False)
+    if columns is None:
+        location = location_matrix[:, internships.location_codes]
+        sector = sector_matrix[:, internships.sector_codes]
+    else:
+        row_index = np.arange(columns.shape[0])[:, None]
+        location = location_matrix[row_index, internships.location_codes[columns]]
+        sector = sector_matrix[row_index, internships.sector_codes[columns]]
+
+    diversity = np.broadcast_to(
+        students.diversity_scores(diversity_boost)[rows, None],
+        overlap.shape
+    )
+    return overlap, qualification, cgpa_score, location, sector, diversity
+
+
+def score_upper_bound(overlap, qualification, cgpa, location, sector, diversity):
+    # Cosine similarity never exceeds 1, so every component except the
+    # embedding term is exact and the skill score is at most 0.7 + 0.3 * overlap.
+    return (
+        np.minimum(0.7 + overlap * 0.3, 1.0) * settings.SKILL_WEIGHT +
+        (qualification * 0.6 + cgpa * 0.4) * settings.QUALIFICATION_WEIGHT +
+        location * settings.LOCATION_WEIGHT +
+        sector * settings.SECTOR_WEIGHT +
+        diversity * settings.DIVERSITY_WEIGHT
+    )
+
+
+def score_components(
+    students: StudentFeatures,
+    internships: InternshipFeatures,
+    rows: slice,
+    diversity_boost: bool = True,
+    columns: Optional[np.ndarray] = None,
+    similarity: Optional[np.ndarray] = None
+) -> ComponentScores:
+    categorical = categorical_components(students, internships, rows, diversity_boost, columns)
+    if columns is None:
+        similarity = students.skill_embeddings[rows] @ internships.skill_embeddings.T
+    elif similarity is None:
+        similarity = np.einsum(
+            "sd,scd->sc",
+            students.skill_embeddings[rows],
+            internships.skill_embeddings[columns]
+        )
+    return ComponentScores(similarity, *categorical)
+
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    valid = np.flatnonzero(np.isfinite(scores))
+    if len(valid) > k:
+        kth = -np.partition(-scores[valid], k - 1)[k - 1]
+        valid = valid[scores[valid] >= kth]
+    order = np.lexsort((valid, -scores[valid]))
+    return valid[order[:k]]
+
+
+def top_keys(keys: np.ndarray, k: int) -> np.ndarray:
+    if keys.shape[1] <= k:
+        return keys
+    return np.partition(keys, keys.shape[1] - k, axis=1)[:, -k:]
+
+
+def build_match_score(
+    student: StudentProfile,
+    internship_id: str,
+    components: ComponentScores,
+    row: int,
+    col: int,
+    diversity_boost: bool = True,
+    explain: bool = True
+) -> MatchScore:
+    location = float(components.location[row, col])
+    sector = float(components.sector[row, col])
+    match_score = MatchScore(
+        student_id=student.student_id,
+        internship_id=internship_id,
+        overall_score=round(float(components.overall[row, col]), 4),
+        skill_score=round(float(components.skill[row, col]), 4),
+        qualification_score=round(float(components.qualification_total[row, col]), 4),
+        location_score=round(location, 4),
+        sector_score=round(sector, 4),
+        diversity_score=round(float(components.diversity[row, col]), 4),
+        explanation={}
+    )
+    if not explain:
+        return match_score
+
+    if diversity_boost:
+        factors = diversity_factors(student)
+        diversity_exp = ", ".join(factors) if factors else "No diversity factors"
+    else:
+        diversity_exp = "Diversity boost disabled"
+
+    match_score.explanation = {
+        "skills": (
+            f"Semantic similarity: {components.similarity[row, col]:.2f}, "
+            f"Direct overlap: {components.overlap[row, col]:.2f}"
+        ),
+        "qualification": (
+            f"Qualification match: {components.qualification[row, col]:.2f}, "
+            f"CGPA score: {components.cgpa[row, col]:.2f}"
+        ),
+        "location": LOCATION_SCORES[location],
+        "sector": SECTOR_SCORES[sector],
+        "diversity": diversity_exp
+    }
+    return match_score
+
+
+def select_edges(
+    overall: np.ndarray,
+    priority: np.ndarray,
+    columns: Optional[np.ndarray],
+    rows: slice,
+    k: int
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    # Each student's k best finite scores in a chunk, as flat edge arrays.
+    width = min(k, overall.shape[1])
+    positions = np.argpartition(-overall, width - 1, axis=1)[:, :width]
+    top_scores = np.take_along_axis(overall, positions, axis=1)
+    top_priorities = np.take_along_axis(np.round(priority, 4), positions, axis=1)
+    top = positions if columns is None else np.take_along_axis(columns, positions, axis=1)
+    valid = np.isfinite(top_scores)
+    return (
+        np.broadcast_to(np.arange(rows.start, rows.stop)[:, None], top.shape)[valid],
+        top[valid],
+        top_scores[valid],
+        top_priorities[valid]
+    )
+
+
+def assemble_edges(
+    parts: List[Tuple[np.ndarray, ...]],
+    num_students: int,
+    remaining_capacity: np.ndarray
+) -> AllocationEdges:
+    def concat(index: int, dtype) -> np.ndarray:
+        if not parts:
+            return np.empty(0, dtype=dtype)
+        return np.concatenate([part[index] for part in parts]).astype(dtype)
+
+    return AllocationEdges(
+        concat(0, np.int64),
+        concat(1, np.int64),
+        concat(2, np.float64),
+        num_students,
+        remaining_capacity,
+        priorities=concat(3, np.float64)
+    )
+
+
+class ComponentSnapshot:
+    # Dense per-pair component scores kept from an allocation run, so the
+    # run can be re-ranked under other weights without encoding anything
+    # again. Location and sector take three values each and are stored as
+    # codes; diversity depends only on the student.
+
+    def __init__(
+        self,
+        num_students: int,
+        internship_features: InternshipFeatures,
+        dtype: Optional[str] = None
+    ):
+        dtype = np.dtype(dtype or settings.WHAT_IF_DTYPE)
+        shape = (num_students, len(internship_features))
+        self.skill = np.zeros(shape, dtype=dtype)
+        self.qualification = np.zeros(shape, dtype=dtype)
+        self.location = np.zeros(shape, dtype=np.uint8)
+        self.sector = np.zeros(shape, dtype=np.uint8)
+        self.diversity = np.zeros(num_students, dtype=np.float64)
+        self.available = internship_features.available_mask()
+
+    @property
+    def nbytes(self) -> int:
+        return sum(
+            array.nbytes
+            for array in (self.skill, self.qualification, self.location, self.sector, self.diversity)
+        )
+
+    def record(self, rows: slice, components: ComponentScores):
+        self.skill[rows] = components.skill
+        self.qualification[rows] = components.qualification_total
+        self.location[rows] = np.searchsorted(LOCATION_VALUES, components.location)
+        self.sector[rows] = np.searchsorted(SECTOR_VALUES, components.sector)
+        self.diversity[rows] = components.diversity[:, 0]
+
+    def scores(self, rows: slice, weights: Tuple[float, ...]) -> Tuple[np.ndarray, np.ndarray]:
+        # Same terms in the same order as ComponentScores, so float64
+        # snapshots reproduce the original scores exactly.
+        skill_weight, qualification_weight, location_weight, sector_weight, diversity_weight = weights
+        skill = self.skill[rows].astype(np.float64, copy=False)
+        qualification = self.qualification[rows].astype(np.float64, copy=False)
+        diversity = self.diversity[rows, None]
+        overall = (
+            skill * skill_weight +
+            qualification * qualification_weight +
+            LOCATION_VALUES[self.location[rows]] * location_weight +
+            SECTOR_VALUES[self.sector[rows]] * sector_weight +
+            diversity * diversity_weight
+        )
+        priority = (
+            skill * skill_weight +
+            qualification * qualification_weight +
+            diversity * diversity_weight
+        )
+        return overall, priority
+
+    def rank(
+        self,
+        weights: Tuple[float, ...],
+        k: int,
+        remaining_capacity: np.ndarray,
+        chunk_size: int,
+        min_score: float = 0.0
+    ) -> Tuple[AllocationEdges, np.ndarray]:
+        # Allocation edges under the given weights, plus each student's best
+        # internship (-1 when none is available).
+        num_students = len(self.diversity)
+        parts = []
+        top_match = np.full(num_students, -1, dtype=np.int64)
+        if self.available.any():
+            for start in range(0, num_students, chunk_size):
+                rows = slice(start, min(start + chunk_size, num_students))
+                with stage("score"):
+                    overall, priority = self.scores(rows, weights)
+                    overall = np.round(overall, 4)
+                    overall[:, ~self.available] = -np.inf
+                    overall[overall < min_score] = -np.inf
+                count_pairs(overall.size)
+                with stage("select"):
+                    parts.append(select_edges(overall, priority, None, rows, k))
+                    best = overall.argmax(axis=1)
+                    top_match[rows] = np.where(np.isfinite(overall.max(axis=1)), best, -1)
+        return assemble_edges(parts, num_students, remaining_capacity), top_match
+
+
+class TileRun:
+    # One tiled run: its tile shape and how far process memory rose over it.
+    # RSS is process-wide, so concurrent runs inflate each other's peaks.
+
+    def __init__(self, num_students: int, num_internships: int, tile_rows: int, tile_cols: int):
+        self.num_students = num_students
+        self.num_internships = num_internships
+        self.tile_rows = tile_rows
+        self.tile_cols = tile_cols
+        self.tiles = 0
+        self.started_at = time.perf_counter()
+        self.start_rss = current_rss()
+        self.peak_rss = self.start_rss
+
+    def sample(self):
+        self.tiles += 1
+        self.peak_rss = max(self.peak_rss, current_rss())
+
+    def report(self) -> dict:
+        return {
+            "students": self.num_students,
+            "internships": self.num_internships,
+            "tile_rows": self.tile_rows,
+            "tile_cols": self.tile_cols,
+            "tiles": self.tiles,
+            "seconds": round(time.perf_counter() - self.started_at, 3),
+            "start_rss_mb": round(self.start_rss / 2**20, 1),
+            "peak_rss_mb": round(self.peak_rss / 2**20, 1),
+            "peak_increase_mb": round((self.peak_rss - self.start_rss) / 2**20, 1)
+        }
+
+
+class TilingStats:
+    def __init__(self, history: int = 20):
+        self._lock = threading.Lock()
+        self.runs = 0
+        self.recent: Deque[dict] = deque(maxlen=history)
+
+    def record(self, run: TileRun):
+        report = run.report()
+        logger.info(
+            f"Tiled run over {report['students']}x{report['internships']} pairs in "
+            f"{report['tiles']} tiles of {report['tile_rows']}x{report['tile_cols']}: "
+            f"peak RSS {report['peak_rss_mb']} MB (+{report['peak_increase_mb']} MB)"
+        )
+        with self._lock:
+            self.runs += 1
+            self.recent.append(report)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "enabled": settings.SCORING_MODE == "tiled",
+                "memory_budget_mb": settings.SCORING_MEMORY_MB,
+                "dtype": settings.TILE_DTYPE,
+                "runs": self.runs,
+                "process_peak_rss_mb": round(peak_rss() / 2**20, 1),
+                "recent_runs": list(self.recent)
+            }
+
+
+tiling_stats = TilingStats()
+
+
+class ScoreMatrixEngine:
+    def __init__(self, model_manager: ModelManager, chunk_size: Optional[int] = None):
+        self.model_manager = model_manager
+        self.chunk_size = chunk_size or settings.SCORING_CHUNK_SIZE
+
+    def tile_shape(self, num_internships: int) -> Tuple[int, int]:
+        pairs = max(1, settings.SCORING_MEMORY_MB * 2**20 // TILE_BYTES_PER_PAIR)
+        cols = max(1, min(num_internships, pairs // self.chunk_size))
+        rows = max(1, min(self.chunk_size, pairs // cols))
+        return rows, cols
+
+    def tile_features(
+        self,
+        internship_features: InternshipFeatures,
+        tile_cols: int
+    ) -> List[Tuple[int, InternshipFeatures]]:
+        dtype = np.dtype(settings.TILE_DTYPE)
+        return [
+            (
+                start,
+                internship_features.subset(
+                    np.arange(start, min(start + tile_cols, len(internship_features)))
+                ).astype(dtype)
+            )
+            for start in range(0, len(internship_features), tile_cols)
+        ]
+
+    def build_internship_features(
+        self,
+        internships: List[InternshipOpportunity]
+    ) -> InternshipFeatures:
+        return InternshipFeatures.build(internships, self.model_manager)
+
+    def default_candidate_depth(self) -> Optional[int]:
+        return settings.RETRIEVAL_DEPTH if settings.CANDIDATE_RETRIEVAL else None
+
+    def retrieve_candidates(
+        self,
+        student_features: StudentFeatures,
+        internship_features: InternshipFeatures,
+        rows: slice,
+        depth: int,
+        available: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        # Over-fetch by the number of full internships so that filtering them
+        # out still leaves `depth` candidates with capacity.
+        size = len(internship_features)
+        similarity, columns = internship_features.retriever().search(
+            student_features.skill_embeddings[rows],
+            depth + int((~available).sum())
+        )
+        valid = columns >= 0
+        valid[valid] = available[columns[valid]]
+
+        # Keep candidates in catalog order so ties break exactly as in the
+        # exhaustive path.
+        columns = np.where(valid, columns, size)
+        order = np.argsort(columns, axis=1, kind="stable")
+        columns = np.take_along_axis(columns, order, axis=1)
+        similarity = np.take_along_axis(similarity, order, axis=1).astype(np.float64)
+        valid = columns < size
+        columns[~valid] = 0
+        return columns, similarity, valid
+
+    def score_chunk(
+        self,
+        student_features: StudentFeatures,
+        internship_features: InternshipFeatures,
+        rows: slice,
+        min_score: float,
+        diversity_boost: bool,
+        available: np.ndarray,
+        candidate_depth: Optional[int] = None
+    ) -> Tuple[ComponentScores, np.ndarray, Optional[np.ndarray]]:
+        if candidate_depth is None:
+            columns = None
+            with stage("score"):
+                components = score_components(
+                    student_features, internship_features, rows, diversity_boost
+                )
+                overall = np.round(components.overall, 4)
+                overall[:, ~available] = -np.inf
+            count_pairs((rows.stop - rows.start) * int(available.sum()))
+        else:
+            columns, similarity, valid = self.retrieve_candidates(
+                student_features, internship_features, rows, candidate_depth, available
+            )
+            with stage("score"):
+                components = score_components(
+                    student_features, internship_features, rows, diversity_boost,
+                    columns=columns, similarity=similarity
+                )
+                overall = np.round(components.overall, 4)
+                overall[~valid] = -np.inf
+            count_pairs(int(valid.sum()))
+
+        overall[overall < min_score] = -np.inf
+        return components, overall, columns
+
+    def score_chunk_tiled(
+        self,
+        student_features: StudentFeatures,
+        internship_features: InternshipFeatures,
+        tiles: List[Tuple[int, InternshipFeatures]],
+        rows: slice,
+        depth: int,
+        min_score: float,
+        diversity_boost: bool,
+        available: np.ndarray,
+        run: TileRun
+    ) -> Tuple[ComponentScores, np.ndarray, np.ndarray]:
+        # Scores (student block x internship block) tiles in reduced
+        # precision and keeps only a running top-`depth` per student, so no
+        # full row of scores is ever held. The survivors are then rescored in
+        # float64 exactly as the dense path would score them.
+        num_rows = rows.stop - rows.start
+        # Only this chunk is cast, so the reduced copy stays chunk-sized when
+        # the features cover the whole cohort.
+        reduced = student_features.select(rows).astype(np.dtype(settings.TILE_DTYPE))
+        best = np.full((num_rows, 0), NO_CANDIDATE, dtype=np.int64)
+        count_pairs(num_rows * int(available.sum()))
+
+        with stage("score"):
+            for start, tile in tiles:
+                overall = score_components(reduced, tile, slice(0, num_rows), diversity_boost).overall
+                keys = (
+                    np.rint(overall * 1e4).astype(np.int64) * TILE_KEY_SHIFT
+                    - np.arange(start, start + len(tile))
+                )
+                keys[overall < min_score - PRUNING_MARGIN] = NO_CANDIDATE
+                keys[:, ~available[start:start + len(tile)]] = NO_CANDIDATE
+                # Sampled while the tile's arrays are still alive, which is when
+                # memory peaks.
+                run.sample()
+                del overall
+
+                best = np.concatenate([best, top_keys(keys, depth)], axis=1)
+                del keys
+                best = top_keys(best, depth)
+
+            # Candidates go back into catalog order so ties break exactly as in
+            # the dense path.
+            size = len(internship_features)
+            valid = best > NO_CANDIDATE
+            columns = np.where(valid, -np.where(valid, best, 0) % TILE_KEY_SHIFT, size)
+            columns.sort(axis=1)
+            valid = columns < size
+            columns[~valid] = 0
+
+            components = score_components(
+                student_features, internship_features, rows, diversity_boost, columns=columns
+            )
+            overall = np.round(components.overall, 4)
+            overall[~valid] = -np.inf
+            overall[overall < min_score] = -np.inf
+        return components, overall, columns
+
+    def score_chunk_pruned(
+        self,
+        student_features: StudentFeatures,
+        internship_features: InternshipFeatures,
+        rows: slice,
+        min_score: float,
+        diversity_boost: bool,
+        available: np.ndarray
+    ) -> Tuple[ComponentScores, np.ndarray, None]:
+        # Skills encoded here for the live rows are timed as encoding, not
+        # scoring.
+        with stage("score"):
+            categorical = categorical_components(
+                student_features, internship_features, rows, diversity_boost
+            )
+            viable = score_upper_bound(*categorical) >= min_score - PRUNING_MARGIN
+            viable &= available
+            live = np.flatnonzero(viable.any(axis=1))
+            # Similarity is computed for the block of live students and the
+            # internships viable for at least one of them, the only pairs
+            # whose embedding work the bound actually saves.
+            columns = np.flatnonzero(viable[live].any(axis=0))
+
+            similarity = np.zeros(viable.shape)
+            if len(live):
+                embeddings = student_features.encode_rows(rows.start + live, self.model_manager)
+                similarity[np.ix_(live, columns)] = (
+                    embeddings @ internship_features.skill_embeddings[columns].T
+                )
+
+            components = ComponentScores(similarity, *categorical)
+            overall = np.round(components.overall, 4)
+            overall[~viable] = -np.inf
+            overall[overall < min_score] = -np.inf
+
+        pairs = viable.shape[0] * int(available.sum())
+        count_pairs(pairs)
+        pruning_stats.record(
+            pairs,
+            bound_pruned=pairs - len(live) * len(columns),
+            students_skipped=viable.shape[0] - len(live)
+        )
+        return components, overall, None
+
+    def match(
+        self,
+        students: List[StudentProfile],
+        internships: List[InternshipOpportunity],
+        max_matches: int = 10,
+        min_score: float = 0.5,
+        diversity_boost: bool = True,
+        internship_features: Optional[InternshipFeatures] = None,
+        candidate_depth: Optional[int] = None,
+        tiled: Optional[bool] = None,
+        explain: bool = True
+    ) -> Dict[str, List[MatchScore]]:
+        results: Dict[str, List[MatchScore]] = {}
+        for chunk in self.iter_match(
+            students, internships, max_matches, min_score, diversity_boost,
+            internship_features, candidate_depth, tiled, explain
+        ):
+            for student, matches in chunk:
+                results[student.student_id] = matches
+        return results
+
+    def iter_match(
+        self,
+        students: List[StudentProfile],
+        internships: List[InternshipOpportunity],
+        max_matches: int = 10,
+        min_score: float = 0.5,
+        diversity_boost: bool = True,
+        internship_features: Optional[InternshipFeatures] = None,
+        candidate_depth: Optional[int] = None,
+        tiled: Optional[bool] = None,
+        explain: bool = True
+    ) -> Iterator[List[Tuple[StudentProfile, List[MatchScore]]]]:
+        # Yields one chunk of students at a time. Student features are built
+        # per chunk, so memory is bounded by the chunk size rather than the
+        # cohort. Explanations are only built for the pairs returned.
+        available = None
+        if students and (internships or internship_features is not None):
+            if internship_features is None:
+                internship_features = InternshipFeatures.build(internships, self.model_manager)
+            available = internship_features.available_mask()
+            if not available.any():
+                logger.warning(f"No available internships for batch of {len(students)} students")
+                available = None
+
+        if tiled is None:
+            tiled = settings.SCORING_MODE == "tiled"
+        tiled = tiled and candidate_depth is None and available is not None
+        prune = settings.SCORE_PRUNING and candidate_depth is None and not tiled
+
+        step = self.chunk_size
+        if tiled:
+            step, tile_cols = self.tile_shape(len(internship_features))
+            tiles = self.tile_features(internship_features, tile_cols)
+            run = TileRun(len(students), len(internship_features), step, tile_cols)
+
+        for start in range(0, len(students), step):
+            chunk = students[start:start + step]
+            if available is None:
+                yield [(student, []) for student in chunk]
+                continue
+
+            rows = slice(0, len(chunk))
+            if tiled:
+                components, overall, columns = self.score_chunk_tiled(
+                    StudentFeatures.build(chunk, self.model_manager), internship_features, tiles,
+                    rows, 2 * max_matches, min_score, diversity_boost, available, run
+                )
+            elif prune:
+                components, overall, columns = self.score_chunk_pruned(
+                    StudentFeatures(chunk), internship_features, rows,
+                    min_score, diversity_boost, available
+                )
+            else:
+                components, overall, columns = self.score_chunk(
+                    StudentFeatures.build(chunk, self.model_manager), internship_features, rows,
+                    min_score, diversity_boost, available, candidate_depth
+                )
+
+            with stage("select"):
+                selected = [
+                    (student, [
+                        build_match_score(
+                            student,
+                            internship_features.ids[
+                                col if columns is None else columns[offset, col]
+                            ],
+                            components,
+                            offset,
+                            col,
+                            diversity_boost,
+                            explain
+                        )
+                        for col in top_k_indices(overall[offset], max_matches)
+                    ])
+                    for offset, student in enumerate(chunk)
+                ]
+            yield selected
+
+        if tiled:
+            tiling_stats.record(run)
+
+    def explain_pair(
+        self,
+        student: StudentProfile,
+        internship_features: InternshipFeatures,
+        index: int,
+        diversity_boost: bool = True
+    ) -> MatchScore:
+        # Rescores a single pair in full precision, for explanations requested
+        # after a run that skipped or returned them.
+        components = score_components(
+            StudentFeatures.build([student], self.model_manager),
+            internship_features.subset([index]),
+            slice(0, 1),
+            diversity_boost
+        )
+        return build_match_score(
+            student, internship_features.ids[index], components, 0, 0, diversity_boost
+        )
+
+    def top_k_edges(
+        self,
+        students: List[StudentProfile],
+        internships: List[InternshipOpportunity],
+        k: int,
+        min_score: float = 0.0,
+        diversity_boost: bool = True,
+        internship_features: Optional[InternshipFeatures] = None,
+        candidate_depth: Optional[int] = None,
+        include_full: bool = False,
+        tiled: Optional[bool] = None,
+        keep_components: Optional[ComponentSnapshot] = None
+    ) -> Tuple[InternshipFeatures, AllocationEdges]:
+        # keep_components receives every chunk's dense component scores, so
+        # it forces exhaustive, untiled scoring.
+        if internship_features is None:
+            internship_features = InternshipFeatures.build(internships, self.model_manager)
+        student_features = StudentFeatures.build(students, self.model_manager)
+        if include_full:
+            available = np.ones(len(internship_features), dtype=bool)
+        else:
+            available = internship_features.available_mask()
+
+        if keep_components is not None:
+            candidate_depth, tiled = None, False
+        if tiled is None:
+            tiled = settings.SCORING_MODE == "tiled"
+        tiled = tiled and candidate_depth is None
+
+        parts = []
+        if len(students) and available.any():
+            step = self.chunk_size
+            if tiled:
+                step, tile_cols = self.tile_shape(len(internship_features))
+                tiles = self.tile_features(internship_features, tile_cols)
+                run = TileRun(len(students), len(internship_features), step, tile_cols)
+
+            for start in range(0, len(students), step):
+                rows = slice(start, min(start + step, len(students)))
+                if tiled:
+                    components, overall, columns = self.score_chunk_tiled(
+                        student_features, internship_features, tiles, rows,
+                        2 * k, min_score, diversity_boost, available, run
+                    )
+                else:
+                    components, overall, columns = self.score_chunk(
+                        student_features, internship_features, rows,
+                        min_score, diversity_boost, available, candidate_depth
+                    )
+
+                if keep_components is not None:
+                    keep_components.record(rows, components)
+                with stage("select"):
+                    parts.append(select_edges(overall, components.priority, columns, rows, k))
+
+            if tiled:
+                tiling_stats.record(run)
+
+        edges = assemble_edges(parts, len(students), internship_features.remaining_capacity())
+        return internship_features, edges
+
+    def recall_report(
+        self,
+        students: List[StudentProfile],
+        internships: List[InternshipOpportunity],
+        depths: List[int],
+        max_matches: int = 10,
+        min_score: float = 0.5,
+        diversity_boost: bool = True,
+        internship_features: Optional[InternshipFeatures] = None
+    ) -> dict:
+        if internship_features is None:
+            internship_features = InternshipFeatures.build(internships, self.model_manager)
+
+        def timed_match(depth: Optional[int]) -> Tuple[Dict[str, List[MatchScore]], float]:
+            start_time = time.perf_counter()
+            matches = self.match(
+                students, internships, max_matches, min_score, diversity_boost,
+                internship_features, candidate_depth=depth
+            )
+            return matches, time.perf_counter() - start_time
+
+        exhaustive, exhaustive_time = timed_match(None)
+        reports = []
+        for depth in sorted(set(depths)):
+            retrieved, retrieval_time = timed_match(depth)
+            found, expected = 0, 0
+            for student_id, reference in exhaustive.items():
+                reference_ids = {m.internship_id for m in reference}
+                found += len(reference_ids & {m.internship_id for m in retrieved[student_id]})
+                expected += len(reference_ids)
+            reports.append({
+                "depth": depth,
+                "recall": round(found / expected, 4) if expected else 1.0,
+                "avg_latency_ms": round(retrieval_time / len(students) * 1000, 3) if students else 0.0
+            })
+
+        return {
+            "index_type": internship_features.retriever().index_type,
+            "total_internships": len(internship_features),
+            "exhaustive_avg_latency_ms": (
+                round(exhaustive_time / len(students) * 1000, 3) if students else 0.0
+            ),
+            "depths": reports
+        }
@@ -0,0 +1,329 @@
+import atexit
+import multiprocessing
+import threading
+import numpy as np
+from concurrent.futures import Future, ProcessPoolExecutor, wait
+from contextlib import contextmanager
+from multiprocessing import shared_memory
+from loguru import logger
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from app.models.schemas import StudentProfile, InternshipOpportunity, MatchScore
+from app.core.config import settings
+from app.core.embedding_cache import SkillEmbeddingCache, canonicalize_skill
+from app.core.metrics import collect, merge
+from app.core.model_manager import ModelManager
+from app.services.allocation_solver import AllocationEdges
+from app.services.score_matrix import InternshipFeatures, ScoreMatrixEngine, pruning_stats
+
+PRUNING_COUNTERS = ("pairs", "bound_pruned", "top_k_pruned", "students_skipped")
+
+
+class SharedArrays:
+    # Copies arrays into named shared-memory blocks once; only the small
+    # (name, shape, dtype) specs are pickled to the workers.
+
+    def __init__(self, arrays: Dict[str, np.ndarray]):
+        self.specs: Dict[str, Tuple[str, tuple, str]] = {}
+        self._blocks: List[shared_memory.SharedMemory] = []
+        for name, array in arrays.items():
+            array = np.ascontiguousarray(array)
+            block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+            self._blocks.append(block)
+            np.ndarray(array.shape, array.dtype, buffer=block.buf)[...] = array
+            self.specs[name] = (block.name, array.shape, array.dtype.str)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(block.size for block in self._blocks)
+
+    def release(self):
+        for block in self._blocks:
+            block.close()
+            block.unlink()
+        self._blocks = []
+
+
+@contextmanager
+def attach_shared_arrays(specs: Dict[str, Tuple[str, tuple, str]]) -> Iterator[Dict[str, np.ndarray]]:
+    blocks = []
+    arrays = {}
+    try:
+        for name, (block_name, shape, dtype) in specs.items():
+            block = shared_memory.SharedMemory(name=block_name)
+            blocks.append(block)
+            arrays[name] = np.ndarray(shape, np.dtype(dtype), buffer=block.buf)
+        yield arrays
+    finally:
+        # Views must be gone before the mapping can be closed.
+        arrays.clear()
+        for block in blocks:
+            block.close()
+
+
+class SharedSkillEncoder:
+    # Stands in for the transformer inside shard workers. The parent encodes
+    # each shard's skills before submitting it, so workers only ever read
+    # the published vectors and never call the model.
+
+    def __init__(self, dimension: int):
+        self.dimension = dimension
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.dimension
+
+    def encode(self, sentences, **kwargs):
+        raise RuntimeError(f"Skills were not published to the shard worker: {sentences[:5]}")
+
+
+def _shard_engine(arrays: Dict[str, np.ndarray], metadata: dict) -> Tuple[ScoreMatrixEngine, InternshipFeatures]:
+    skill_keys = metadata["skill_keys"]
+    manager = ModelManager()
+    manager.skill_encoder = SharedSkillEncoder(metadata["dimension"])
+    manager.embedding_cache = SkillEmbeddingCache(max(len(skill_keys), 1))
+    manager.embedding_cache.store(skill_keys, arrays["skill_vectors"])
+
+    engine = ScoreMatrixEngine(manager, chunk_size=metadata["chunk_size"])
+    return engine, InternshipFeatures.from_shared_state(arrays, metadata["features"])
+
+
+def _pruning_snapshot() -> Dict[str, int]:
+    return {name: getattr(pruning_stats, name) for name in PRUNING_COUNTERS}
+
+
+@contextmanager
+def _shard_stats(num_students: int) -> Iterator[dict]:
+    # Pruning counters, stage times and pairs of one shard, returned to the
+    # parent alongside its results.
+    stats = {}
+    before = _pruning_snapshot()
+    with collect(num_students) as run:
+        yield stats
+    after = _pruning_snapshot()
+    stats["pruning"] = {name: after[name] - before[name] for name in PRUNING_COUNTERS}
+    stats["stages"] = run.stages
+    stats["pairs"] = run.pairs
+
+
+def _merge_shard_stats(stats: dict):
+    pruning_stats.record(**stats["pruning"])
+    merge(stats["stages"], stats["pairs"])
+
+
+def _match_shard(
+    specs: dict,
+    metadata: dict,
+    students: List[StudentProfile],
+    params: dict
+) -> Tuple[List[List[MatchScore]], dict]:
+    with _shard_stats(len(students)) as stats, attach_shared_arrays(specs) as arrays:
+        engine, features = _shard_engine(arrays, metadata)
+        results = [
+            matches
+            for chunk in engine.iter_match(students, [], internship_features=features, **params)
+            for _, matches in chunk
+        ]
+        del engine, features
+    return results, stats
+
+
+def _edges_shard(
+    specs: dict,
+    metadata: dict,
+    students: List[StudentProfile],
+    params: dict
+) -> Tuple[Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray], dict]:
+    with _shard_stats(len(students)) as stats, attach_shared_arrays(specs) as arrays:
+        engine, features = _shard_engine(arrays, metadata)
+        _, edges = engine.top_k_edges(students, [], internship_features=features, **params)
+        del engine, features
+    return (edges.student_index, edges.internship_index, edges.scores, edges.priorities), stats
+
+
+class ShardPool:
+    def __init__(self):
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._workers = 0
+        self._lock = threading.Lock()
+
+    def get(self, workers: int) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None or self._workers != workers:
+                self.shutdown()
+                self._pool = ProcessPoolExecutor(
+                    max_workers=workers,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+                self._workers = workers
+                logger.info(f"Started shard pool with {workers} worker processes")
+            return self._pool
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+shard_pool = ShardPool()
+atexit.register(shard_pool.shutdown)
+
+
+def settle(futures: List[Future]):
+    # Shards still queued are cancelled and running ones are waited for,
+    # so no worker is left reading shared memory about to be unlinked.
+    for future in futures:
+        future.cancel()
+    wait(futures)
+
+
+class ShardedScoreMatrix:
+    # Splits the cohort across a process pool. Shard boundaries fall on
+    # whole scoring chunks, so every chunk sees exactly the inputs it would
+    # in a single process and the merged results are identical.
+
+    def __init__(
+        self,
+        score_matrix: ScoreMatrixEngine,
+        workers: Optional[int] = None
+    ):
+        self.score_matrix = score_matrix
+        self.model_manager = score_matrix.model_manager
+        self.workers = workers or settings.SHARD_WORKERS
+
+    def enabled(self, num_students: int, candidate_depth: Optional[int] = None) -> bool:
+        # Retrieval would rebuild the ANN index in every worker, so only
+        # exhaustive scoring is sharded.
+        return (
+            self.workers > 1
+            and candidate_depth is None
+            and num_students > self.score_matrix.chunk_size
+        )
+
+    def shards(self, num_students: int) -> List[slice]:
+        chunk_size = self.score_matrix.chunk_size
+        num_chunks = -(-num_students // chunk_size)
+        chunks_per_shard = -(-num_chunks // self.workers)
+        step = chunks_per_shard * chunk_size
+        return [
+            slice(start, min(start + step, num_students))
+            for start in range(0, num_students, step)
+        ]
+
+    def publish_skills(self, students: List[StudentProfile]) -> Tuple[SharedArrays, dict]:
+        skills = list({
+            canonicalize_skill(skill): skill for s in students for skill in s.skills
+        }.values())
+        skill_vectors = self.model_manager.encode_skill_vectors(skills)
+        shared = SharedArrays({"skill_vectors": skill_vectors})
+        return shared, {
+            "skill_keys": [canonicalize_skill(skill) for skill in skills],
+            "dimension": skill_vectors.shape[1]
+        }
+
+    @contextmanager
+    def dispatch(
+        self,
+        func: Callable,
+        students: List[StudentProfile],
+        internship_features: InternshipFeatures,
+        params: dict
+    ) -> Iterator[Tuple[List[slice], List[Future]]]:
+        arrays, feature_metadata = internship_features.shared_state()
+        features = SharedArrays(arrays)
+        published = [features]
+        futures = []
+        try:
+            metadata = {"features": feature_metadata, "chunk_size": self.score_matrix.chunk_size}
+            pool = shard_pool.get(self.workers)
+            shards = self.shards(len(students))
+            for shard in shards:
+                # Each shard's skills are encoded just before it is submitted,
+                # so the first shard starts scoring while the rest of the
+                # cohort is still being encoded.
+                skills, skill_metadata = self.publish_skills(students[shard])
+                published.append(skills)
+                futures.append(pool.submit(
+                    func,
+                    {**features.specs, **skills.specs},
+                    {**metadata, **skill_metadata},
+                    students[shard],
+                    params
+                ))
+            logger.info(
+                f"Published {sum(shared.nbytes for shared in published) / 1e6:.1f} MB "
+                f"to shared memory for {len(students)} students"
+            )
+            yield shards, futures
+        finally:
+            settle(futures)
+            for shared in published:
+                shared.release()
+
+    def iter_match(
+        self,
+        students: List[StudentProfile],
+        internships: List[InternshipOpportunity],
+        max_matches: int = 10,
+        min_score: float = 0.5,
+        diversity_boost: bool = True,
+        internship_features: Optional[InternshipFeatures] = None,
+        candidate_depth: Optional[int] = None,
+        tiled: Optional[bool] = None,
+        explain: bool = True
+    ) -> Iterator[List[Tuple[StudentProfile, List[MatchScore]]]]:
+        if internship_features is None:
+            if not internships:
+                yield [(student, []) for student in students]
+                return
+            internship_features = self.score_matrix.build_internship_features(internships)
+
+        params = {
+            "max_matches": max_matches,
+            "min_score": min_score,
+            "diversity_boost": diversity_boost,
+            "candidate_depth": candidate_depth,
+            "tiled": tiled,
+            "explain": explain
+        }
+        with self.dispatch(_match_shard, students, internship_features, params) as (shards, futures):
+            # Closed early when a streaming client disconnects.
+            for shard, future in zip(shards, futures):
+                results, stats = future.result()
+                _merge_shard_stats(stats)
+                yield list(zip(students[shard], results))
+
+    def top_k_edges(
+        self,
+        students: List[StudentProfile],
+        internships: List[InternshipOpportunity],
+        k: int,
+        min_score: float = 0.0,
+        diversity_boost: bool = True,
+        internship_features: Optional[InternshipFeatures] = None,
+        candidate_depth: Optional[int] = None
+    ) -> Tuple[InternshipFeatures, AllocationEdges]:
+        if internship_features is None:
+            internship_features = self.score_matrix.build_internship_features(internships)
+
+        params = {
+            "k": k,
+            "min_score": min_score,
+            "diversity_boost": diversity_boost,
+            "candidate_depth": candidate_depth
+        }
+        with self.dispatch(_edges_shard, students, internship_features, params) as (shards, futures):
+            parts = []
+            for future in futures:
+                part, stats = future.result()
+                _merge_shard_stats(stats)
+                parts.append(part)
+
+        edges = AllocationEdges(
+            np.concatenate([part[0] + shard.start for shard, part in zip(shards, parts)]),
+            np.concatenate([part[1] for part in parts]),
+            np.concatenate([part[2] for part in parts]),
+            len(students),
+            internship_features.remaining_capacity(),
+            priorities=np.concatenate([part[3] for part in parts])
+        )
+        return internship_features, edges
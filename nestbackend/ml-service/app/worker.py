@@ -0,0 +1,17 @@
+import asyncio
+from celery.signals import worker_process_init
+
+from app.core.model_manager import model_manager
+from app.services.jobs import job_manager
+
+# Run with JOB_BACKEND=celery:
+#   celery -A app.worker:celery_app worker --concurrency 2
+celery_app = job_manager.celery
+
+@worker_process_init.connect
+def load_models(**kwargs):
+    asyncio.run(model_manager.load_models())
+
+@celery_app.task(name="jobs.run")
+def run_job(job_id: str):
+    job_manager.run(job_id)
@@ -0,0 +1,64 @@
+import argparse
+import asyncio
+import json
+import time
+import tracemalloc
+
+from app.core.model_manager import ModelManager
+from app.services.matching_engine import MatchingEngine
+from benchmarks.synthetic import StubSkillEncoder, generate_population
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare allocation solvers on synthetic data")
+    parser.add_argument("--students", type=int, default=10000)
+    parser.add_argument("--internships", type=int, default=2000)
+    parser.add_argument("--top-k", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--solvers", nargs="+",
+        default=["greedy", "assignment", "deferred_acceptance"]
+    )
+    parser.add_argument("--real-encoder", action="store_true")
+    args = parser.parse_args()
+
+    model_manager = ModelManager()
+    if args.real_encoder:
+        asyncio.run(model_manager.load_models())
+    else:
+        model_manager.skill_encoder = StubSkillEncoder()
+    engine = MatchingEngine(model_manager)
+
+    students, internships = generate_population(args.students, args.internships, args.seed)
+    features = engine.score_matrix.build_internship_features(internships)
+
+    results = []
+    for solver in args.solvers:
+        tracemalloc.start()
+        start_time = time.perf_counter()
+        run = engine.allocate(
+            students,
+            internships,
+            internship_features=features,
+            solver=solver,
+            top_k=args.top_k
+        )
+        wall_time = time.perf_counter() - start_time
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        summary = run.model_dump(exclude={"allocation", "comparison"})
+        summary["wall_time_seconds"] = round(wall_time, 4)
+        summary["peak_traced_mb"] = round(peak / 2 ** 20, 1)
+        results.append(summary)
+
+    print(json.dumps({
+        "students": args.students,
+        "internships": args.internships,
+        "top_k": args.top_k,
+        "results": results
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
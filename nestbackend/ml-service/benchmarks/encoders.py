@@ -0,0 +1,140 @@
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+from pathlib import Path
+from typing import List
+
+from app.core.config import settings
+from app.core.memory import current_rss, peak_rss
+from app.core.skill_encoders import BACKENDS, load_skill_encoder
+from benchmarks.synthetic import SKILLS
+
+
+def read_vocabulary(path: str) -> List[str]:
+    # A text file with one skill per line, or a saved skill embedding cache,
+    # whose keys are the skills the service has actually seen.
+    if path.endswith(".npz"):
+        with np.load(path) as data:
+            return [str(key) for key in data["keys"]]
+    return [line.strip() for line in Path(path).read_text().splitlines() if line.strip()]
+
+
+def default_vocabulary() -> List[str]:
+    cache_file = Path(settings.MODEL_PATH) / settings.EMBEDDING_CACHE_FILE
+    return read_vocabulary(str(cache_file)) if cache_file.exists() else list(SKILLS)
+
+
+def measure(backend: str, vocabulary: List[str], repeat: int, output: str, spawned_at: float) -> dict:
+    # Runs in a fresh interpreter per backend, so RSS is not shared with
+    # other backends. Cold start runs from spawning the interpreter to the
+    # encoder being loaded, imports included.
+    base_rss = current_rss()
+    start_time = time.perf_counter()
+    encoder = load_skill_encoder(backend)
+    load_seconds = time.perf_counter() - start_time
+    cold_start_seconds = time.time() - spawned_at
+    loaded_rss = current_rss()
+
+    start_time = time.perf_counter()
+    encoder.encode(vocabulary[:1], convert_to_numpy=True)
+    first_encode_seconds = time.perf_counter() - start_time
+
+    timings = []
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        embeddings = encoder.encode(vocabulary, convert_to_numpy=True)
+        timings.append(time.perf_counter() - start_time)
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    embeddings /= np.clip(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12, None)
+    np.save(output, embeddings)
+
+    return {
+        "backend": backend,
+        "cold_start_seconds": round(cold_start_seconds, 3),
+        "load_seconds": round(load_seconds, 3),
+        "first_encode_seconds": round(first_encode_seconds, 4),
+        "skills_per_second": round(len(vocabulary) / min(timings), 1),
+        "model_rss_mb": round((loaded_rss - base_rss) / 2 ** 20, 1),
+        "peak_rss_mb": round(peak_rss() / 2 ** 20, 1)
+    }
+
+
+def drift(reference: np.ndarray, embeddings: np.ndarray) -> dict:
+    # Per-skill cosine against the torch vectors, and how far the
+    # skill-to-skill similarities that scoring relies on moved.
+    cosine = (reference * embeddings).sum(axis=1)
+    upper = np.triu_indices(len(reference), k=1)
+    reference_similarity = reference @ reference.T
+    similarity = embeddings @ embeddings.T
+    similarity_error = np.abs(similarity - reference_similarity)[upper]
+    np.fill_diagonal(reference_similarity, -np.inf)
+    np.fill_diagonal(similarity, -np.inf)
+    return {
+        "cosine_to_torch_mean": round(float(cosine.mean()), 6),
+        "cosine_to_torch_min": round(float(cosine.min()), 6),
+        "similarity_drift_mean": round(float(similarity_error.mean()), 6) if len(upper[0]) else 0.0,
+        "similarity_drift_max": round(float(similarity_error.max()), 6) if len(upper[0]) else 0.0,
+        "nearest_skill_agreement": round(float(
+            (similarity.argmax(axis=1) == reference_similarity.argmax(axis=1)).mean()
+        ), 4)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare skill encoder backends")
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS), choices=BACKENDS)
+    parser.add_argument("--vocabulary", default=None)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--measure", choices=BACKENDS, help=argparse.SUPPRESS)
+    parser.add_argument("--output", help=argparse.SUPPRESS)
+    parser.add_argument("--spawned-at", type=float, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    vocabulary = read_vocabulary(args.vocabulary) if args.vocabulary else default_vocabulary()
+    if args.measure:
+        print(json.dumps(measure(args.measure, vocabulary, args.repeat, args.output, args.spawned_at)))
+        return
+
+    results = []
+    embeddings = {}
+    with tempfile.TemporaryDirectory() as directory:
+        vocabulary_file = Path(directory) / "vocabulary.txt"
+        vocabulary_file.write_text("\n".join(vocabulary))
+        for backend in args.backends:
+            output = str(Path(directory) / f"{backend}.npy")
+            process = subprocess.run(
+                [
+                    sys.executable, "-m", "benchmarks.encoders",
+                    "--measure", backend,
+                    "--vocabulary", str(vocabulary_file),
+                    "--repeat", str(args.repeat),
+                    "--output", output,
+                    "--spawned-at", repr(time.time())
+                ],
+                capture_output=True,
+                text=True
+            )
+            if process.returncode:
+                error = process.stderr.strip().splitlines()
+                results.append({"backend": backend, "error": error[-1] if error else "failed"})
+                continue
+            results.append(json.loads(process.stdout.strip().splitlines()[-1]))
+            embeddings[backend] = np.load(output)
+
+    if "torch" in embeddings:
+        for result in results:
+            if result["backend"] in embeddings and result["backend"] != "torch":
+                result.update(drift(embeddings["torch"], embeddings[result["backend"]]))
+
+    print(json.dumps({
+        "skills": len(vocabulary),
+        "results": results
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
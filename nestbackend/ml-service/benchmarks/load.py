@@ -0,0 +1,384 @@
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+import httpx
+import numpy as np
+from collections import Counter, defaultdict
+from contextlib import asynccontextmanager
+from loguru import logger
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional
+
+from benchmarks.synthetic import StubSkillEncoder, generate_population
+
+SCENARIO_DIR = Path(__file__).parent / "scenarios"
+ENDPOINTS = {
+    "single": "/api/v1/matching/single",
+    "batch": "/api/v1/matching/batch",
+    "optimize": "/api/v1/matching/optimize",
+    "analytics": "/api/v1/analytics/generate"
+}
+CATALOG_ENDPOINT = "/api/v1/catalog/internships"
+
+
+class Sample(NamedTuple):
+    phase: str
+    endpoint: str
+    status: Optional[int]
+    latency: float
+    error: Optional[str]
+
+
+def load_scenario(name: str) -> dict:
+    # A path, or the name of a file in benchmarks/scenarios.
+    path = Path(name)
+    if not path.exists():
+        path = SCENARIO_DIR / f"{name}.json"
+    scenario = json.loads(path.read_text())
+    for phase in scenario["phases"]:
+        mix = phase.get("mix") or scenario.get("mix")
+        if not mix:
+            raise ValueError(f"Phase {phase['name']} has no traffic mix")
+        unknown = set(mix) - set(ENDPOINTS)
+        if unknown:
+            raise ValueError(f"Unknown endpoints in phase {phase['name']}: {', '.join(sorted(unknown))}")
+    return scenario
+
+
+def encode(body: dict) -> bytes:
+    return json.dumps(body).encode()
+
+
+async def build_payloads(
+    client: httpx.AsyncClient,
+    scenario: dict,
+    rng: np.random.Generator
+) -> Dict[str, List[bytes]]:
+    # Request bodies are built and serialised before the run, so the load
+    # generator spends its time sending rather than encoding. Each endpoint
+    # gets a pool of bodies for different random students.
+    population = scenario.get("population", {})
+    students, internships = generate_population(
+        population.get("students", 5000),
+        population.get("internships", 1000),
+        population.get("seed", 0)
+    )
+    students = [student.model_dump(mode="json") for student in students]
+    source = {"use_catalog": True}
+    if scenario.get("internships", "catalog") == "catalog":
+        response = await client.post(CATALOG_ENDPOINT, json={
+            "internships": [internship.model_dump(mode="json") for internship in internships]
+        })
+        response.raise_for_status()
+    else:
+        source = {"internships": [internship.model_dump(mode="json") for internship in internships]}
+
+    options = scenario.get("requests", {})
+    pool_size = scenario.get("distinct_payloads", 64)
+    used = {
+        endpoint for phase in scenario["phases"]
+        for endpoint in phase.get("mix") or scenario["mix"]
+    }
+
+    def cohort(size: int) -> List[dict]:
+        return [students[i] for i in rng.choice(len(students), size=min(size, len(students)), replace=False)]
+
+    def request_options(endpoint: str) -> dict:
+        return {k: v for k, v in options.get(endpoint, {}).items() if k != "students"}
+
+    payloads = {}
+    if "single" in used:
+        payloads["single"] = [
+            encode({"student": cohort(1)[0], **source, **request_options("single")})
+            for _ in range(pool_size)
+        ]
+    if "batch" in used:
+        size = options.get("batch", {}).get("students", 50)
+        payloads["batch"] = [
+            encode({"students": cohort(size), **source, **request_options("batch")})
+            for _ in range(pool_size)
+        ]
+    if "optimize" in used:
+        size = options.get("optimize", {}).get("students", 1000)
+        payloads["optimize"] = [
+            encode({"students": cohort(size), **source, **request_options("optimize")})
+            for _ in range(min(pool_size, 8))
+        ]
+    if "analytics" in used:
+        # Analytics takes match results, so they come from the target's own
+        # /batch responses.
+        size = options.get("analytics", {}).get("students", 200)
+        payloads["analytics"] = []
+        for _ in range(min(pool_size, 8)):
+            response = await client.post(ENDPOINTS["batch"], json={"students": cohort(size), **source})
+            response.raise_for_status()
+            payloads["analytics"].append(encode({"match_results": response.json()["results"]}))
+    return payloads
+
+
+def arrivals(phase: dict, rng: np.random.Generator):
+    # Poisson arrivals at the phase's rate, ramping linearly from `rps` to
+    # `ramp_to_rps` when given. Yields offsets from the start of the phase.
+    duration = phase["duration_seconds"]
+    start_rps = phase["rps"]
+    end_rps = phase.get("ramp_to_rps", start_rps)
+    offset = 0.0
+    while True:
+        rate = start_rps + (end_rps - start_rps) * offset / duration
+        offset += rng.exponential(1.0 / max(rate, 1e-6))
+        if offset >= duration:
+            return
+        yield offset
+
+
+class LoadRun:
+    # Open-loop load: requests are sent on schedule whether or not earlier
+    # ones have finished, and latency is measured from the scheduled time,
+    # so a slow server shows up as latency rather than as fewer requests.
+    # Requests beyond `max_in_flight` are dropped and counted.
+
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        payloads: Dict[str, List[bytes]],
+        max_in_flight: int,
+        timeout: float
+    ):
+        self.client = client
+        self.payloads = payloads
+        self.max_in_flight = max_in_flight
+        self.timeout = timeout
+        self.samples: List[Sample] = []
+        self.dropped: Counter = Counter()
+        self.in_flight = 0
+        self._tasks = set()
+
+    async def send(self, phase: str, endpoint: str, body: bytes, scheduled_at: float):
+        status, error = None, None
+        try:
+            response = await self.client.post(
+                ENDPOINTS[endpoint],
+                content=body,
+                headers={"Content-Type": "application/json"},
+                timeout=self.timeout
+            )
+            status = response.status_code
+        except Exception as e:
+            error = type(e).__name__
+        finally:
+            self.in_flight -= 1
+        self.samples.append(Sample(phase, endpoint, status, time.perf_counter() - scheduled_at, error))
+
+    async def run_phase(self, phase: dict, mix: dict, rng: np.random.Generator):
+        endpoints = list(mix)
+        weights = np.array([mix[endpoint] for endpoint in endpoints], dtype=float)
+        weights /= weights.sum()
+        started_at = time.perf_counter()
+        for offset in arrivals(phase, rng):
+            scheduled_at = started_at + offset
+            delay = scheduled_at - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            endpoint = endpoints[rng.choice(len(endpoints), p=weights)]
+            if self.in_flight >= self.max_in_flight:
+                self.dropped[(phase["name"], endpoint)] += 1
+                continue
+            pool = self.payloads[endpoint]
+            self.in_flight += 1
+            task = asyncio.create_task(
+                self.send(phase["name"], endpoint, pool[rng.integers(len(pool))], scheduled_at)
+            )
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def drain(self):
+        if self._tasks:
+            await asyncio.gather(*self._tasks)
+
+
+def percentile(latencies: np.ndarray, q: float) -> Optional[float]:
+    return round(float(np.percentile(latencies, q)) * 1000, 2) if len(latencies) else None
+
+
+def summarise(samples: List[Sample], dropped: int, elapsed: float) -> dict:
+    # Errors are transport failures and non-2xx responses; latency
+    # percentiles cover every response the server sent.
+    statuses = Counter(
+        str(sample.status) if sample.status is not None else sample.error for sample in samples
+    )
+    ok = [sample for sample in samples if sample.status is not None and sample.status < 300]
+    errors = len(samples) - len(ok)
+    latencies = np.array([sample.latency for sample in samples if sample.status is not None])
+    return {
+        "requests": len(samples) + dropped,
+        "completed": len(ok),
+        "errors": errors,
+        "dropped": dropped,
+        "error_rate": round(errors / len(samples), 4) if samples else 0.0,
+        "throughput_rps": round(len(ok) / elapsed, 2) if elapsed else 0.0,
+        "status_codes": dict(statuses),
+        "latency_ms": {
+            "p50": percentile(latencies, 50),
+            "p95": percentile(latencies, 95),
+            "p99": percentile(latencies, 99),
+            "max": round(float(latencies.max()) * 1000, 2) if len(latencies) else None,
+            "mean": round(float(latencies.mean()) * 1000, 2) if len(latencies) else None
+        }
+    }
+
+
+def report(run: LoadRun, scenario: dict, phase_times: Dict[str, float], elapsed: float) -> dict:
+    by_endpoint = defaultdict(list)
+    by_phase = defaultdict(list)
+    for sample in run.samples:
+        by_endpoint[sample.endpoint].append(sample)
+        by_phase[sample.phase].append(sample)
+
+    def dropped(phase: Optional[str] = None, endpoint: Optional[str] = None) -> int:
+        return sum(
+            count for (dropped_phase, dropped_endpoint), count in run.dropped.items()
+            if phase in (None, dropped_phase) and endpoint in (None, dropped_endpoint)
+        )
+
+    phases = {}
+    for phase in scenario["phases"]:
+        name = phase["name"]
+        samples = by_phase[name]
+        endpoints = sorted({sample.endpoint for sample in samples})
+        phases[name] = {
+            "target_rps": phase["rps"] if "ramp_to_rps" not in phase else [phase["rps"], phase["ramp_to_rps"]],
+            **summarise(samples, dropped(name), phase_times[name]),
+            "endpoints": {
+                endpoint: summarise(
+                    [sample for sample in samples if sample.endpoint == endpoint],
+                    dropped(name, endpoint),
+                    phase_times[name]
+                )
+                for endpoint in endpoints
+            }
+        }
+    return {
+        "scenario": scenario["name"],
+        "duration_seconds": round(elapsed, 2),
+        "overall": summarise(run.samples, dropped(), elapsed),
+        "endpoints": {
+            endpoint: summarise(samples, dropped(endpoint=endpoint), elapsed)
+            for endpoint, samples in sorted(by_endpoint.items())
+        },
+        "phases": phases
+    }
+
+
+def use_stub_encoder():
+    # In-process runs can use the deterministic stub encoder instead of the
+    # transformer. Its vectors are kept out of the saved embedding cache.
+    from app.core.model_manager import model_manager
+
+    def load():
+        model_manager.skill_encoder = StubSkillEncoder()
+
+    model_manager.load = load
+    model_manager.embedding_cache.path = None
+
+
+@asynccontextmanager
+async def open_client(url: Optional[str], api_key: Optional[str]):
+    headers = {}
+    if url:
+        if api_key:
+            headers["X-API-Key"] = api_key
+        limits = httpx.Limits(max_connections=None)
+        async with httpx.AsyncClient(base_url=url, headers=headers, limits=limits) as client:
+            yield client
+        return
+
+    # In-process: the app runs on this event loop behind the ASGI transport,
+    # with its lifespan, so models load and executors start as in uvicorn.
+    from app.core.config import settings
+    from app.main import app
+
+    # The app sets up INFO logging to stdout on import; per-request logs
+    # would compete with it for the loop and mix with the report.
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+    headers["X-API-Key"] = api_key or settings.API_KEY
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", headers=headers) as client:
+            yield client
+
+
+async def wait_until_ready(client: httpx.AsyncClient, timeout: float):
+    deadline = time.perf_counter() + timeout
+    while True:
+        response = await client.get("/api/v1/ready")
+        if response.status_code == 200:
+            return
+        if response.json().get("status") == "failed" or time.perf_counter() > deadline:
+            raise RuntimeError(f"Service did not become ready: {response.text}")
+        await asyncio.sleep(0.5)
+
+
+async def run_scenario(
+    scenario: dict,
+    url: Optional[str],
+    api_key: Optional[str],
+    seed: int,
+    max_in_flight: int,
+    timeout: float
+) -> dict:
+    rng = np.random.default_rng(seed)
+    async with open_client(url, api_key) as client:
+        await wait_until_ready(client, timeout)
+        payloads = await build_payloads(client, scenario, rng)
+        run = LoadRun(client, payloads, max_in_flight, timeout)
+        phase_times = {}
+        started_at = time.perf_counter()
+        for phase in scenario["phases"]:
+            print(f"Running phase {phase['name']}...", file=sys.stderr)
+            phase_started_at = time.perf_counter()
+            await run.run_phase(phase, phase.get("mix") or scenario["mix"], rng)
+            phase_times[phase["name"]] = time.perf_counter() - phase_started_at
+        await run.drain()
+        elapsed = time.perf_counter() - started_at
+    return report(run, scenario, phase_times, elapsed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a traffic scenario against the service")
+    parser.add_argument("scenario", help="Scenario file, or the name of one in benchmarks/scenarios")
+    parser.add_argument("--url", default=None, help="Base URL of a running service; in-process if omitted")
+    parser.add_argument("--api-key", default=os.environ.get("API_KEY"))
+    parser.add_argument("--real-encoder", action="store_true")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-in-flight", type=int, default=1000)
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--rps-scale", type=float, default=1.0)
+    parser.add_argument("--output", type=Path, default=None)
+    args = parser.parse_args()
+
+    scenario = load_scenario(args.scenario)
+    for phase in scenario["phases"]:
+        phase["rps"] *= args.rps_scale
+        if "ramp_to_rps" in phase:
+            phase["ramp_to_rps"] *= args.rps_scale
+
+    if not args.url and not args.real_encoder:
+        use_stub_encoder()
+
+    result = asyncio.run(run_scenario(
+        scenario, args.url, args.api_key, args.seed, args.max_in_flight, args.timeout
+    ))
+    result["target"] = args.url or "in-process"
+    result["rps_scale"] = args.rps_scale
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(result, indent=2))
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
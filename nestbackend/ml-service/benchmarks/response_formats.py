@@ -0,0 +1,111 @@
+import argparse
+import asyncio
+import json
+import time
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from app.core import response_formats
+from app.core.model_manager import ModelManager
+from app.core.response_formats import encode_batch_response
+from app.models.schemas import BatchMatchResponse, MatchResult
+from app.services.matching_engine import MatchingEngine
+from benchmarks.synthetic import StubSkillEncoder, generate_population
+
+
+def pydantic_json(response: BatchMatchResponse) -> bytes:
+    # What FastAPI does for a route with response_model=BatchMatchResponse.
+    field = create_response_field(name="response", type_=BatchMatchResponse)
+    content = asyncio.run(serialize_response(field=field, response_content=response))
+    return JSONResponse(content).body
+
+
+def decoders() -> dict:
+    decode = {
+        "pydantic_json": json.loads,
+        response_formats.JSON: json.loads,
+        response_formats.COLUMNAR_JSON: (
+            response_formats.orjson.loads if response_formats.orjson is not None else json.loads
+        )
+    }
+    if response_formats.msgpack is not None:
+        decode[response_formats.MSGPACK] = response_formats.msgpack.unpackb
+    if response_formats.pa is not None:
+        decode[response_formats.ARROW] = lambda body: response_formats.pa.ipc.open_stream(body).read_all()
+    return decode
+
+
+def best_of(func, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start_time)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare batch response encodings on synthetic data")
+    parser.add_argument("--students", type=int, default=5000)
+    parser.add_argument("--internships", type=int, default=2000)
+    parser.add_argument("--max-matches", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--no-explanations", action="store_true")
+    args = parser.parse_args()
+
+    model_manager = ModelManager()
+    model_manager.skill_encoder = StubSkillEncoder()
+    engine = MatchingEngine(model_manager)
+
+    students, internships = generate_population(args.students, args.internships, args.seed)
+    matches = engine.batch_match(
+        students,
+        internships,
+        max_matches_per_student=args.max_matches,
+        min_score=0.0,
+        explain=not args.no_explanations
+    )
+    response = BatchMatchResponse(
+        results=[
+            MatchResult(
+                student_id=s.student_id,
+                student_name=s.name,
+                matches=matches[s.student_id],
+                total_matches=len(matches[s.student_id])
+            )
+            for s in students
+        ],
+        total_students_processed=len(students),
+        total_matches_generated=sum(len(m) for m in matches.values()),
+        processing_time_seconds=0.0
+    )
+
+    encoders = {"pydantic_json": lambda: pydantic_json(response)}
+    for media_type in decoders():
+        if media_type != "pydantic_json":
+            encoders[media_type] = lambda m=media_type: encode_batch_response(response, m).body
+
+    results = []
+    for media_type, decode in decoders().items():
+        body = encoders[media_type]()
+        results.append({
+            "format": media_type,
+            "bytes": len(body),
+            "encode_seconds": round(best_of(encoders[media_type], args.repeat), 4),
+            "decode_seconds": round(best_of(lambda: decode(body), args.repeat), 4)
+        })
+
+    print(json.dumps({
+        "students": args.students,
+        "internships": args.internships,
+        "matches": response.total_matches_generated,
+        "explanations": not args.no_explanations,
+        "results": results
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,280 @@
+import argparse
+import asyncio
+import json
+import platform
+import subprocess
+import sys
+import time
+import numpy as np
+from datetime import datetime, timezone
+from loguru import logger
+from pathlib import Path
+from typing import List, Optional
+
+from app.core.config import settings
+from app.core.memory import current_rss, peak_rss
+from app.core.model_manager import ModelManager
+from app.models.schemas import MatchResult
+from app.services.analytics_service import AnalyticsService
+from app.services.matching_engine import MatchingEngine
+from benchmarks.synthetic import StubSkillEncoder, generate_population
+
+# Students and internships per scale.
+SCALES = {
+    "1k": (1000, 200),
+    "10k": (10000, 2000),
+    "100k": (100000, 10000)
+}
+CASES = ("batch", "allocation", "analytics")
+SOLVERS = ("greedy", "assignment", "deferred_acceptance")
+RESULTS_DIR = Path(__file__).parent / "results"
+
+# Metrics compared between runs, and whether a higher value is better.
+COMPARED = {
+    "wall_seconds": False,
+    "pairs_per_second": True,
+    "peak_rss_mb": False,
+    "allocation_rate": True,
+    "average_score": True,
+    "blocking_pairs": False,
+    "average_top_score": True
+}
+QUALITY_METRICS = ("allocation_rate", "average_score", "blocking_pairs", "average_top_score")
+
+
+def git_commit() -> Optional[str]:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+        dirty = subprocess.run(["git", "diff", "--quiet", "HEAD"]).returncode != 0
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return f"{commit}-dirty" if dirty else commit
+
+
+def environment() -> dict:
+    return {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "processor": platform.processor() or None,
+        "settings": {
+            name: getattr(settings, name)
+            for name in (
+                "SCORING_MODE", "SCORING_CHUNK_SIZE", "SCORE_PRUNING", "TILE_DTYPE",
+                "CANDIDATE_RETRIEVAL", "SHARD_WORKERS", "ALLOCATION_TOP_K"
+            )
+        }
+    }
+
+
+def best_of(func, repeat: int) -> tuple:
+    # Fastest of `repeat` runs, with that run's result.
+    best = None
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        value = func()
+        wall_time = time.perf_counter() - start_time
+        if best is None or wall_time < best[0]:
+            best = wall_time, value
+    return best
+
+
+def measure(
+    case: str,
+    scale: str,
+    seed: int,
+    solvers: List[str],
+    top_k: int,
+    repeat: int,
+    real_encoder: bool
+) -> List[dict]:
+    # Runs in a fresh interpreter per case and scale, so peak RSS belongs
+    # to that case alone. Generating the population is not timed.
+    model_manager = ModelManager()
+    if real_encoder:
+        asyncio.run(model_manager.load_models())
+    else:
+        model_manager.skill_encoder = StubSkillEncoder()
+    engine = MatchingEngine(model_manager)
+
+    num_students, num_internships = SCALES[scale]
+    students, internships = generate_population(num_students, num_internships, seed)
+    base_rss = current_rss()
+    pairs = num_students * num_internships
+
+    def result(**values) -> dict:
+        values["peak_rss_mb"] = round(peak_rss() / 2 ** 20, 1)
+        values["rss_growth_mb"] = round((peak_rss() - base_rss) / 2 ** 20, 1)
+        return {
+            "case": case,
+            "scale": scale,
+            "students": num_students,
+            "internships": num_internships,
+            **values
+        }
+
+    if case == "batch":
+        wall_time, matches = best_of(lambda: engine.batch_match(students, internships), repeat)
+        top_scores = [found[0].overall_score for found in matches.values() if found]
+        return [result(
+            wall_seconds=round(wall_time, 4),
+            pairs_per_second=round(pairs / wall_time),
+            matches=sum(len(found) for found in matches.values()),
+            students_matched=len(top_scores),
+            average_top_score=round(float(np.mean(top_scores)), 6) if top_scores else 0.0
+        )]
+
+    if case == "analytics":
+        matches = engine.batch_match(students, internships)
+        match_results = [
+            MatchResult(
+                student_id=student.student_id,
+                student_name=student.name,
+                matches=matches.get(student.student_id, []),
+                total_matches=len(matches.get(student.student_id, []))
+            )
+            for student in students
+        ]
+        wall_time, _ = best_of(lambda: AnalyticsService.generate_analytics(match_results), repeat)
+        return [result(
+            wall_seconds=round(wall_time, 4),
+            matches=sum(match_result.total_matches for match_result in match_results)
+        )]
+
+    features = engine.score_matrix.build_internship_features(internships)
+    results = []
+    for solver in solvers:
+        wall_time, run = best_of(lambda: engine.allocate(
+            students, internships, internship_features=features, solver=solver, top_k=top_k
+        ), repeat)
+        results.append(result(
+            solver=solver,
+            wall_seconds=round(wall_time, 4),
+            pairs_per_second=round(pairs / run.scoring_time_seconds) if run.scoring_time_seconds else None,
+            scoring_seconds=round(run.scoring_time_seconds, 4),
+            solve_seconds=round(run.solve_time_seconds, 4),
+            allocated=run.total_allocated,
+            allocation_rate=run.allocation_rate,
+            total_score=run.total_score,
+            average_score=run.average_score,
+            blocking_pairs=run.blocking_pairs
+        ))
+    return results
+
+
+def run_key(result: dict) -> tuple:
+    return result["scale"], result["case"], result.get("solver")
+
+
+def compare(baseline: dict, current: dict, tolerance: float) -> List[dict]:
+    # A metric regresses when it moves the wrong way by more than
+    # `tolerance` of the baseline. Quality metrics on seeded data are
+    # deterministic, so any worsening of those counts.
+    previous = {run_key(result): result for result in baseline["results"]}
+    rows = []
+    for result in current["results"]:
+        before = previous.get(run_key(result))
+        if before is None or "error" in result or "error" in before:
+            continue
+        for metric, higher_is_better in COMPARED.items():
+            old, new = before.get(metric), result.get(metric)
+            if old is None or new is None:
+                continue
+            # Relative change, or the absolute one from a zero baseline.
+            change = (new - old) / old if old else new - old
+            worse = -change if higher_is_better else change
+            allowed = 1e-9 if metric in QUALITY_METRICS else tolerance
+            rows.append({
+                "scale": result["scale"],
+                "case": result["case"],
+                "solver": result.get("solver"),
+                "metric": metric,
+                "baseline": old,
+                "current": new,
+                "change_percent": round(change * 100, 2) if old else None,
+                "regression": worse > allowed
+            })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark matching, allocation and analytics at scale")
+    parser.add_argument("--scales", nargs="+", default=list(SCALES), choices=SCALES)
+    parser.add_argument("--cases", nargs="+", default=list(CASES), choices=CASES)
+    parser.add_argument("--solvers", nargs="+", default=list(SOLVERS), choices=SOLVERS)
+    parser.add_argument("--top-k", type=int, default=settings.ALLOCATION_TOP_K)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--real-encoder", action="store_true")
+    parser.add_argument("--output", type=Path, default=None)
+    parser.add_argument("--compare", type=Path, default=None)
+    parser.add_argument("--tolerance", type=float, default=0.1)
+    parser.add_argument("--measure", choices=CASES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    # Per-student match logging would dominate the timings.
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+
+    if args.measure:
+        print(json.dumps(measure(
+            args.measure, args.scales[0], args.seed, args.solvers, args.top_k, args.repeat,
+            args.real_encoder
+        )))
+        return
+
+    results = []
+    for scale in args.scales:
+        for case in args.cases:
+            command = [
+                sys.executable, "-m", "benchmarks.suite",
+                "--measure", case,
+                "--scales", scale,
+                "--solvers", *args.solvers,
+                "--top-k", str(args.top_k),
+                "--seed", str(args.seed),
+                "--repeat", str(args.repeat)
+            ]
+            if args.real_encoder:
+                command.append("--real-encoder")
+            print(f"Running {case} at {scale}...", file=sys.stderr)
+            process = subprocess.run(command, capture_output=True, text=True)
+            if process.returncode:
+                error = process.stderr.strip().splitlines()
+                results.append({
+                    "case": case, "scale": scale, "error": error[-1] if error else "failed"
+                })
+                continue
+            results.extend(json.loads(process.stdout.strip().splitlines()[-1]))
+
+    report = {
+        **environment(),
+        "seed": args.seed,
+        "top_k": args.top_k,
+        "repeat": args.repeat,
+        "encoder": "real" if args.real_encoder else "stub",
+        "results": results
+    }
+    output = args.output or RESULTS_DIR / f"{report['commit'] or 'results'}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(f"Wrote {output}", file=sys.stderr)
+
+    if args.compare:
+        rows = compare(json.loads(args.compare.read_text()), report, args.tolerance)
+        report["comparison"] = {
+            "baseline": str(args.compare),
+            "regressions": [row for row in rows if row["regression"]],
+            "metrics": rows
+        }
+    print(json.dumps(report, indent=2))
+    if args.compare and report["comparison"]["regressions"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
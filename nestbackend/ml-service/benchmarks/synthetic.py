@@ -0,0 +1,200 @@
+import hashlib
+import numpy as np
+from typing import List, Sequence, Tuple
+
+from app.models.schemas import (
+    StudentProfile, InternshipOpportunity,
+    QualificationLevel, SocialCategory, DistrictType
+)
+
+# Most to least common; skills are drawn with Zipf weights by rank, so a few
+# appear in most profiles and postings and the long tail is rare.
+SKILLS = [
+    "Communication", "Excel", "Python", "Data Analysis", "SQL", "Java",
+    "Machine Learning", "Sales", "Marketing", "Accounting", "Tally",
+    "Public Speaking", "Content Writing", "Customer Service", "Teamwork",
+    "C++", "JavaScript", "React", "Node.js", "HTML", "CSS", "Power BI",
+    "Tableau", "Operations", "Digital Marketing", "SEO", "Social Media",
+    "Graphic Design", "Photoshop", "AutoCAD", "SolidWorks", "MATLAB",
+    "Embedded Systems", "IoT", "Cloud Computing", "AWS", "Azure", "Docker",
+    "Kubernetes", "Linux", "Networking", "Cyber Security", "Android", "Kotlin",
+    "Flutter", "Django", "Spring Boot", "Deep Learning", "NLP",
+    "Computer Vision", "Statistics", "R", "Financial Modelling", "GST",
+    "Auditing", "Taxation", "Supply Chain", "Logistics", "Procurement",
+    "Inventory Management", "Quality Control", "Six Sigma", "Lean Manufacturing",
+    "PLC Programming", "Electrical Design", "Civil Engineering", "Surveying",
+    "Project Management", "Agile", "Business Analysis", "Market Research",
+    "Recruitment", "HR Operations", "Payroll", "Event Management",
+    "Hindi Translation", "Video Editing", "UI Design", "Figma",
+    "Research", "Report Writing", "Field Work", "Data Entry",
+    "Clinical Research", "Pharmacovigilance", "Lab Techniques", "Nursing",
+    "Agronomy", "Soil Testing", "Renewable Energy", "Solar PV Design",
+    "Banking Operations", "Credit Analysis", "Insurance", "Retail Operations",
+    "Visual Merchandising", "Hospitality", "Journalism", "Photography",
+    "Teaching", "Counselling", "Legal Research", "Contract Drafting"
+]
+SKILL_ZIPF_EXPONENT = 1.1
+
+# Largest metros first, weighted roughly by urban population. Satellite
+# towns such as Navi Mumbai partially match their metro in location scoring.
+CITIES = [
+    "Delhi", "Mumbai", "Bengaluru", "Hyderabad", "Chennai", "Kolkata", "Pune",
+    "Ahmedabad", "Surat", "Jaipur", "Lucknow", "Kanpur", "Nagpur", "Indore",
+    "Bhopal", "Patna", "Vadodara", "Ludhiana", "Coimbatore", "Kochi",
+    "Visakhapatnam", "Bhubaneswar", "Chandigarh", "Guwahati", "Ranchi",
+    "Raipur", "Dehradun", "Noida", "Gurugram", "Navi Mumbai", "New Delhi",
+    "Mysuru", "Madurai", "Varanasi", "Agra", "Nashik", "Jodhpur", "Srinagar"
+]
+CITY_ZIPF_EXPONENT = 0.9
+
+SECTORS = [
+    "Technology", "Finance", "Manufacturing", "Healthcare", "Retail", "Energy",
+    "Education", "Agriculture", "Logistics", "Media", "Government", "Automotive",
+    "Pharmaceuticals", "Telecom", "Hospitality", "Infrastructure"
+]
+SECTOR_ZIPF_EXPONENT = 0.7
+
+FIELDS_OF_STUDY = [
+    "Engineering", "Commerce", "Computer Science", "Science", "Arts",
+    "Management", "Pharmacy", "Agriculture", "Law", "Design"
+]
+
+# Approximate shares among applicants to the scheme.
+QUALIFICATION_MIX = {
+    QualificationLevel.DIPLOMA: 0.22,
+    QualificationLevel.UNDERGRADUATE: 0.58,
+    QualificationLevel.POSTGRADUATE: 0.18,
+    QualificationLevel.DOCTORATE: 0.02
+}
+SOCIAL_CATEGORY_MIX = {
+    SocialCategory.GENERAL: 0.28,
+    SocialCategory.OBC: 0.40,
+    SocialCategory.SC: 0.17,
+    SocialCategory.ST: 0.08,
+    SocialCategory.EWS: 0.07
+}
+DISTRICT_TYPE_MIX = {
+    DistrictType.URBAN: 0.38,
+    DistrictType.RURAL: 0.47,
+    DistrictType.ASPIRATIONAL: 0.15
+}
+LANGUAGES = ["English", "Hindi", "Tamil", "Telugu", "Bengali", "Marathi", "Kannada", "Gujarati"]
+
+
+class StubSkillEncoder:
+    # Deterministic stand-in for SentenceTransformer: each text maps to a
+    # fixed pseudo-random unit vector derived from its hash.
+
+    def __init__(self, dimension: int = 384):
+        self.dimension = dimension
+
+    def encode(self, sentences, convert_to_numpy: bool = True, **kwargs) -> np.ndarray:
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        vectors = np.empty((len(texts), self.dimension), dtype=np.float32)
+        for row, text in enumerate(texts):
+            seed = int.from_bytes(hashlib.sha1(text.encode()).digest()[:8], "little")
+            vectors[row] = np.random.default_rng(seed).standard_normal(self.dimension)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors[0] if single else vectors
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.dimension
+
+
+def zipf_weights(count: int, exponent: float) -> np.ndarray:
+    weights = 1.0 / np.arange(1, count + 1) ** exponent
+    return weights / weights.sum()
+
+
+def sample_sets(
+    rng: np.random.Generator,
+    items: Sequence[str],
+    weights: np.ndarray,
+    sizes: np.ndarray
+) -> List[List[str]]:
+    # Weighted sampling without replacement for every row at once: the
+    # Gumbel top-k trick keeps the `size` largest of log(weight) + noise.
+    keys = np.log(weights) + rng.gumbel(size=(len(sizes), len(items)))
+    order = np.argsort(-keys, axis=1)
+    return [[items[i] for i in row[:size]] for row, size in zip(order, sizes)]
+
+
+def choose(rng: np.random.Generator, mix: dict, size: int) -> list:
+    members = list(mix)
+    picks = rng.choice(len(members), size=size, p=np.array(list(mix.values())))
+    return [members[i] for i in picks]
+
+
+def generate_population(
+    num_students: int,
+    num_internships: int,
+    seed: int = 0
+) -> Tuple[List[StudentProfile], List[InternshipOpportunity]]:
+    rng = np.random.default_rng(seed)
+    skill_weights = zipf_weights(len(SKILLS), SKILL_ZIPF_EXPONENT)
+    city_weights = zipf_weights(len(CITIES), CITY_ZIPF_EXPONENT)
+    sector_weights = zipf_weights(len(SECTORS), SECTOR_ZIPF_EXPONENT)
+
+    student_skills = sample_sets(rng, SKILLS, skill_weights, rng.integers(2, 9, num_students))
+    preferences = sample_sets(rng, CITIES, city_weights, rng.integers(1, 4, num_students))
+    interests = sample_sets(rng, SECTORS, sector_weights, rng.integers(1, 4, num_students))
+    languages = sample_sets(rng, LANGUAGES, zipf_weights(len(LANGUAGES), 1.0), rng.integers(1, 4, num_students))
+    qualifications = choose(rng, QUALIFICATION_MIX, num_students)
+    categories = choose(rng, SOCIAL_CATEGORY_MIX, num_students)
+    districts = choose(rng, DISTRICT_TYPE_MIX, num_students)
+    fields = rng.integers(0, len(FIELDS_OF_STUDY), num_students)
+    cgpas = np.clip(rng.normal(7.2, 1.1, num_students), 4.0, 10.0).round(1)
+    past = rng.choice([0, 1, 2, 3], size=num_students, p=[0.6, 0.25, 0.1, 0.05])
+
+    students = [
+        StudentProfile(
+            student_id=f"S{index:07d}",
+            name=f"Student {index}",
+            skills=student_skills[index],
+            qualification=qualifications[index],
+            field_of_study=FIELDS_OF_STUDY[fields[index]],
+            cgpa=float(cgpas[index]),
+            location_preference=preferences[index],
+            sector_interests=interests[index],
+            social_category=categories[index],
+            district_type=districts[index],
+            past_internships=int(past[index]),
+            languages=languages[index]
+        )
+        for index in range(num_students)
+    ]
+
+    # Postings concentrate in the metros more than applicants do.
+    required_skills = sample_sets(rng, SKILLS, skill_weights, rng.integers(1, 6, num_internships))
+    locations = rng.choice(len(CITIES), size=num_internships, p=zipf_weights(len(CITIES), 1.3))
+    sectors = rng.choice(len(SECTORS), size=num_internships, p=sector_weights)
+    preferred = choose(rng, {
+        QualificationLevel.DIPLOMA: 0.25,
+        QualificationLevel.UNDERGRADUATE: 0.6,
+        QualificationLevel.POSTGRADUATE: 0.15
+    }, num_internships)
+    capacities = np.minimum(rng.geometric(0.3, num_internships), 25)
+    min_cgpas = rng.choice([0.0, 6.0, 6.5, 7.0, 8.0], size=num_internships, p=[0.4, 0.25, 0.15, 0.15, 0.05])
+    stipends = rng.choice([5000.0, 8000.0, 10000.0, 15000.0, 20000.0], size=num_internships)
+    durations = rng.choice([2, 3, 6, 12], size=num_internships, p=[0.1, 0.4, 0.4, 0.1])
+
+    internships = [
+        InternshipOpportunity(
+            internship_id=f"I{index:06d}",
+            company_name=f"Company {index % 500}",
+            title=f"{SECTORS[sectors[index]]} Intern",
+            description="Synthetic posting",
+            required_skills=required_skills[index],
+            preferred_qualification=preferred[index],
+            sector=SECTORS[sectors[index]],
+            location=CITIES[locations[index]],
+            stipend=float(stipends[index]),
+            duration_months=int(durations[index]),
+            capacity=int(capacities[index]),
+            min_cgpa=float(min_cgpas[index])
+        )
+        for index in range(num_internships)
+    ]
+
+    return students, internships
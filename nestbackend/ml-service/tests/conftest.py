@@ -0,0 +1,38 @@
+import pytest
+from loguru import logger
+
+from app.core.config import settings
+from app.core.model_manager import ModelManager
+from app.services.matching_engine import MatchingEngine
+from benchmarks.synthetic import StubSkillEncoder, generate_population
+
+
+@pytest.fixture(autouse=True)
+def quiet_logs():
+    # The engine logs a line per student.
+    logger.remove()
+    yield
+
+
+@pytest.fixture
+def model_manager(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "MODEL_PATH", str(tmp_path / "models"))
+    manager = ModelManager()
+    manager.skill_encoder = StubSkillEncoder()
+    return manager
+
+
+@pytest.fixture
+def engine(model_manager):
+    return MatchingEngine(model_manager)
+
+
+@pytest.fixture(scope="session")
+def population():
+    return generate_population(120, 60, seed=7)
+
+
+@pytest.fixture(scope="session")
+def small_population():
+    # Small enough for the pairwise path.
+    return generate_population(24, 30, seed=11)
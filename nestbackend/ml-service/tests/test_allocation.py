@@ -0,0 +1,99 @@
+import pytest
+from collections import Counter
+
+from app.services.allocation_session import AllocationSession, AllocationSessionStore
+from benchmarks.synthetic import generate_population
+
+
+@pytest.fixture
+def allocations(engine, population):
+    students, internships = population
+    return {
+        solver: engine.allocate(students, internships, solver=solver, top_k=10)
+        for solver in ("greedy", "assignment", "deferred_acceptance")
+    }
+
+
+def test_deferred_acceptance_is_stable(allocations):
+    run = allocations["deferred_acceptance"]
+    assert run.total_allocated > 0
+    assert run.blocking_pairs == 0
+
+
+def test_assignment_scores_at_least_greedy(allocations):
+    assert allocations["assignment"].total_score >= allocations["greedy"].total_score - 1e-6
+
+
+def test_allocations_respect_capacity(allocations, population):
+    _, internships = population
+    seats = {i.internship_id: i.capacity - i.filled_positions for i in internships}
+    for run in allocations.values():
+        for internship_id, taken in Counter(run.allocation.values()).items():
+            assert taken <= seats[internship_id]
+
+
+def test_session_events_agree_with_deferred_acceptance(engine, population):
+    students, internships = population
+    features = engine.score_matrix.build_internship_features(internships)
+    session = AllocationSession("test", engine.score_matrix, features, top_k=10)
+    for start in range(0, len(students), 30):
+        session.add_students(students[start:start + 30])
+    session.withdraw(students[0].student_id)
+    session.update_capacity(internships[0].internship_id, capacity=1)
+
+    incremental = session.allocation()
+    result = session.reoptimize("deferred_acceptance")
+    assert result["changes"] == {}
+    assert session.allocation() == incremental
+
+
+@pytest.fixture
+def crowded_session(engine):
+    # One seat per internship and short preference lists, so students
+    # re-added with different skills leave waitlist entries behind at
+    # internships no longer on their lists.
+    students, internships = generate_population(300, 20, seed=3)
+    for internship in internships:
+        internship.capacity = 1
+    features = engine.score_matrix.build_internship_features(internships)
+    session = AllocationSession("test", engine.score_matrix, features, top_k=3)
+    session.add_students(students)
+    for position, student in enumerate(students[::7]):
+        skills = ["Nursing", "Agronomy"] if position % 2 else ["Python", "SQL"]
+        session.add_students([student.model_copy(update={"skills": skills})])
+    return session
+
+
+def test_session_survives_readded_students(crowded_session):
+    for student_id in list(crowded_session.allocation()):
+        crowded_session.withdraw(student_id)
+    result = crowded_session.reoptimize("deferred_acceptance")
+    assert result["changes"] == {}
+
+
+def test_failed_session_event_changes_nothing(crowded_session, monkeypatch):
+    before = (crowded_session.allocation(), crowded_session.summary())
+    withdrawn = next(iter(crowded_session.allocation()))
+
+    def failing_assign(*args):
+        raise RuntimeError("event failed")
+
+    # Fails when the freed seat is refilled, after the withdrawal itself.
+    monkeypatch.setattr(crowded_session, "_assign", failing_assign)
+    with pytest.raises(RuntimeError):
+        crowded_session.withdraw(withdrawn)
+    monkeypatch.undo()
+    assert (crowded_session.allocation(), crowded_session.summary()) == before
+    assert crowded_session.reoptimize("deferred_acceptance")["changes"] == {}
+
+
+def test_idle_sessions_expire(engine, small_population):
+    _, internships = small_population
+    features = engine.score_matrix.build_internship_features(internships)
+    store = AllocationSessionStore(idle_ttl=60)
+    idle = store.create(engine.score_matrix, features)
+    active = store.create(engine.score_matrix, features)
+    idle.last_used -= 120
+    assert store.get(active.session_id) is active
+    with pytest.raises(KeyError):
+        store.get(idle.session_id)
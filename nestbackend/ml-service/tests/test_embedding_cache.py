@@ -0,0 +1,38 @@
+import threading
+import numpy as np
+
+from app.core.embedding_cache import SkillEmbeddingCache
+
+
+def vectors(count: int, seed: int) -> np.ndarray:
+    return np.random.default_rng(seed).standard_normal((count, 4)).astype(np.float32)
+
+
+def test_saves_merge_entries_from_other_processes(tmp_path):
+    path = tmp_path / "skill_embeddings.npz"
+    api, worker = (SkillEmbeddingCache(10, path, "model") for _ in range(2))
+    api.store(["python", "sql"], vectors(2, 0))
+    worker.store(["sql", "excel"], vectors(2, 1))
+    api.save()
+    worker.save()
+
+    restarted = SkillEmbeddingCache(10, path, "model")
+    restarted.load()
+    found, missing = restarted.lookup(["python", "sql", "excel"])
+    assert missing == []
+    np.testing.assert_array_equal(found["sql"], vectors(2, 1)[0])
+
+
+def test_saves_after_enough_new_entries(tmp_path):
+    path = tmp_path / "skill_embeddings.npz"
+    cache = SkillEmbeddingCache(10, path, "model", save_every=3)
+    cache.store(["python", "sql"], vectors(2, 0))
+    assert not path.exists()
+    cache.store(["excel"], vectors(1, 1))
+    for thread in threading.enumerate():
+        if thread.name == "embedding-cache-save":
+            thread.join()
+
+    restarted = SkillEmbeddingCache(10, path, "model")
+    restarted.load()
+    assert len(restarted) == 3
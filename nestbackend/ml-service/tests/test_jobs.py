@@ -0,0 +1,123 @@
+import asyncio
+import threading
+import pytest
+
+from app.api.routes.jobs import job_request
+from app.core.config import settings
+from app.core.executor import MatchingExecutor
+from app.models.schemas import AllocationRequest, MatchRequest
+from app.services import jobs
+from app.services.jobs import JobManager
+
+
+class Interrupted(BaseException):
+    # Stands in for the process dying: not an Exception, so the job is
+    # left running rather than marked failed.
+    pass
+
+
+@pytest.fixture
+def job_manager(model_manager, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "JOB_DIR", str(tmp_path / "jobs"))
+    monkeypatch.setattr(settings, "SCORING_CHUNK_SIZE", 25)
+    manager = JobManager(model_manager, backend="local")
+    # Jobs are run by the test rather than a background thread.
+    monkeypatch.setattr(manager, "_dispatch", lambda job_id: None)
+    return manager
+
+
+def watch_chunks(manager, method: str, interrupt_after=None) -> list:
+    # Shadows the manager's chunk method with one that counts its calls
+    # and optionally dies after `interrupt_after` of them; deleting the
+    # attribute restores the original.
+    original = getattr(manager, method)
+    calls = []
+
+    def chunk(*args, **kwargs):
+        if len(calls) == interrupt_after:
+            raise Interrupted()
+        calls.append(1)
+        return original(*args, **kwargs)
+
+    setattr(manager, method, chunk)
+    return calls
+
+
+def all_results(manager, job_id: str) -> list:
+    return manager.results(job_id, 0, 10 ** 6)["results"]
+
+
+def test_match_job_resumes_from_checkpoints(job_manager, population):
+    students, internships = population
+    request = job_request(MatchRequest(students=students, internships=internships), internships)
+
+    reference = job_manager.submit("match", request, len(students))["job_id"]
+    job_manager.run(reference)
+
+    job_id = job_manager.submit("match", request, len(students))["job_id"]
+    watch_chunks(job_manager, "_match_chunk", interrupt_after=2)
+    with pytest.raises(Interrupted):
+        job_manager.run(job_id)
+    del job_manager._match_chunk
+    status = job_manager.status(job_id)
+    assert status["status"] == "running"
+    assert status["processed_students"] == 50
+    assert len(all_results(job_manager, job_id)) == 50
+
+    calls = watch_chunks(job_manager, "_match_chunk")
+    job_manager.run(job_id)
+    assert len(calls) == 3
+    assert job_manager.status(job_id)["status"] == "completed"
+    assert all_results(job_manager, job_id) == all_results(job_manager, reference)
+
+
+def test_allocation_job_resumes_from_checkpoints(job_manager, engine, population):
+    students, internships = population
+    request = {
+        **job_request(AllocationRequest(students=students, internships=internships, top_k=10), internships),
+        "diversity_boost": True
+    }
+
+    job_id = job_manager.submit("allocation", request, len(students))["job_id"]
+    watch_chunks(job_manager, "_edges_chunk", interrupt_after=3)
+    with pytest.raises(Interrupted):
+        job_manager.run(job_id)
+    del job_manager._edges_chunk
+
+    calls = watch_chunks(job_manager, "_edges_chunk")
+    job_manager.run(job_id)
+    assert len(calls) == 2
+
+    page = job_manager.results(job_id, 0, 10 ** 6)
+    expected = engine.allocate(students, internships, solver=page["summary"]["solver"], top_k=10)
+    assert page["status"] == "completed"
+    assert page["allocation"] == expected.allocation
+
+
+def test_job_chunks_take_matching_slots(job_manager, population, monkeypatch):
+    students, internships = population
+    request = job_request(MatchRequest(students=students, internships=internships), internships)
+    reference = job_manager.submit("match", request, len(students))["job_id"]
+    job_manager.run(reference)
+
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    executor = MatchingExecutor(kind="thread", workers=1, queue_size=0)
+
+    async def start():
+        executor.start()
+
+    asyncio.run_coroutine_threadsafe(start(), loop).result()
+    monkeypatch.setattr(jobs, "matching_executor", executor)
+    try:
+        job_id = job_manager.submit("match", request, len(students))["job_id"]
+        job_manager.run(job_id)
+    finally:
+        executor.shutdown()
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
+
+    assert executor.completed == 5
+    assert all_results(job_manager, job_id) == all_results(job_manager, reference)
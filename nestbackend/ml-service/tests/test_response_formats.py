@@ -0,0 +1,143 @@
+import json
+import msgpack
+import pyarrow as pa
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+from app.core import response_formats
+from app.core.response_formats import (
+    ARROW, COLUMNAR_JSON, JSON, MSGPACK, encode_batch_response, negotiate
+)
+from app.models.schemas import BatchMatchResponse, MatchResult
+
+
+@pytest.mark.parametrize("accept, expected", [
+    (None, JSON),
+    ("", JSON),
+    ("*/*", JSON),
+    ("text/html", JSON),
+    ("application/msgpack", MSGPACK),
+    (f"{JSON};q=0.5, {ARROW}", ARROW),
+    (f"{ARROW};q=0.2, {COLUMNAR_JSON};q=0.9", COLUMNAR_JSON),
+    (f"{MSGPACK};q=0, {JSON}", JSON),
+    (f"{ARROW}, {MSGPACK}", ARROW)
+])
+def test_negotiate(accept, expected):
+    assert negotiate(accept) == expected
+
+
+def test_negotiate_falls_back_past_missing_packages(monkeypatch):
+    monkeypatch.setattr(response_formats, "pa", None)
+    assert negotiate(f"{ARROW}, {MSGPACK}") == MSGPACK
+    assert negotiate(f"{ARROW}, */*") == JSON
+    with pytest.raises(HTTPException) as error:
+        negotiate(ARROW)
+    assert error.value.status_code == 406
+
+
+@pytest.fixture
+def response(engine, population):
+    students, internships = population
+    matches = engine.batch_match(students, internships)
+    results = [
+        MatchResult(
+            student_id=s.student_id,
+            student_name=s.name,
+            matches=matches[s.student_id],
+            total_matches=len(matches[s.student_id])
+        )
+        for s in students
+    ]
+    return BatchMatchResponse(
+        results=results,
+        total_students_processed=len(results),
+        total_matches_generated=sum(r.total_matches for r in results),
+        processing_time_seconds=0.5,
+        run_id="run"
+    )
+
+
+def expected_rows(response: BatchMatchResponse) -> list:
+    return [
+        (r.student_id, [m.internship_id for m in r.matches], [m.overall_score for m in r.matches],
+         [m.explanation["skills"] for m in r.matches])
+        for r in response.results
+    ]
+
+
+def columnar_rows(payload: dict) -> list:
+    rows, start = [], 0
+    for student_id, count in zip(payload["student_ids"], payload["total_matches"]):
+        end = start + count
+        rows.append((
+            student_id,
+            payload["internship_ids"][start:end],
+            list(payload["overall_score"][start:end]),
+            payload["explanation_skills"][start:end]
+        ))
+        start = end
+    return rows
+
+
+def test_json_round_trip(response):
+    encoded = encode_batch_response(response, JSON)
+    assert encoded.media_type == JSON
+    assert BatchMatchResponse.model_validate_json(encoded.body) == response
+
+
+@pytest.mark.parametrize("media_type, decode", [
+    (COLUMNAR_JSON, json.loads),
+    (MSGPACK, msgpack.unpackb)
+])
+def test_columnar_round_trip(response, media_type, decode):
+    encoded = encode_batch_response(response, media_type)
+    assert encoded.media_type == media_type
+    assert encoded.headers["vary"] == "Accept"
+    payload = decode(encoded.body)
+    assert payload["total_matches_generated"] == response.total_matches_generated
+    assert payload["run_id"] == "run"
+    assert columnar_rows(payload) == expected_rows(response)
+
+
+def test_arrow_round_trip(response):
+    encoded = encode_batch_response(response, ARROW)
+    table = pa.ipc.open_stream(encoded.body).read_all()
+    summary = json.loads(table.schema.metadata[b"summary"])
+    assert summary["total_students_processed"] == response.total_students_processed
+    rows = list(zip(
+        table["student_id"].to_pylist(),
+        table["internship_id"].to_pylist(),
+        table["overall_score"].to_pylist(),
+        table["explanation_skills"].to_pylist()
+    ))
+    assert [tuple(row) for row in rows] == expected_rows(response)
+
+
+def test_batch_route_negotiates(model_manager, population, monkeypatch):
+    from app.core import model_manager as model_manager_module
+    from app.core.config import settings
+    from app.core.startup import startup
+    from app.main import app
+    from app.services.result_cache import match_result_cache
+
+    monkeypatch.setattr(model_manager_module.model_manager, "skill_encoder", model_manager.skill_encoder)
+    monkeypatch.setattr(startup, "status", "ready")
+    monkeypatch.setattr(match_result_cache, "backend_name", "off")
+    students, internships = population
+    body = {
+        "students": [s.model_dump(mode="json") for s in students[:10]],
+        "internships": [i.model_dump(mode="json") for i in internships]
+    }
+    client = TestClient(app, headers={"X-API-Key": settings.API_KEY})
+
+    plain = client.post("/api/v1/matching/batch", json=body)
+    packed = client.post("/api/v1/matching/batch", json=body, headers={"Accept": MSGPACK})
+    assert plain.status_code == packed.status_code == 200
+    assert packed.headers["content-type"] == MSGPACK
+    assert columnar_rows(msgpack.unpackb(packed.content)) == expected_rows(
+        BatchMatchResponse.model_validate(plain.json())
+    )
+
+    monkeypatch.setattr(response_formats, "pa", None)
+    assert client.post("/api/v1/matching/batch", json=body, headers={"Accept": ARROW}).status_code == 406
@@ -0,0 +1,38 @@
+import redis
+
+from app.services.result_cache import MatchResultCache, RedisResultBackend
+
+
+class UnreachableClient:
+    def __init__(self):
+        self.calls = 0
+
+    def mget(self, keys):
+        self.calls += 1
+        raise redis.ConnectionError("Connection refused")
+
+    def pipeline(self, transaction=True):
+        self.calls += 1
+        raise redis.ConnectionError("Connection refused")
+
+
+def test_unreachable_redis_is_a_miss(population):
+    students, _ = population
+    cache = MatchResultCache(backend="redis", ttl=60)
+    assert cache.stats()["backend"] == "redis"
+    assert cache._backend is None
+
+    client = UnreachableClient()
+    cache._backend = RedisResultBackend(client)
+    assert cache.lookup("context", students[:3]) == [None] * 3
+    assert cache.misses == 3 and cache.errors == 1
+
+    # Bypassed until the retry interval passes: no more waiting on Redis.
+    cache.store("context", students[:3], {}, 0.1)
+    assert cache.lookup("context", students[:3]) == [None] * 3
+    assert client.calls == 1
+    assert cache.stats()["available"] is False
+
+    cache._unavailable_until = 0.0
+    cache.store("context", students[:3], {}, 0.1)
+    assert client.calls == 2
@@ -0,0 +1,82 @@
+import pytest
+
+from app.core.config import settings
+from app.core.metrics import current_run, track
+from app.services.sharded_matching import ShardedScoreMatrix, shard_pool
+
+
+def rankings(matches):
+    return {
+        student_id: [(m.internship_id, m.overall_score) for m in found]
+        for student_id, found in matches.items()
+    }
+
+
+def assert_same_rankings(actual, expected):
+    assert actual.keys() == expected.keys()
+    for student_id, found in expected.items():
+        assert [i for i, _ in actual[student_id]] == [i for i, _ in found], student_id
+        assert [s for _, s in actual[student_id]] == pytest.approx([s for _, s in found], abs=1e-4)
+
+
+@pytest.fixture
+def vectorized(engine, population, monkeypatch):
+    monkeypatch.setattr(settings, "SCORE_PRUNING", False)
+    students, internships = population
+    return rankings(engine.batch_match(students, internships, scoring_mode="vectorized"))
+
+
+def test_vectorized_matches_pairwise(engine, small_population):
+    students, internships = small_population
+    pairwise = engine.batch_match(students, internships, min_score=0.3, scoring_mode="pairwise")
+    vectorized = engine.batch_match(students, internships, min_score=0.3, scoring_mode="vectorized")
+    assert_same_rankings(rankings(vectorized), rankings(pairwise))
+
+
+def test_pairwise_explanations_are_timed_apart(engine, small_population, monkeypatch):
+    monkeypatch.setattr(settings, "CANDIDATE_RETRIEVAL", False)
+    students, internships = small_population
+    with track("pairwise", 1):
+        run = current_run.get()
+        matches = engine.match_student_to_internships(students[0], internships, min_score=0.3)
+    assert matches and all(m.explanation for m in matches)
+    assert run.stages.get("explain", 0) > 0
+    assert "select" not in run.stages
+
+
+def test_pruning_keeps_rankings(engine, population, vectorized, monkeypatch):
+    monkeypatch.setattr(settings, "SCORE_PRUNING", True)
+    students, internships = population
+    assert_same_rankings(rankings(engine.batch_match(students, internships)), vectorized)
+
+
+def test_tiled_matches_vectorized(engine, population, vectorized):
+    students, internships = population
+    tiled = engine.batch_match(students, internships, scoring_mode="tiled")
+    assert_same_rankings(rankings(tiled), vectorized)
+
+
+def test_exhaustive_retrieval_matches_vectorized(engine, population, vectorized):
+    students, internships = population
+    retrieved = engine.batch_match(students, internships, candidate_depth=len(internships))
+    assert_same_rankings(rankings(retrieved), vectorized)
+
+
+def test_sharded_matches_single_process(engine, population):
+    students, internships = population
+    engine.score_matrix.chunk_size = 16
+    sharded = ShardedScoreMatrix(engine.score_matrix, workers=2)
+    assert sharded.enabled(len(students))
+    try:
+        with track("sharded", len(students)):
+            run = current_run.get()
+            actual = {s.student_id: m for chunk in sharded.iter_match(students, internships) for s, m in chunk}
+    finally:
+        shard_pool.shutdown()
+    # Stage times and pairs of the workers reach the caller's run.
+    assert run.stages.get("score", 0) > 0
+    assert run.pairs > 0
+    expected = {
+        s.student_id: m for chunk in engine.score_matrix.iter_match(students, internships) for s, m in chunk
+    }
+    assert_same_rankings(rankings(actual), rankings(expected))